@@ -0,0 +1,134 @@
+import os
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Query
+
+from backend.search.cache import search_cache
+from backend.search.medicine_cache import medicine_cache
+from backend.search.embedding import pill_embedder
+from backend.search.local_engine import pill_engine
+from backend.search.logic import PILL_SEARCH_MODE
+from backend.search.photo_metrics import photo_metrics
+from backend.search.profiling import query_profiler
+from backend.search.imprint_suggest import imprint_suggester
+from backend.search.imprint_matcher import imprint_matcher
+from backend.search.medicine_names import medicine_name_index
+from backend.services.image_preprocess import image_preprocessor
+from backend.services.vision_cache import vision_cache
+from backend.services.vision_limiter import gemini_limiter
+from backend.services.vision_metrics import vision_metrics
+
+load_dotenv()
+
+# 운영 통계와 캐시/프로파일 초기화(DELETE)가 인증 없이 열리므로 기본은 등록하지 않음 (내부망/개발 환경에서만 켬)
+DEBUG_ROUTES_ENABLED = os.getenv("DEBUG_ROUTES_ENABLED", "false").lower() == "true"
+
+router = APIRouter(prefix="/debug", tags=["Debug"])
+
+
+@router.get("/search-cache", response_model=dict)
+async def get_search_cache_stats():
+    """
+    알약 검색 결과 캐시 통계 (적중/미스 수, 항목 수, 인덱스 세대)
+    """
+    return {"status": "success", "search_cache": search_cache.get_stats()}
+
+
+@router.get("/medicine-cache", response_model=dict)
+async def get_medicine_cache_stats():
+    """
+    medicine_data 문서 캐시 통계 (적중/미스/negative 적중 수, 사용 바이트)
+    """
+    return {"status": "success", "medicine_cache": medicine_cache.get_stats()}
+
+
+@router.get("/photo-search", response_model=dict)
+async def get_photo_search_stats():
+    """
+    알약 사진 식별 지표 (검색 방식별 업로드 수, 식별 성공당 재시도 수) 및 쿼리 임베딩 통계
+    """
+    return {
+        "status": "success",
+        "search_mode": PILL_SEARCH_MODE,
+        "photo_identification": photo_metrics.get_stats(),
+        "embedding": pill_embedder.get_stats(),
+    }
+
+
+@router.get("/es-profile", response_model=dict)
+async def get_es_profiles(limit: int = Query(20, ge=1, le=500, description="반환할 최근 항목 수")):
+    """
+    표본/느린 알약 검색의 ES 절별 실행 시간 (ES_PROFILE_ENABLED=true일 때 수집)
+    """
+    return {
+        "status": "success",
+        "profiler": query_profiler.get_stats(),
+        "entries": query_profiler.get_entries(limit),
+    }
+
+
+@router.delete("/es-profile", response_model=dict)
+async def clear_es_profiles():
+    """
+    수집된 ES 프로파일 항목 삭제
+    """
+    query_profiler.clear()
+    return {"status": "success"}
+
+
+@router.get("/imprint-suggest", response_model=dict)
+async def get_imprint_suggest_stats():
+    """
+    인쇄문자 자동완성 색인 통계 (키 수, 생성 시간, 인덱스 세대)
+    """
+    return {"status": "success", "imprint_suggest": imprint_suggester.get_stats()}
+
+
+@router.get("/imprint-matcher", response_model=dict)
+async def get_imprint_matcher_stats():
+    """
+    인쇄문자 가중 편집 거리 매처 통계 (키/삭제 문자열 수, 매칭 캐시, 인덱스 세대)
+    """
+    return {"status": "success", "imprint_matcher": imprint_matcher.get_stats()}
+
+
+@router.get("/local-engine", response_model=dict)
+async def get_local_engine_stats():
+    """
+    로컬 알약 엔진 스냅샷 통계 (문서 수, 인덱스 세대, 로드/갱신 수)
+    """
+    return {"status": "success", "local_engine": pill_engine.get_stats()}
+
+
+@router.get("/medicine-names", response_model=dict)
+async def get_medicine_name_index_stats():
+    """
+    의약품 이름 로컬 색인 통계 (문서 수, 적중/미스 수, 생성 시간)
+    """
+    return {"status": "success", "medicine_names": medicine_name_index.get_stats()}
+
+
+@router.get("/gemini", response_model=dict)
+async def get_gemini_stats():
+    """
+    Gemini 비전 호출 지표
+      - gemini: 동시성 (진행/대기 중인 호출 수, 대기 시간과 호출 시간 분위수, 거절 수)
+      - responses: 응답 방식별 토큰 수(입력/출력/사고/캐시), 잘린 응답, JSON 파싱 실패 수
+    """
+    return {"status": "success", "gemini": gemini_limiter.get_stats(), "responses": vision_metrics.get_stats()}
+
+
+@router.get("/image-preprocess", response_model=dict)
+async def get_image_preprocess_stats():
+    """
+    비전 추론 전 이미지 정규화 통계 (처리/자르기/오류 수, 입출력 바이트 비율, 평균 처리 시간)
+    """
+    return {"status": "success", "image_preprocess": image_preprocessor.get_stats()}
+
+
+@router.get("/vision-cache", response_model=dict)
+async def get_vision_cache_stats():
+    """
+    비전 분석 결과 캐시 통계 (L1/L2 적중, 미스, 저장, 축출 수)
+    """
+    return {"status": "success", "vision_cache": vision_cache.get_stats()}
@@ -1,25 +1,39 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
 import os
-import tempfile
-import shutil
 import logging
 
 # 텍스트 검색을 위한 통합 검색 로직
-from backend.search.logic import search_pills
+from backend.search.logic import search_pills, search_pills_batch
+# 인쇄문자 자동완성
+from backend.search.imprint_suggest import imprint_suggester, IMPRINT_SUGGEST_ENABLED
+from backend.db.elastic import get_es, INDEX_NAME
+from backend.utils.helpers import normalize_shape, get_shape_group, normalize_color, get_color_group
 # 이미지 분석을 위한 Gemini 서비스
 from backend.services.gemini_service import analyze_pill_image
+from backend.utils.image_io import read_multipart_image
 
 router = APIRouter(prefix="/medicine", tags=["Medicine"])
 logger = logging.getLogger("MedicineVisonAPI")
 
+# 클라이언트가 선택할 수 있는 응답 필드 프로필 (id는 내부 전용)
+PUBLIC_SOURCE_PROFILES = ("card", "full")
+
+
+def _validate_fields(fields: str) -> str:
+    if fields not in PUBLIC_SOURCE_PROFILES:
+        raise HTTPException(status_code=400, detail=f"fields는 {', '.join(PUBLIC_SOURCE_PROFILES)} 중 하나여야 합니다.")
+    return fields
+
+
 # 이미지 기반 검색 결과가 영 이상한 약만 가져올 때, 확실하게 사용자가 입력해서 검색할 수 있게 하기 위함...
 @router.get("/text", response_model=dict) 
 async def search_by_text(
     imprint: Optional[str] = Query(None, description="약품 인쇄 문자 또는 마크 코드"),
     drug_shape: Optional[str] = Query(None, description="약품 모양"),
     color_classes: Optional[str] = Query(None, description="약품 색상"),
-    top_k: int = Query(8, ge=1, le=20, description="반환할 결과 수")
+    top_k: int = Query(8, ge=1, le=20, description="반환할 결과 수"),
+    fields: str = Query("card", description="응답 필드 프로필 (card: 검색 카드 표시 필드, full: 임베딩 제외 전체)")
 ):
     """
     텍스트 기반 검색 API:
@@ -27,6 +41,7 @@ async def search_by_text(
     """
     if not imprint and not drug_shape and not color_classes:
         raise HTTPException(status_code=400, detail="최소 1개 이상의 파라미터가 필요합니다.")
+    profile = _validate_fields(fields)
     
     features = {}
     if imprint:
@@ -36,7 +51,7 @@ async def search_by_text(
     if color_classes:
         features["color_classes"] = color_classes
 
-    results = await search_pills(features, top_k=top_k)
+    results = await search_pills(features, top_k=top_k, profile=profile)
     return {
         "status": "success",
         "analysis": features,
@@ -50,45 +65,84 @@ async def search_by_text(
         ]
     }
 
-@router.post("/image", response_model=dict)
+@router.get("/imprint/suggest", response_model=dict)
+async def suggest_imprint(
+    prefix: str = Query(..., min_length=1, max_length=30, description="입력 중인 인쇄문자 또는 마크 코드"),
+    drug_shape: Optional[str] = Query(None, description="약품 모양 (같은 모양 그룹만 제안)"),
+    color_classes: Optional[str] = Query(None, description="약품 색상 (같은 색상 그룹만 제안)"),
+    limit: int = Query(10, ge=1, le=30, description="반환할 제안 수")
+):
+    """
+    인쇄문자 자동완성 API:
+      - 알려진 print_front/print_back/마크 코드 중 prefix로 시작하는 값을 메모리 색인에서 찾아 제안합니다.
+      - drug_shape, color_classes를 주면 해당 모양/색상 그룹의 알약에 있는 값만 제안합니다.
+    """
+    if not IMPRINT_SUGGEST_ENABLED:
+        raise HTTPException(status_code=404, detail="인쇄문자 자동완성이 비활성화되어 있습니다.")
+    await imprint_suggester.ensure_fresh(get_es(), INDEX_NAME)
+    if not imprint_suggester.ready:
+        raise HTTPException(status_code=503, detail="인쇄문자 자동완성 색인을 준비 중입니다.")
+
+    shape_group = get_shape_group(normalize_shape(drug_shape)) if drug_shape else None
+    color_groups = get_color_group(normalize_color(color_classes)) if color_classes else None
+    suggestions = imprint_suggester.suggest(prefix, shape_group, color_groups, limit)
+    return {"status": "success", "prefix": prefix, "suggestions": suggestions}
+
+
+# 업로드 본문을 직접 파싱하므로(UploadFile 미사용) 문서용 요청 스키마만 명시
+_IMAGE_UPLOAD_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"multipart/form-data": {"schema": {
+            "type": "object",
+            "required": ["file"],
+            "properties": {"file": {"type": "string", "format": "binary"}},
+        }}},
+    }
+}
+
+
+@router.post("/image", response_model=dict, openapi_extra=_IMAGE_UPLOAD_BODY)
 async def search_by_image(
-    file: UploadFile = File(...),
-    top_k: int = Query(5, ge=1, le=20, description="반환할 결과 수")
+    request: Request,
+    top_k: int = Query(5, ge=1, le=20, description="반환할 결과 수"),
+    fields: str = Query("card", description="응답 필드 프로필 (card: 검색 카드 표시 필드, full: 임베딩 제외 전체)")
 ):
     """
     이미지 기반 검색 API:
-      1. 업로드된 이미지를 임시 파일로 저장합니다.
+      1. 업로드 본문을 요청 스트림에서 직접 읽어 이미지(file 필드)를 메모리로 모읍니다.
+         (크기 제한 MAX_IMAGE_UPLOAD_BYTES를 읽는 중에 적용, 임시 파일 없음)
       2. Gemini 서비스를 호출하여 이미지에서 imprint, drug_shape, color_classes 정보를 추출합니다.
       3. 추출된 정보를 기반으로 통합 검색 함수를 호출해 관련 약품을 검색합니다.
       4. 각 분석 후보에 대해 검색 결과를 묶어 반환합니다.
     """
-    temp_file_path = ""
+    profile = _validate_fields(fields)
     try:
-        if not file.filename:
+        filename, image_data = await read_multipart_image(request)
+        if not filename:
             raise HTTPException(status_code=400, detail="파일 이름이 없습니다.")
-        
-        file_ext = os.path.splitext(file.filename)[1].lower()
+
+        file_ext = os.path.splitext(filename)[1].lower()
         if file_ext not in [".jpg", ".jpeg", ".png", ".webp"]:
             raise HTTPException(status_code=400, detail="지원하지 않는 이미지 형식입니다. (JPG, JPEG, PNG, WEBP)")
-        
-        # 파일을 임시 파일로 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix=file_ext) as tmp:
-            temp_file_path = tmp.name
-            shutil.copyfileobj(file.file, tmp)
-        
+
         # Gemini 서비스를 통해 이미지 분석
-        analysis_results = await analyze_pill_image(temp_file_path)
+        analysis_results = await analyze_pill_image(image_data)
         if not analysis_results:
             raise HTTPException(status_code=500, detail="이미지 분석 결과가 없습니다.")
         
-        formatted_results = []
         for candidate in analysis_results:
             # candidate는 {"drug_shape": ..., "color_classes": ..., "imprint": ...} 형태입니다.
             # ⬇ imprint 정제 추가
             if "imprint" in candidate and candidate["imprint"]:
                 candidate["imprint"] = candidate["imprint"].replace(" ", "").replace("|", "").replace("\n", "").replace(
                     "\r", "")
-            search_result = await search_pills(candidate, top_k=top_k)
+
+        # 모든 후보를 한 번의 _msearch로 검색
+        search_results = await search_pills_batch(analysis_results, top_k=top_k, profile=profile)
+
+        formatted_results = []
+        for candidate, search_result in zip(analysis_results, search_results):
             formatted_results.append({
                 "analysis": candidate,
                 "search_results": [
@@ -102,9 +156,8 @@ async def search_by_image(
             })
         
         return {"status": "success", "results": formatted_results}
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"이미지 검색 오류: {e}", exc_info=True)
-        raise HTTPException(status_code=500, detail="이미지 기반 검색 실패")
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
\ No newline at end of file
+        raise HTTPException(status_code=500, detail="이미지 기반 검색 실패")
\ No newline at end of file
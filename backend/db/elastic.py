@@ -1,9 +1,10 @@
 import os
 import logging
+from typing import Dict, Optional
+
 from elasticsearch import AsyncElasticsearch
 from dotenv import load_dotenv
 
-from backend.utils.helpers import normalize_color, get_color_group, normalize_shape, get_shape_group
 
 logger = logging.getLogger(__name__)
 load_dotenv()
@@ -13,132 +14,111 @@ ELASTICSEARCH_HOST = os.getenv("ELASTICSEARCH_HOST", "elasticsearch")
 ELASTICSEARCH_PORT = os.getenv("ELASTICSEARCH_PORT", "9200")
 ELASTICSEARCH_URL = f"http://{ELASTICSEARCH_HOST}:{ELASTICSEARCH_PORT}"
 INDEX_NAME = os.getenv("ELASTICSEARCH_INDEX", "pills_v5")
+# 재색인 도구가 새 버전 인덱스(pills_vN)로 교체하는 별칭 (검색에 사용하려면 ELASTICSEARCH_INDEX에 지정)
+INDEX_ALIAS = os.getenv("ELASTICSEARCH_INDEX_ALIAS", "pills")
+# 의약품 상세 정보 인덱스 (외부 파이프라인이 관리)
+MEDICINE_INDEX_NAME = os.getenv("ELASTICSEARCH_MEDICINE_INDEX", "medicine_data")
 
 ELASTIC_USER = os.getenv("ELASTIC_USER", "elastic")
 ELASTIC_PASSWORD = os.getenv("ELASTIC_PASSWORD", "your_password")
 
-# AsyncElasticsearch 클라이언트 생성
-es = AsyncElasticsearch(
-    [ELASTICSEARCH_URL],
-    basic_auth=(ELASTIC_USER, ELASTIC_PASSWORD)
-)
-logger.warning(f"ES 연결 확인: {ELASTICSEARCH_URL} / USER: {ELASTIC_USER}")
-
-
-
-# # Elasticsearch 인덱스 매핑 (dense_vector 필드 등 포함)
-# INDEX_MAPPING = {
-#     "settings": {
-#         "analysis": {
-#             "char_filter": {
-#                 "remove_pipe": {
-#                     "type": "pattern_replace",
-#                     "pattern": "\\|",
-#                     "replacement": ""
-#                 }
-#             },
-#             "tokenizer": {
-#                 "korean_tokenizer": {
-#                     "type": "nori_tokenizer"
-#                 },
-#                 "english_ngram_tokenizer": {
-#                     "type": "ngram",
-#                     "min_gram": 2,
-#                     "max_gram": 3,
-#                     "token_chars": ["letter", "digit"]
-#                 }
-#             },
-#             "analyzer": {
-#                 "custom_korean_english": {
-#                     "tokenizer": "standard",
-#                     "filter": ["lowercase"],
-#                     "char_filter": ["remove_pipe"]
-#                 },
-#                 "korean_only": {
-#                     "tokenizer": "korean_tokenizer",
-#                     "char_filter": ["remove_pipe"]
-#                 },
-#                 "english_ngram_analyzer": {
-#                     "tokenizer": "english_ngram_tokenizer",
-#                     "filter": ["lowercase"]
-#                 }
-#             }
-#         }
-#     },
-#     "mappings": {
-#         "properties": {
-#             "embedding": {
-#                 "type": "dense_vector",
-#                 "dims": 384,
-#                 "index": True,
-#                 "similarity": "cosine"
-#             },
-#             "item_seq": {"type": "keyword"},
-#             "print_front": {
-#                 "type": "text",
-#                 "analyzer": "custom_korean_english",
-#                 "fields": {
-#                     "keyword": {"type": "keyword"}
-#                 }
-#             },
-#             "print_back": {
-#                 "type": "text",
-#                 "analyzer": "custom_korean_english",
-#                 "fields": {
-#                     "keyword": {"type": "keyword"}
-#                 }
-#             },
-#             "print_front_normalized": {
-#                 "type": "text",
-#                 "analyzer": "english_ngram_analyzer"
-#             },
-#             "print_back_normalized": {
-#                 "type": "text",
-#                 "analyzer": "english_ngram_analyzer"
-#             },
-#             "drug_shape": {"type": "keyword"},
-#             "color_classes": {"type": "keyword"},
-#             "shape_group": {"type": "keyword"},
-#             "color_group": {"type": "keyword"},
-#             "mark_code_front_anal": {
-#                 "type": "text",
-#                 "analyzer": "custom_korean_english"
-#             },
-#             "mark_code_back_anal": {
-#                 "type": "text",
-#                 "analyzer": "custom_korean_english"
-#             }
-#         }
-#     }
-# }
-
-# def process_pill_data(pill_data: dict) -> dict:
-#     """
-#     Elasticsearch에 저장하기 위해 pill_data를 전처리합니다.
-#       - color_classes를 단일 문자열로 전환하고, color_group 필드 추가
-#       - drug_shape 정규화 후, shape_group 추가
-#     """
-#     data = pill_data.copy()
-#     # _id 필드 제거
-#     data.pop("_id", None)
-    
-#     color = ""
-#     if "color_classes" in data and data["color_classes"]:
-#         if isinstance(data["color_classes"], list):
-#             color = data["color_classes"][0]
-#         else:
-#             color = data["color_classes"]
-#         color = normalize_color(color)
-#         data["color_classes"] = color
-#         data["color_group"] = get_color_group(color)
-    
-#     # 모양 처리
-#     if "drug_shape" in data and data["drug_shape"]:
-#         shape = normalize_shape(data["drug_shape"])
-#         data["drug_shape"] = shape
-#         data["shape_group"] = get_shape_group(shape)
-    
-#     return data
+# 클라이언트 연결 설정
+ES_CONNECTIONS_PER_NODE = int(os.getenv("ES_CONNECTIONS_PER_NODE", 32))
+ES_HTTP_COMPRESS = os.getenv("ES_HTTP_COMPRESS", "true").lower() == "true"
+ES_MAX_RETRIES = int(os.getenv("ES_MAX_RETRIES", 1))
+# 시간 초과 재시도 (공유 클라이언트와 admin 작업에만 적용, 켜면 재시도마다 요청 타임아웃만큼 응답이 늦어짐)
+ES_RETRY_ON_TIMEOUT = os.getenv("ES_RETRY_ON_TIMEOUT", "false").lower() == "true"
+# 노드 스니핑 (단일 노드/프록시 뒤에서는 광고 주소로 접속할 수 없으므로 기본 비활성화)
+ES_SNIFF_ENABLED = os.getenv("ES_SNIFF_ENABLED", "false").lower() == "true"
+ES_SNIFF_TIMEOUT = float(os.getenv("ES_SNIFF_TIMEOUT", 1.0))
+
+# 작업별 요청 타임아웃 (초)
+#   search: 알약 검색/_msearch, mget: item_seq 문서 조회, health: 상태/메타데이터 확인,
+#   admin: 색인/재색인 등 관리 작업 (클라이언트 기본값)
+ES_TIMEOUTS: Dict[str, float] = {
+    "search": float(os.getenv("ES_SEARCH_TIMEOUT", 3.0)),
+    "mget": float(os.getenv("ES_MGET_TIMEOUT", 2.0)),
+    "health": float(os.getenv("ES_HEALTH_TIMEOUT", 1.0)),
+    "admin": float(os.getenv("ES_ADMIN_TIMEOUT", 60.0)),
+}
+# 요청 타임아웃이 곧 응답 시간 예산인 작업 (ES_RETRY_ON_TIMEOUT과 관계없이 시간 초과 시 재시도하지 않음)
+ES_LATENCY_BOUND_OPERATIONS = ("search", "mget", "health")
+
+_es: Optional[AsyncElasticsearch] = None
+_es_by_operation: Dict[str, AsyncElasticsearch] = {}
+
+
+def create_es_client() -> AsyncElasticsearch:
+    """
+    튜닝된 AsyncElasticsearch 클라이언트를 생성합니다.
+    연결 풀은 사용하는 이벤트 루프에 묶이므로 루프 안(lifespan, CLI main)에서 호출해야 합니다.
+    """
+    logger.warning(f"ES 연결 확인: {ELASTICSEARCH_URL} / USER: {ELASTIC_USER}")
+    sniff_options = {}
+    if ES_SNIFF_ENABLED:
+        sniff_options = {
+            "sniff_on_start": True,
+            "sniff_on_node_failure": True,
+            "sniff_timeout": ES_SNIFF_TIMEOUT,
+            "min_delay_between_sniffing": 60,
+        }
+    return AsyncElasticsearch(
+        [ELASTICSEARCH_URL],
+        basic_auth=(ELASTIC_USER, ELASTIC_PASSWORD),
+        connections_per_node=ES_CONNECTIONS_PER_NODE,
+        http_compress=ES_HTTP_COMPRESS,
+        request_timeout=ES_TIMEOUTS["admin"],
+        max_retries=ES_MAX_RETRIES,
+        retry_on_timeout=ES_RETRY_ON_TIMEOUT,
+        **sniff_options,
+    )
+
+
+async def init_elasticsearch() -> AsyncElasticsearch:
+    """앱 시작 시(lifespan) 공유 클라이언트를 생성합니다."""
+    global _es
+    if _es is None:
+        _es = create_es_client()
+    return _es
+
+
+def get_es(operation: Optional[str] = None) -> AsyncElasticsearch:
+    """
+    공유 클라이언트를 반환합니다.
+    operation(search, mget, health, admin)을 지정하면 해당 작업의 요청 타임아웃이 적용된 클라이언트를 반환하며,
+    시간 초과 시 elasticsearch.ConnectionTimeout이 발생합니다. (search/mget/health는 시간 초과를 재시도하지 않음)
+    lifespan 밖(CLI, 벤치마크)에서 처음 호출되면 그 자리에서 생성합니다.
+    """
+    global _es
+    if _es is None:
+        _es = create_es_client()
+    if operation is None:
+        return _es
+    client = _es_by_operation.get(operation)
+    if client is None:
+        options = {"request_timeout": ES_TIMEOUTS[operation]}
+        if operation in ES_LATENCY_BOUND_OPERATIONS:
+            options["retry_on_timeout"] = False
+        client = _es.options(**options)
+        _es_by_operation[operation] = client
+    return client
+
+
+
+# 사진 검색 결과에 표시하는 medicine_data 필드 (pills 문서의 medicine 객체로 비정규화)
+MEDICINE_DISPLAY_FIELDS = [
+    "item_name", "entp_name", "chart", "drug_shape", "color_classes", "line_front", "line_back",
+    "print_front", "print_back", "class_name", "indications", "dosage", "precautions", "side_effects",
+    "item_image",
+]
+
+
+def build_medicine_display(medicine_doc: dict) -> dict:
+    """
+    medicine_data 문서에서 사진 검색 결과 표시 필드만 추립니다. (값이 없는 필드는 제외)
+    """
+    return {field: medicine_doc[field] for field in MEDICINE_DISPLAY_FIELDS if medicine_doc.get(field) is not None}
+
 
 # async def setup_elasticsearch() -> bool:
 #     """
@@ -154,7 +134,7 @@ logger.warning(f"ES 연결 확인: {ELASTICSEARCH_URL} / USER: {ELASTIC_USER}")
 #         index_exists = await es.indices.exists(index=INDEX_NAME)
 #         if not index_exists:
 #             logger.info(f"Creating index '{INDEX_NAME}'...")
-#             await es.indices.create(index=INDEX_NAME, body=INDEX_MAPPING)
+#             await es.indices.create(index=INDEX_NAME, body=build_index_body())  # backend.db.index_settings
 #             logger.info(f"Index '{INDEX_NAME}' created successfully.")
 #         else:
 #             logger.info(f"Index '{INDEX_NAME}' already exists.")
@@ -165,7 +145,7 @@ logger.warning(f"ES 연결 확인: {ELASTICSEARCH_URL} / USER: {ELASTIC_USER}")
 
 async def check_elasticsearch_connection() -> bool:
     try:
-        health = await es.cluster.health()
+        health = await get_es("health").cluster.health()
         logger.info(f"Elasticsearch cluster health: {health['status']}")
         return True
     except Exception as e:
@@ -176,8 +156,13 @@ async def close_elasticsearch() -> None:
     """
     Elasticsearch 연결 종료.
     """
+    global _es
+    if _es is None:
+        return
     try:
-        await es.close()
+        await _es.close()
         logger.info("Elasticsearch connection closed.")
     except Exception as e:
-        logger.error(f"Elasticsearch closing error: {e}")
\ No newline at end of file
+        logger.error(f"Elasticsearch closing error: {e}")
+    _es = None
+    _es_by_operation.clear()
@@ -0,0 +1,192 @@
+# backend/db/index_settings.py
+"""
+pills 인덱스 매핑/설정 관리
+
+- 인덱스 매핑의 기준 정의(INDEX_MAPPING)와 버전(PILLS_MAPPING_VERSION)을 관리합니다.
+  매핑을 바꾸면 버전을 올리고 ingest reindex로 새 버전 인덱스를 만듭니다.
+- 성능 프로필
+    * eager_global_ordinals: 필터/집계에 쓰는 keyword 필드의 global ordinals를 refresh 시점에 미리 생성
+    * norms: false: 점수 계산에 쓰지 않는 text 필드만 대상 (현재 없음)
+      인쇄문자 분석/n-gram 필드는 match 점수에 쓰이고, 필드 길이 정규화가 짧은 인쇄문자의 일치를 긴 인쇄문자
+      안의 부분 일치보다 높게 매기므로 norms를 유지합니다. (한번 끈 norms는 되돌릴 수 없어 재색인 필요)
+    * index sort: 필터 필드 순으로 문서를 정렬해 같은 모양/색상 문서를 인접 블록에 저장 (생성 시에만 지정 가능)
+    * force merge: 대량 색인 후 세그먼트 1개로 병합 (읽기 전용 카탈로그)
+"""
+import copy
+import logging
+import os
+import time
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+PILLS_MAPPING_VERSION = 8
+PILLS_INDEX_PROFILE = os.getenv("PILLS_INDEX_PROFILE", "search")
+
+# pills 인덱스 기본 매핑 (dense_vector 필드 등 포함, 성능 프로필 적용 전)
+INDEX_MAPPING = {
+    "settings": {
+        "analysis": {
+            "char_filter": {
+                "remove_pipe": {
+                    "type": "pattern_replace",
+                    "pattern": "\\|",
+                    "replacement": ""
+                }
+            },
+            "tokenizer": {
+                "korean_tokenizer": {
+                    "type": "nori_tokenizer"
+                },
+                "english_ngram_tokenizer": {
+                    "type": "ngram",
+                    "min_gram": 2,
+                    "max_gram": 3,
+                    "token_chars": ["letter", "digit"]
+                }
+            },
+            "analyzer": {
+                "custom_korean_english": {
+                    "tokenizer": "standard",
+                    "filter": ["lowercase"],
+                    "char_filter": ["remove_pipe"]
+                },
+                "korean_only": {
+                    "tokenizer": "korean_tokenizer",
+                    "char_filter": ["remove_pipe"]
+                },
+                "english_ngram_analyzer": {
+                    "tokenizer": "english_ngram_tokenizer",
+                    "filter": ["lowercase"]
+                }
+            }
+        }
+    },
+    "mappings": {
+        "properties": {
+            "embedding": {
+                "type": "dense_vector",
+                "dims": 384,
+                "index": True,
+                "similarity": "cosine"
+            },
+            "item_seq": {"type": "keyword"},
+            "print_front": {
+                "type": "text",
+                "analyzer": "custom_korean_english",
+                "fields": {
+                    "keyword": {"type": "keyword"}
+                }
+            },
+            "print_back": {
+                "type": "text",
+                "analyzer": "custom_korean_english",
+                "fields": {
+                    "keyword": {"type": "keyword"}
+                }
+            },
+            "print_front_normalized": {
+                "type": "text",
+                "analyzer": "english_ngram_analyzer"
+            },
+            "print_back_normalized": {
+                "type": "text",
+                "analyzer": "english_ngram_analyzer"
+            },
+            "drug_shape": {"type": "keyword"},
+            "color_classes": {"type": "keyword"},
+            "shape_group": {"type": "keyword"},
+            "color_group": {"type": "keyword"},
+            "mark_code_front_anal": {
+                "type": "text",
+                "analyzer": "custom_korean_english"
+            },
+            "mark_code_back_anal": {
+                "type": "text",
+                "analyzer": "custom_korean_english"
+            },
+            # OCR 혼동 문자 정규형 (transform.canonicalize_imprint)
+            "print_front_canon": {"type": "keyword"},
+            "print_back_canon": {"type": "keyword"},
+            "mark_code_front_canon": {"type": "keyword"},
+            "mark_code_back_canon": {"type": "keyword"},
+            # 사진 검색 결과 표시용 medicine_data 필드 (ingest enrich, _source에만 저장하고 색인하지 않음)
+            "medicine": {"type": "object", "enabled": False}
+        }
+    }
+}
+
+# 성능 프로필
+#   default: 기준 매핑 그대로
+#   search: 검색 전용 카탈로그용 (필터 ordinals 선생성, index sort, 색인 후 force merge)
+PERFORMANCE_PROFILES: Dict[str, Dict[str, Any]] = {
+    "default": {
+        "eager_global_ordinals": [],
+        "disable_norms": [],
+        "index_sort": None,
+        "force_merge": False,
+    },
+    "search": {
+        "eager_global_ordinals": ["shape_group", "color_group"],
+        "disable_norms": [],
+        # color_group은 다중 값이므로 최솟값 기준
+        "index_sort": {"field": ["shape_group", "color_group"], "order": ["asc", "asc"], "mode": ["min", "min"]},
+        "force_merge": True,
+    },
+}
+
+def _profile(name: str) -> Dict[str, Any]:
+    profile = PERFORMANCE_PROFILES.get(name)
+    if profile is None:
+        raise ValueError(f"알 수 없는 인덱스 프로필: {name} ({', '.join(PERFORMANCE_PROFILES)})")
+    return profile
+
+
+def build_index_body(profile_name: str = PILLS_INDEX_PROFILE) -> Dict[str, Any]:
+    """
+    성능 프로필을 적용한 인덱스 생성 본문(settings + mappings)을 반환합니다.
+    """
+    profile = _profile(profile_name)
+    body = copy.deepcopy(INDEX_MAPPING)
+    properties = body["mappings"]["properties"]
+
+    for field in profile["eager_global_ordinals"]:
+        properties[field]["eager_global_ordinals"] = True
+    for field in profile["disable_norms"]:
+        properties[field]["norms"] = False
+    if profile["index_sort"]:
+        body["settings"].setdefault("index", {})["sort"] = copy.deepcopy(profile["index_sort"])
+
+    body["mappings"]["_meta"] = {"mapping_version": PILLS_MAPPING_VERSION, "profile": profile_name}
+    return body
+
+
+async def apply_profile(client, index_name: str, profile_name: str = PILLS_INDEX_PROFILE) -> None:
+    """
+    기존 인덱스에 프로필 중 동적으로 바꿀 수 있는 부분(eager_global_ordinals, norms 비활성화)을 적용합니다.
+    index sort는 인덱스 생성 시에만 지정할 수 있으므로 재색인이 필요하면 로그로 알립니다.
+    """
+    profile = _profile(profile_name)
+    properties = build_index_body(profile_name)["mappings"]["properties"]
+    fields = list(dict.fromkeys(profile["eager_global_ordinals"] + profile["disable_norms"]))
+    if fields:
+        await client.indices.put_mapping(index=index_name, properties={field: properties[field] for field in fields})
+        logger.info(f"{index_name} 매핑 프로필 적용: {profile_name} ({fields})")
+
+    if profile["index_sort"]:
+        settings = await client.indices.get_settings(index=index_name, name="index.sort.*")
+        for name, body in settings.items():
+            if not body.get("settings", {}).get("index", {}).get("sort"):
+                logger.warning(f"{name}에 index sort가 없습니다. 적용하려면 ingest reindex로 새 인덱스를 만드세요.")
+
+
+async def force_merge(client, index_name: str, max_num_segments: int = 1) -> None:
+    """대량 색인이 끝난 인덱스를 세그먼트 max_num_segments개로 병합합니다."""
+    started = time.monotonic()
+    await client.options(request_timeout=3600).indices.forcemerge(
+        index=index_name, max_num_segments=max_num_segments
+    )
+    logger.info(f"{index_name} force merge 완료 ({time.monotonic() - started:.1f}s)")
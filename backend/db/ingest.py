@@ -0,0 +1,587 @@
+# backend/db/ingest.py
+"""
+pills 인덱스 색인 도구
+
+사용법:
+    python -m backend.db.ingest canonical [--index pills_v5]
+        기존 인덱스 문서에 OCR 혼동 문자 정규형 필드(*_canon)를 채웁니다.
+    python -m backend.db.ingest normalized [--index pills_v5]
+        기존 인덱스 문서에 인쇄문자 n-gram 필드(print_*_normalized)를 채웁니다.
+    python -m backend.db.ingest embeddings [--index pills_v5] [--batch-size 256] [--cache snapshots/embeddings.sqlite]
+        문서 특징 텍스트를 fastembed로 배치 임베딩해 embedding 필드를 채웁니다. (하이브리드 검색용)
+    python -m backend.db.ingest enrich [--index pills_v5] [--medicine-index medicine_data] [--batch-size 500]
+        item_seq로 medicine_data를 조회해 사진 검색 결과 표시 필드를 medicine 객체로 채웁니다.
+        (사진 검색이 medicine_data 후속 조회 없이 pills 검색 한 번으로 끝나도록)
+    python -m backend.db.ingest profile [--index pills] [--profile search] [--force-merge]
+        기존 인덱스에 성능 프로필(eager_global_ordinals, norms 비활성화)을 적용하고 선택적으로 force merge합니다.
+    python -m backend.db.ingest reindex (--source pills.jsonl | --from-index pills) [--alias pills]
+                                        [--concurrency 4] [--chunk-size 500] [--embeddings] [--enrich] [--keep 2]
+        원본 데이터를 process_pill_data로 정규화해 새 버전 인덱스(pills_vN)에 스트리밍 색인한 뒤
+        별칭을 원자적으로 교체합니다. 검색은 별칭(ELASTICSEARCH_INDEX=pills)을 바라보도록 설정합니다.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from elasticsearch.helpers import async_bulk, async_scan, async_streaming_bulk
+
+from backend.db.elastic import (
+    get_es, close_elasticsearch, INDEX_NAME, INDEX_ALIAS, MEDICINE_INDEX_NAME, build_medicine_display,
+)
+from backend.db.index_settings import (
+    PERFORMANCE_PROFILES, PILLS_INDEX_PROFILE, apply_profile, build_index_body, force_merge,
+)
+from backend.search.embedding import (
+    EMBEDDING_BATCH_SIZE, EMBEDDING_CACHE_PATH, EMBEDDING_MODEL, EMBEDDING_THREADS,
+    EmbeddingStore, PillEmbedder, pill_document_text,
+)
+from backend.search.transform import canonicalize_imprint_values, compact_imprint_values
+from backend.utils.helpers import normalize_color, get_color_group, normalize_shape, get_shape_group
+
+logger = logging.getLogger(__name__)
+
+
+# 정규형 필드 -> 원본 필드
+CANONICAL_IMPRINT_FIELDS = {
+    "print_front_canon": "print_front",
+    "print_back_canon": "print_back",
+    "mark_code_front_canon": "mark_code_front_anal",
+    "mark_code_back_canon": "mark_code_back_anal",
+}
+
+# n-gram 인쇄문자 필드 -> 원본 필드
+NORMALIZED_IMPRINT_FIELDS = {
+    "print_front_normalized": "print_front",
+    "print_back_normalized": "print_back",
+}
+
+
+def process_pill_data(pill_data: dict) -> dict:
+    """
+    Elasticsearch에 저장하기 위해 pill_data를 전처리합니다.
+      - color_classes를 단일 문자열로 전환하고, color_group 필드 추가
+      - drug_shape 정규화 후, shape_group 추가
+      - 인쇄문자/마크 코드의 OCR 혼동 문자 정규형 필드 추가
+      - 인쇄문자 n-gram 필드(print_*_normalized) 추가
+    """
+    data = pill_data.copy()
+    # _id 필드 제거
+    data.pop("_id", None)
+    
+    color = ""
+    if "color_classes" in data and data["color_classes"]:
+        if isinstance(data["color_classes"], list):
+            color = data["color_classes"][0]
+        else:
+            color = data["color_classes"]
+        color = normalize_color(color)
+        data["color_classes"] = color
+        data["color_group"] = get_color_group(color)
+    
+    # 모양 처리
+    if "drug_shape" in data and data["drug_shape"]:
+        shape = normalize_shape(data["drug_shape"])
+        data["drug_shape"] = shape
+        data["shape_group"] = get_shape_group(shape)
+
+    # 인쇄문자 정규형
+    data.update(build_canonical_imprint_fields(data))
+    # 인쇄문자 n-gram 필드
+    data.update(build_normalized_imprint_fields(data))
+
+    return data
+
+
+def build_canonical_imprint_fields(source: dict) -> dict:
+    """
+    문서의 인쇄문자/마크 코드 필드로부터 정규형 필드 값을 계산합니다.
+    """
+    fields = {}
+    for canon_field, source_field in CANONICAL_IMPRINT_FIELDS.items():
+        value = canonicalize_imprint_values(source.get(source_field))
+        if value:
+            fields[canon_field] = value
+    return fields
+
+
+def build_normalized_imprint_fields(source: dict) -> dict:
+    """
+    문서의 인쇄문자 필드로부터 n-gram 필드 값(분할선/공백 제거)을 계산합니다.
+    """
+    fields = {}
+    for normalized_field, source_field in NORMALIZED_IMPRINT_FIELDS.items():
+        value = compact_imprint_values(source.get(source_field))
+        if value:
+            fields[normalized_field] = value
+    return fields
+
+
+async def backfill_derived_fields(client, index_name: str, derived_fields: dict, builder,
+                                  chunk_size: int = 500) -> int:
+    """
+    인덱스 전체를 스캔해 원본 필드로부터 계산되는 파생 필드를 부분 업데이트합니다.
+
+    Args:
+        derived_fields: 파생 필드 -> 원본 필드 (매핑은 index_settings 정의를 사용)
+        builder: 원본 _source로부터 파생 필드 값을 계산하는 함수
+
+    Returns:
+        업데이트된 문서 수
+    """
+    # 동적 매핑으로 잡히지 않도록 매핑을 먼저 추가
+    properties = build_index_body()["mappings"]["properties"]
+    await client.indices.put_mapping(
+        index=index_name,
+        properties={field: properties[field] for field in derived_fields}
+    )
+
+    async def actions():
+        async for hit in async_scan(
+            client,
+            index=index_name,
+            query={"query": {"match_all": {}}},
+            _source_includes=sorted(set(derived_fields.values())),
+        ):
+            fields = builder(hit.get("_source", {}))
+            if fields:
+                yield {"_op_type": "update", "_index": hit["_index"], "_id": hit["_id"], "doc": fields}
+
+    success, errors = await async_bulk(client, actions(), chunk_size=chunk_size, raise_on_error=False)
+    if errors:
+        logger.error(f"파생 필드 업데이트 실패 {len(errors)}건: {errors[:5]}")
+    logger.info(f"파생 필드 {sorted(derived_fields)} 업데이트 완료: {success}건 ({index_name})")
+    return success
+
+
+async def backfill_canonical_fields(client, index_name: str, chunk_size: int = 500) -> int:
+    """
+    기존 인덱스에 정규형 필드를 채워 재색인 없이 정규형 term 쿼리를 사용할 수 있게 합니다.
+    """
+    return await backfill_derived_fields(
+        client, index_name, CANONICAL_IMPRINT_FIELDS, build_canonical_imprint_fields, chunk_size
+    )
+
+
+async def backfill_normalized_fields(client, index_name: str, chunk_size: int = 500) -> int:
+    """
+    기존 인덱스에 n-gram 인쇄문자 필드를 채워 IMPRINT_FUZZY_MODE=ngram 검색을 사용할 수 있게 합니다.
+    (인덱스에 english_ngram_analyzer가 정의되어 있어야 합니다.)
+    """
+    return await backfill_derived_fields(
+        client, index_name, NORMALIZED_IMPRINT_FIELDS, build_normalized_imprint_fields, chunk_size
+    )
+
+
+# 임베딩 대상 텍스트를 만드는 원본 필드
+EMBEDDING_SOURCE_FIELDS = ["print_front", "print_back", "mark_code_front_anal", "mark_code_back_anal",
+                           "drug_shape", "color_classes"]
+
+
+async def backfill_embeddings(client, index_name: str, batch_size: int = 256, cache_path: str = EMBEDDING_CACHE_PATH,
+                              chunk_size: int = 500) -> int:
+    """
+    인덱스 전체를 스캔해 embedding 필드를 채웁니다.
+    문서를 batch_size개씩 모아 스레드에서 임베딩(모델 배치는 EMBEDDING_BATCH_SIZE)하고, 내용 해시 캐시(SQLite)로 변경되지 않은 문서는 재계산하지 않습니다.
+
+    Returns:
+        업데이트된 문서 수
+    """
+    properties = build_index_body()["mappings"]["properties"]
+    await client.indices.put_mapping(index=index_name, properties={"embedding": properties["embedding"]})
+
+    store = EmbeddingStore(cache_path) if cache_path else None
+    embedder = PillEmbedder(
+        model_name=EMBEDDING_MODEL,
+        batch_size=EMBEDDING_BATCH_SIZE,
+        threads=EMBEDDING_THREADS,
+        lru_size=0,
+        store=store,
+    )
+
+    async def actions():
+        batch = []
+
+        async def flush():
+            vectors = await embedder.aembed([pill_document_text(hit["_source"]) for hit in batch])
+            return [
+                {"_op_type": "update", "_index": hit["_index"], "_id": hit["_id"], "doc": {"embedding": vector}}
+                for hit, vector in zip(batch, vectors)
+            ]
+
+        async for hit in async_scan(
+            client,
+            index=index_name,
+            query={"query": {"match_all": {}}},
+            _source_includes=EMBEDDING_SOURCE_FIELDS,
+        ):
+            batch.append(hit)
+            if len(batch) >= batch_size:
+                for action in await flush():
+                    yield action
+                batch = []
+        if batch:
+            for action in await flush():
+                yield action
+
+    try:
+        success, errors = await async_bulk(client, actions(), chunk_size=chunk_size, raise_on_error=False)
+    finally:
+        if store is not None:
+            store.close()
+    if errors:
+        logger.error(f"embedding 업데이트 실패 {len(errors)}건: {errors[:5]}")
+    logger.info(f"embedding 업데이트 완료: {success}건 ({index_name}, {embedder.get_stats()})")
+    return success
+
+
+async def backfill_medicine_display(client, index_name: str, medicine_index: str = MEDICINE_INDEX_NAME,
+                                    batch_size: int = 500, chunk_size: int = 500) -> int:
+    """
+    인덱스 전체를 스캔해 item_seq가 같은 medicine_data 문서의 표시 필드를 medicine 객체로 채웁니다.
+    문서를 batch_size개씩 모아 medicine_data를 terms 쿼리 scroll 한 번으로 조회하므로 원본을 모두 메모리에 올리지 않습니다.
+
+    Returns:
+        업데이트된 문서 수
+    """
+    properties = build_index_body()["mappings"]["properties"]
+    await client.indices.put_mapping(index=index_name, properties={"medicine": properties["medicine"]})
+    missing = 0
+
+    async def actions():
+        nonlocal missing
+        batch = []
+
+        async def flush():
+            nonlocal missing
+            item_seqs = sorted({hit["_source"]["item_seq"] for hit in batch})
+            # item_seq당 문서 수를 알 수 없으므로 scroll로 일치 문서를 모두 받음
+            # item_seq당 첫 문서만 사용 (search_medicines_by_item_seqs와 같은 규칙, preserve_order로 검색과 같은 순서)
+            docs: Dict[str, Dict[str, Any]] = {}
+            async for medicine_hit in async_scan(
+                client,
+                index=medicine_index,
+                query={"query": {"terms": {"item_seq": item_seqs}}},
+                size=len(item_seqs),
+                preserve_order=True,
+            ):
+                docs.setdefault(medicine_hit["_source"].get("item_seq"), medicine_hit["_source"])
+            updates = []
+            for hit in batch:
+                doc = docs.get(hit["_source"]["item_seq"])
+                if doc is None:
+                    missing += 1
+                    continue
+                updates.append({"_op_type": "update", "_index": hit["_index"], "_id": hit["_id"],
+                                "doc": {"medicine": build_medicine_display(doc)}})
+            return updates
+
+        async for hit in async_scan(
+            client,
+            index=index_name,
+            query={"query": {"exists": {"field": "item_seq"}}},
+            _source_includes=["item_seq"],
+        ):
+            batch.append(hit)
+            if len(batch) >= batch_size:
+                for action in await flush():
+                    yield action
+                batch = []
+        if batch:
+            for action in await flush():
+                yield action
+
+    success, errors = await async_bulk(client, actions(), chunk_size=chunk_size, raise_on_error=False)
+    if errors:
+        logger.error(f"medicine 필드 업데이트 실패 {len(errors)}건: {errors[:5]}")
+    if missing:
+        logger.warning(f"{medicine_index}에 없는 item_seq {missing}건은 medicine 필드를 채우지 않았습니다.")
+    logger.info(f"medicine 필드 업데이트 완료: {success}건 ({index_name} <- {medicine_index})")
+    return success
+
+
+# ----- 새 버전 인덱스로 재색인 + 별칭 교체 -----
+
+# 색인 중에만 적용하는 설정 (검색 트래픽이 없는 새 인덱스이므로 refresh/복제 생략)
+BULK_LOAD_SETTINGS = {"refresh_interval": "-1", "number_of_replicas": 0, "translog.durability": "async"}
+
+
+async def iter_source_file(path: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    원본 파일의 레코드를 순서대로 내보냅니다.
+      - .jsonl: 한 줄에 문서 하나
+      - .json: 문서 배열
+      - .csv / .xlsx: pandas로 읽은 행 (빈 값은 제외)
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".jsonl":
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+    elif ext == ".json":
+        with open(path, encoding="utf-8") as f:
+            for record in json.load(f):
+                yield record
+    elif ext in (".csv", ".xlsx"):
+        import pandas as pd
+
+        frame = pd.read_csv(path, dtype=str) if ext == ".csv" else pd.read_excel(path, dtype=str)
+        for record in frame.to_dict(orient="records"):
+            yield {key: value for key, value in record.items() if isinstance(value, str) and value}
+    else:
+        raise ValueError(f"지원하지 않는 원본 파일 형식: {path}")
+
+
+async def iter_source_index(client, index_name: str) -> AsyncIterator[Dict[str, Any]]:
+    """기존 인덱스의 문서를 _id와 함께 내보냅니다. (매핑/정규화 규칙 변경 시 재색인용)"""
+    async for hit in async_scan(client, index=index_name, query={"query": {"match_all": {}}}, size=1000):
+        yield {**hit["_source"], "_id": hit["_id"]}
+
+
+async def next_index_name(client, alias: str) -> str:
+    """{alias}_vN 형식의 기존 인덱스 중 가장 큰 N + 1 버전 이름을 반환합니다."""
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    existing = await client.indices.get(index=f"{alias}_v*", expand_wildcards="all", ignore_unavailable=True)
+    versions = [int(match.group(1)) for name in existing if (match := pattern.match(name))]
+    return f"{alias}_v{max(versions, default=0) + 1}"
+
+
+async def create_versioned_index(client, index_name: str, profile: str = PILLS_INDEX_PROFILE) -> None:
+    body = build_index_body(profile)
+    body["settings"].setdefault("index", {}).update(BULK_LOAD_SETTINGS)
+    await client.indices.create(index=index_name, settings=body["settings"], mappings=body["mappings"])
+    logger.info(f"새 인덱스 생성: {index_name} (프로필 {profile}, {BULK_LOAD_SETTINGS})")
+
+
+def to_bulk_action(index_name: str, record: Dict[str, Any], id_field: Optional[str]) -> Dict[str, Any]:
+    doc_id = record.get("_id") if id_field is None else record.get(id_field)
+    action = {"_op_type": "index", "_index": index_name, "_source": process_pill_data(record)}
+    if doc_id is not None:
+        action["_id"] = str(doc_id)
+    return action
+
+
+async def stream_bulk_load(client, index_name: str, records: AsyncIterator[Dict[str, Any]],
+                           id_field: Optional[str], concurrency: int, chunk_size: int) -> Dict[str, int]:
+    """
+    레코드를 정규화해 concurrency개의 async_streaming_bulk 작업자가 청크 단위로 병렬 색인합니다.
+    큐 크기를 제한해 원본을 모두 메모리에 올리지 않습니다.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=chunk_size * concurrency * 2)
+    counts = {"indexed": 0, "failed": 0}
+
+    async def produce():
+        try:
+            async for record in records:
+                await queue.put(to_bulk_action(index_name, record, id_field))
+        finally:
+            for _ in range(concurrency):
+                await queue.put(None)
+
+    async def queued_actions():
+        while True:
+            action = await queue.get()
+            if action is None:
+                return
+            yield action
+
+    async def worker():
+        async for ok, item in async_streaming_bulk(
+            client, queued_actions(), chunk_size=chunk_size, max_retries=3, initial_backoff=1,
+            raise_on_error=False, raise_on_exception=False,
+        ):
+            if ok:
+                counts["indexed"] += 1
+            else:
+                counts["failed"] += 1
+                if counts["failed"] <= 5:
+                    logger.error(f"색인 실패: {item}")
+
+    tasks = [asyncio.create_task(produce())] + [asyncio.create_task(worker()) for _ in range(concurrency)]
+    try:
+        await asyncio.gather(*tasks)
+    except BaseException:
+        # 작업자가 실패하면 가득 찬 큐에서 생산자가 멈추지 않도록 모두 취소
+        for task in tasks:
+            task.cancel()
+        raise
+    return counts
+
+
+async def finalize_index(client, index_name: str, replicas: int, refresh_interval: str) -> None:
+    """색인용 설정을 운영 설정으로 되돌리고 복제본 할당을 기다립니다."""
+    await client.indices.put_settings(index=index_name, settings={
+        "index": {"refresh_interval": refresh_interval, "number_of_replicas": replicas,
+                  "translog.durability": "request"}
+    })
+    await client.indices.refresh(index=index_name)
+    health = await client.options(request_timeout=600).cluster.health(
+        index=index_name, wait_for_status="green" if replicas else "yellow", timeout="10m"
+    )
+    if health.get("timed_out"):
+        logger.warning(f"{index_name} 복제본 할당 대기 시간 초과 (status={health.get('status')})")
+
+
+async def swap_alias(client, alias: str, index_name: str) -> List[str]:
+    """
+    별칭을 새 인덱스로 원자적으로 교체하고, 이전에 별칭이 가리키던 인덱스 목록을 반환합니다.
+    """
+    if await client.indices.exists_alias(name=alias):
+        previous = sorted((await client.indices.get_alias(name=alias)).keys())
+    else:
+        if await client.indices.exists(index=alias):
+            raise RuntimeError(f"'{alias}'는 별칭이 아닌 실제 인덱스입니다. 다른 별칭 이름을 사용하세요.")
+        previous = []
+
+    actions = [{"remove": {"index": name, "alias": alias}} for name in previous if name != index_name]
+    actions.append({"add": {"index": index_name, "alias": alias}})
+    await client.indices.update_aliases(actions=actions)
+    logger.info(f"별칭 교체: {alias} {previous} -> {index_name}")
+    return previous
+
+
+async def delete_old_versions(client, alias: str, keep: int) -> None:
+    """별칭이 가리키지 않는 {alias}_vN 인덱스 중 최근 keep개(현재 포함)를 남기고 삭제합니다."""
+    pattern = re.compile(rf"^{re.escape(alias)}_v(\d+)$")
+    existing = await client.indices.get(index=f"{alias}_v*", ignore_unavailable=True)
+    current = set((await client.indices.get_alias(name=alias)).keys())
+    versions = sorted(
+        (int(match.group(1)), name) for name in existing if (match := pattern.match(name))
+    )
+    for _, name in versions[:-keep] if keep > 0 else []:
+        if name not in current:
+            await client.indices.delete(index=name)
+            logger.info(f"이전 버전 인덱스 삭제: {name}")
+
+
+async def reindex(client, alias: str, records: AsyncIterator[Dict[str, Any]], id_field: Optional[str] = None,
+                  concurrency: int = 4, chunk_size: int = 500, replicas: int = 1, refresh_interval: str = "1s",
+                  min_doc_ratio: float = 0.9, with_embeddings: bool = False, with_medicine: bool = False,
+                  keep: Optional[int] = None, profile: str = PILLS_INDEX_PROFILE) -> str:
+    """
+    새 버전 인덱스를 만들어 색인한 뒤 별칭을 교체합니다.
+    기존 인덱스는 색인 내내 그대로 검색을 처리하고, 교체는 update_aliases 한 번으로 원자적으로 이루어집니다.
+    새 인덱스 문서 수가 기존의 min_doc_ratio 미만이면 교체하지 않습니다.
+
+    Returns:
+        새 인덱스 이름
+    """
+    started = time.monotonic()
+    index_name = await next_index_name(client, alias)
+    await create_versioned_index(client, index_name, profile)
+
+    counts = await stream_bulk_load(client, index_name, records, id_field, concurrency, chunk_size)
+    logger.info(f"색인 완료: {counts} ({time.monotonic() - started:.1f}s)")
+
+    if with_embeddings:
+        # refresh_interval=-1 상태이므로 스캔 전에 색인된 문서를 검색 가능하게 만듦
+        await client.indices.refresh(index=index_name)
+        await backfill_embeddings(client, index_name)
+    if with_medicine:
+        await client.indices.refresh(index=index_name)
+        await backfill_medicine_display(client, index_name)
+    if PERFORMANCE_PROFILES[profile]["force_merge"]:
+        # 복제본을 붙이기 전에 병합해 병합된 세그먼트만 복제되도록 함
+        await client.indices.refresh(index=index_name)
+        await force_merge(client, index_name)
+    await finalize_index(client, index_name, replicas, refresh_interval)
+
+    new_count = (await client.count(index=index_name))["count"]
+    if await client.indices.exists_alias(name=alias):
+        old_count = (await client.count(index=alias))["count"]
+        if new_count < old_count * min_doc_ratio:
+            raise RuntimeError(
+                f"새 인덱스 문서 수가 너무 적어 별칭을 교체하지 않습니다: {new_count} < {old_count} x {min_doc_ratio}"
+                f" ({index_name}는 확인 후 직접 삭제하세요)"
+            )
+
+    await swap_alias(client, alias, index_name)
+    if keep is not None:
+        await delete_old_versions(client, alias, keep)
+    logger.info(f"재색인 완료: {alias} -> {index_name} (문서 {new_count}개, {time.monotonic() - started:.1f}s)")
+    return index_name
+
+
+async def main(args: argparse.Namespace) -> None:
+    es = get_es("admin")
+    try:
+        if args.command == "canonical":
+            await backfill_canonical_fields(es, args.index)
+        elif args.command == "normalized":
+            await backfill_normalized_fields(es, args.index)
+        elif args.command == "embeddings":
+            await backfill_embeddings(es, args.index, args.batch_size, args.cache)
+        elif args.command == "enrich":
+            await backfill_medicine_display(es, args.index, args.medicine_index, args.batch_size)
+        elif args.command == "reindex":
+            records = iter_source_file(args.source) if args.source else iter_source_index(es, args.from_index)
+            await reindex(
+                es, args.alias, records,
+                id_field=args.id_field,
+                concurrency=args.concurrency,
+                chunk_size=args.chunk_size,
+                replicas=args.replicas,
+                refresh_interval=args.refresh_interval,
+                min_doc_ratio=args.min_doc_ratio,
+                with_embeddings=args.embeddings,
+                with_medicine=args.enrich,
+                keep=args.keep,
+                profile=args.profile,
+            )
+        elif args.command == "profile":
+            await apply_profile(es, args.index, args.profile)
+            if args.force_merge:
+                await force_merge(es, args.index)
+    finally:
+        await close_elasticsearch()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+
+    parser = argparse.ArgumentParser(description="pills 인덱스 색인 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    canonical_parser = subparsers.add_parser("canonical", help="기존 문서에 정규형 필드 채우기")
+    canonical_parser.add_argument("--index", default=INDEX_NAME)
+
+    normalized_parser = subparsers.add_parser("normalized", help="기존 문서에 인쇄문자 n-gram 필드 채우기")
+    normalized_parser.add_argument("--index", default=INDEX_NAME)
+
+    embeddings_parser = subparsers.add_parser("embeddings", help="문서 embedding 필드 채우기 (fastembed)")
+    embeddings_parser.add_argument("--index", default=INDEX_NAME)
+    embeddings_parser.add_argument("--batch-size", type=int, default=256)
+    embeddings_parser.add_argument("--cache", default=EMBEDDING_CACHE_PATH, help="내용 해시 임베딩 캐시 (빈 값이면 사용 안 함)")
+
+    enrich_parser = subparsers.add_parser("enrich", help="medicine_data 표시 필드를 medicine 객체로 채우기")
+    enrich_parser.add_argument("--index", default=INDEX_NAME)
+    enrich_parser.add_argument("--medicine-index", default=MEDICINE_INDEX_NAME)
+    enrich_parser.add_argument("--batch-size", type=int, default=500, help="medicine_data 한 번에 조회할 문서 수")
+
+    reindex_parser = subparsers.add_parser("reindex", help="새 버전 인덱스로 재색인 후 별칭 교체")
+    source_group = reindex_parser.add_mutually_exclusive_group(required=True)
+    source_group.add_argument("--source", help="원본 파일 (.jsonl / .json / .csv / .xlsx)")
+    source_group.add_argument("--from-index", help="원본으로 사용할 기존 인덱스 또는 별칭")
+    reindex_parser.add_argument("--alias", default=INDEX_ALIAS)
+    reindex_parser.add_argument("--id-field", help="문서 _id로 사용할 필드 (기본: 원본 _id, 없으면 자동 생성)")
+    reindex_parser.add_argument("--concurrency", type=int, default=4)
+    reindex_parser.add_argument("--chunk-size", type=int, default=500)
+    reindex_parser.add_argument("--replicas", type=int, default=1)
+    reindex_parser.add_argument("--refresh-interval", default="1s")
+    reindex_parser.add_argument("--min-doc-ratio", type=float, default=0.9)
+    reindex_parser.add_argument("--embeddings", action="store_true", help="색인 후 embedding 필드 채우기")
+    reindex_parser.add_argument("--enrich", action="store_true", help="색인 후 medicine_data 표시 필드 채우기")
+    reindex_parser.add_argument("--keep", type=int, help="별칭 교체 후 남길 최근 버전 인덱스 수 (미지정 시 삭제 안 함)")
+    reindex_parser.add_argument("--profile", choices=sorted(PERFORMANCE_PROFILES), default=PILLS_INDEX_PROFILE)
+
+    profile_parser = subparsers.add_parser("profile", help="기존 인덱스에 성능 프로필 적용")
+    profile_parser.add_argument("--index", default=INDEX_NAME)
+    profile_parser.add_argument("--profile", choices=sorted(PERFORMANCE_PROFILES), default=PILLS_INDEX_PROFILE)
+    profile_parser.add_argument("--force-merge", action="store_true", help="세그먼트 1개로 병합 (색인이 끝난 인덱스에만)")
+
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,44 @@
+import os
+import logging
+from typing import Optional
+
+import redis.asyncio as aioredis
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# 채팅 세션 저장소와 같은 Redis 접속 정보 사용
+REDIS_HOST = os.getenv("REDIS_HOST")
+REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
+REDIS_PASSWORD = os.getenv("REDIS_PASSWORD")
+
+_redis: Optional[aioredis.Redis] = None
+
+
+def get_redis() -> Optional[aioredis.Redis]:
+    """
+    백엔드 캐시용 비동기 Redis 클라이언트를 반환합니다.
+    REDIS_HOST가 설정되지 않았으면 None을 반환합니다.
+    """
+    global _redis
+    if _redis is None and REDIS_HOST:
+        _redis = aioredis.Redis(
+            host=REDIS_HOST,
+            port=REDIS_PORT,
+            password=REDIS_PASSWORD,
+            socket_timeout=0.5,  # 캐시 조회가 요청 지연을 키우지 않도록 짧게
+            socket_connect_timeout=0.5,
+        )
+        logger.info("✅ backend cache redis initialized")
+    return _redis
+
+
+async def close_redis() -> None:
+    global _redis
+    if _redis is not None:
+        try:
+            await _redis.aclose()
+        except Exception as e:
+            logger.error(f"Redis closing error: {e}")
+        _redis = None
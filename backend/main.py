@@ -12,11 +12,21 @@ from mcp_client.manager.tool_manager import tool_manager
 logging.basicConfig(level=logging.INFO)
 from contextlib import asynccontextmanager
 
-from backend.api.routes import medicine
+from backend.api.routes import medicine, debug
 from mcp_client.router.mcp_router import router as mcp_router
 from mcp_client.router.mcp_websocket_router import router as mcp_websocket_router
 
-from backend.db.elastic import check_elasticsearch_connection, es
+from backend.db.elastic import check_elasticsearch_connection, close_elasticsearch, init_elasticsearch, \
+    get_es, INDEX_NAME, MEDICINE_INDEX_NAME
+from backend.search.warmup import ES_WARMUP_ENABLED, warmup_search
+from backend.db.redis_client import close_redis
+from backend.search.imprint_suggest import imprint_suggester, IMPRINT_SUGGEST_ENABLED
+from backend.search.imprint_matcher import imprint_matcher
+from backend.search.logic import IMPRINT_FUZZY_MODE
+from backend.search.medicine_names import medicine_name_index, MEDICINE_NAME_INDEX_ENABLED
+from backend.services.image_preprocess import image_preprocessor, IMAGE_PREPROCESS_ENABLED
+from backend.search.local_engine import pill_engine, init_local_engine, LOCAL_PILL_ENGINE_ENABLED, \
+    LOCAL_PILL_SNAPSHOT_PATH, LOCAL_PILL_SNAPSHOT_MAX_AGE
 from backend.config.logging_config import setup_logging
 from backend.exceptionhandler.api_exception_handler import register_exception_handler
 from backend.config.swagger_config import setup_swagger
@@ -27,11 +37,34 @@ from backend.config.swagger_config import setup_swagger
 async def lifespan(app: FastAPI):
     # 앱 시작 시 초기화 작업
     logger.info("Application startup: Initializing Elasticsearch connection...")
+    es = await init_elasticsearch()
     es_ok = await check_elasticsearch_connection()
     if not es_ok:
         logger.error("Failed to initialize Elasticsearch connection.")
     logger.info("Elasticsearch connection initialized successfully.")
 
+    if LOCAL_PILL_ENGINE_ENABLED:
+        logger.info("Local pill engine 스냅샷 로드 시작")
+        await init_local_engine(es, INDEX_NAME, LOCAL_PILL_SNAPSHOT_PATH, LOCAL_PILL_SNAPSHOT_MAX_AGE)
+
+    if es_ok and IMPRINT_SUGGEST_ENABLED:
+        # 로컬 엔진 스냅샷이 로드되어 있으면 ES 스캔 없이 스냅샷에서 만듦
+        await imprint_suggester.refresh(es, INDEX_NAME)
+
+    if es_ok and IMPRINT_FUZZY_MODE == "weighted":
+        await imprint_matcher.refresh(es, INDEX_NAME)
+
+    if es_ok and MEDICINE_NAME_INDEX_ENABLED:
+        await medicine_name_index.refresh(es, MEDICINE_INDEX_NAME)
+
+    if es_ok and ES_WARMUP_ENABLED:
+        logger.info("Elasticsearch 검색 워밍업 시작")
+        await warmup_search(get_es("search"), INDEX_NAME)
+
+    if IMAGE_PREPROCESS_ENABLED:
+        # 첫 사진 요청이 전처리 작업 프로세스 생성을 기다리지 않도록 미리 띄움
+        await image_preprocessor.start()
+
     logger.info("MCP client 초기화 시작")
     await initialize_service()
     logger.info("MCP client 초기화 완료")
@@ -41,7 +74,10 @@ async def lifespan(app: FastAPI):
     yield
     # 앱 종료 시 정리 작업
     logger.info("Application shutdown: Closing Elasticsearch connection...")
-    await es.close()
+    pill_engine.close()
+    image_preprocessor.close()
+    await close_redis()
+    await close_elasticsearch()
 
 app = FastAPI(
     lifespan=lifespan
@@ -68,6 +104,8 @@ app.add_middleware(
 register_exception_handler(app)
 # 라우터 등록
 app.include_router(medicine.router, prefix="/v2")
+if debug.DEBUG_ROUTES_ENABLED:
+    app.include_router(debug.router, prefix="/v2")
 app.include_router(mcp_router, prefix="/v2")
 app.include_router(mcp_websocket_router, prefix="")
 
@@ -83,7 +121,7 @@ async def root():
 @app.get("/health")
 async def health():
     try:
-        if await es.ping():
+        if await get_es("health").ping():
             return {"status" : "healthy", "elasticsearch": "ok"}
         else:
             raise HTTPException(status_code=503, detail="Elasticsearch connection failed.")
@@ -0,0 +1,169 @@
+# backend/search/cache.py
+"""
+알약 검색 결과 캐시
+
+- 키: preprocess_features 결과(정규화된 특징) + top_k
+- L1: 프로세스 내 LRU (TTL 적용, 결과를 JSON 바이트로 저장하고 조회할 때마다 새로 디코딩하므로
+  호출 측이 반환된 결과를 수정해도 캐시 항목은 바뀌지 않음)
+- L2: 선택적 Redis (TTL 적용, 워커/파드 간 공유)
+- 모든 키에 pills 인덱스 세대(별칭이 가리키는 실제 인덱스 이름 + uuid)를 포함하므로
+  재색인으로 인덱스가 바뀌면 기존 캐시는 모두 무효화됩니다.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from backend.db.elastic import get_es, INDEX_NAME
+from backend.db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+SEARCH_CACHE_ENABLED = os.getenv("SEARCH_CACHE_ENABLED", "true").lower() == "true"
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", 5000))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 600))  # 초 단위
+SEARCH_CACHE_REDIS_ENABLED = os.getenv("SEARCH_CACHE_REDIS_ENABLED", "false").lower() == "true"
+SEARCH_CACHE_VERSION_TTL = float(os.getenv("SEARCH_CACHE_VERSION_TTL", 30))  # 인덱스 세대 재확인 주기 (초)
+
+
+class SearchResultCache:
+    def __init__(self, max_entries: int, ttl: int, redis_enabled: bool, version_ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_enabled = redis_enabled
+        self.version_ttl = version_ttl
+
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (만료 시각, 결과 JSON 바이트)
+        self._version: Optional[str] = None
+        self._version_checked_at = 0.0
+
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "errors": 0,
+        }
+
+    @staticmethod
+    def make_key(norm_features: Dict[str, Any], top_k: int, *extra: Any) -> str:
+        """정규화된 특징과 top_k(및 추가 구분 값)로 캐시 키를 만듭니다."""
+        payload = json.dumps([norm_features, top_k, *extra], sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+    async def index_version(self) -> str:
+        """
+        pills 인덱스 세대 문자열을 반환합니다.
+        별칭이면 가리키는 실제 인덱스들의 이름과 uuid, 실제 인덱스면 자신의 이름과 uuid를 사용합니다.
+        """
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < self.version_ttl:
+            return self._version
+
+        try:
+            settings = await get_es("health").indices.get_settings(index=INDEX_NAME, name="index.uuid")
+            version = ",".join(
+                f"{name}:{body['settings']['index']['uuid']}" for name, body in sorted(settings.items())
+            )
+        except Exception as e:
+            # 세대를 확인할 수 없으면 기존 값을 유지 (없으면 인덱스 이름만 사용)
+            logger.warning(f"검색 캐시 인덱스 세대 확인 실패: {e}")
+            version = self._version or INDEX_NAME
+
+        if self._version is not None and version != self._version:
+            logger.info(f"pills 인덱스 세대 변경 감지 ({self._version} -> {version}), 검색 캐시 무효화")
+            self._entries.clear()
+            self.stats["invalidations"] += 1
+        self._version = version
+        self._version_checked_at = now
+        return version
+
+    def _redis_key(self, version: str, key: str) -> str:
+        return f"pill_search:{hashlib.sha1(version.encode('utf-8')).hexdigest()[:12]}:{key}"
+
+    async def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        if not SEARCH_CACHE_ENABLED:
+            return None
+        version = await self.index_version()
+
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["l1_hits"] += 1
+                return json.loads(payload)
+            del self._entries[key]
+
+        redis = get_redis() if self.redis_enabled else None
+        if redis is not None:
+            try:
+                raw = await redis.get(self._redis_key(version, key))
+                if raw is not None:
+                    payload = raw.encode("utf-8") if isinstance(raw, str) else raw
+                    hits = json.loads(payload)
+                    self._put_local(key, payload)
+                    self.stats["l2_hits"] += 1
+                    return hits
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"검색 캐시 Redis 조회 실패: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, hits: List[Dict[str, Any]]) -> None:
+        if not SEARCH_CACHE_ENABLED:
+            return
+        version = await self.index_version()
+        payload = json.dumps(hits, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        self._put_local(key, payload)
+        self.stats["sets"] += 1
+
+        redis = get_redis() if self.redis_enabled else None
+        if redis is not None:
+            try:
+                await redis.set(self._redis_key(version, key), payload, ex=self.ttl)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"검색 캐시 Redis 저장 실패: {e}")
+
+    def _put_local(self, key: str, payload: bytes) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["misses"]
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "redis_enabled": self.redis_enabled,
+            "index_version": self._version,
+        }
+
+
+# 싱글톤 인스턴스
+search_cache = SearchResultCache(
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    ttl=SEARCH_CACHE_TTL,
+    redis_enabled=SEARCH_CACHE_REDIS_ENABLED,
+    version_ttl=SEARCH_CACHE_VERSION_TTL,
+)
@@ -0,0 +1,201 @@
+# backend/search/embedding.py
+"""
+알약 특징 텍스트 임베딩 (fastembed ONNX, CPU)
+
+- 문서와 쿼리를 같은 형식의 특징 텍스트("인쇄문자 ... 모양 ... 색상 ...")로 만든 뒤 임베딩합니다.
+- 모델은 처음 사용할 때 한 번만 로드하고, 배치 단위로 임베딩합니다.
+- 텍스트 내용 해시(모델명 포함)로 캐싱합니다.
+    * 프로세스 내 LRU: 같은 특징 조합의 반복 쿼리
+    * 선택적 SQLite 파일: 색인 시 변경되지 않은 문서의 재계산 방지
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+from array import array
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# 인덱스 매핑의 embedding(dense_vector, 384차원, cosine)과 차원이 같은 다국어 모델
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+EMBEDDING_DIMS = 384
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", 64))
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", 0)) or None  # None이면 onnxruntime 기본값
+EMBEDDING_LRU_SIZE = int(os.getenv("EMBEDDING_LRU_SIZE", 4096))
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", "snapshots/embeddings.sqlite")
+
+
+def _clean(value: Any) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        return " ".join(_clean(v) for v in value if v)
+    return str(value).replace("|", "").strip()
+
+
+def _feature_text(imprints: List[Any], shape: Any, colors: List[Any]) -> str:
+    imprint_text = " ".join(filter(None, (_clean(v) for v in imprints)))
+    color_text = " ".join(filter(None, (_clean(v) for v in colors)))
+    return f"인쇄문자: {imprint_text} / 모양: {_clean(shape)} / 색상: {color_text}"
+
+
+def pill_document_text(source: Dict[str, Any]) -> str:
+    """pills 인덱스 문서의 임베딩 대상 텍스트"""
+    return _feature_text(
+        [source.get("print_front"), source.get("print_back"),
+         source.get("mark_code_front_anal"), source.get("mark_code_back_anal")],
+        source.get("drug_shape"),
+        [source.get("color_classes")],
+    )
+
+
+def pill_query_text(norm: Dict[str, Any]) -> str:
+    """preprocess_features 결과로 만든 쿼리 임베딩 대상 텍스트"""
+    return _feature_text(
+        [norm.get("imprint")],
+        norm.get("drug_shape"),
+        [norm.get("primary_color"), norm.get("secondary_color")],
+    )
+
+
+def content_hash(text: str, model_name: str = EMBEDDING_MODEL) -> str:
+    return hashlib.sha1(f"{model_name}\x00{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingStore:
+    """내용 해시 -> float32 벡터 SQLite 저장소 (색인 파이프라인용)"""
+
+    def __init__(self, path: str):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)")
+        self._lock = threading.Lock()
+
+    def get_many(self, keys: List[str]) -> Dict[str, List[float]]:
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = array("f", blob).tolist()
+        return found
+
+    def put_many(self, vectors: Dict[str, List[float]]) -> None:
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, array("f", vector).tobytes()) for key, vector in vectors.items()],
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class PillEmbedder:
+    def __init__(self, model_name: str, batch_size: int, threads: Optional[int], lru_size: int,
+                 store: Optional[EmbeddingStore] = None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.threads = threads
+        self.lru_size = lru_size
+        self.store = store
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._lru: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._lru_lock = threading.Lock()
+
+        self.stats = {"lru_hits": 0, "store_hits": 0, "computed": 0, "batches": 0}
+
+    def _get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    # fastembed/onnxruntime 로드는 무거우므로 실제로 임베딩이 필요할 때만 import
+                    from fastembed import TextEmbedding
+
+                    logger.info(f"임베딩 모델 로드: {self.model_name}")
+                    self._model = TextEmbedding(model_name=self.model_name, threads=self.threads)
+        return self._model
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        """
+        텍스트 목록을 임베딩합니다. (동기, CPU 사용)
+        캐시에 없는 텍스트만 중복 없이 batch_size 단위로 계산합니다.
+        """
+        keys = [content_hash(text, self.model_name) for text in texts]
+        vectors: Dict[str, List[float]] = {}
+
+        with self._lru_lock:
+            for key in keys:
+                vector = self._lru.get(key)
+                if vector is not None:
+                    self._lru.move_to_end(key)
+                    vectors[key] = vector
+                    self.stats["lru_hits"] += 1
+
+        missing = list(dict.fromkeys(key for key in keys if key not in vectors))
+        if missing and self.store is not None:
+            stored = self.store.get_many(missing)
+            self.stats["store_hits"] += len(stored)
+            vectors.update(stored)
+            missing = [key for key in missing if key not in stored]
+
+        if missing:
+            text_by_key = dict(zip(keys, texts))
+            computed: Dict[str, List[float]] = {}
+            model = self._get_model()
+            for start in range(0, len(missing), self.batch_size):
+                batch_keys = missing[start:start + self.batch_size]
+                batch_vectors = model.embed([text_by_key[key] for key in batch_keys], batch_size=self.batch_size)
+                for key, vector in zip(batch_keys, batch_vectors):
+                    computed[key] = vector.tolist()
+                self.stats["batches"] += 1
+            self.stats["computed"] += len(computed)
+            vectors.update(computed)
+            if self.store is not None:
+                self.store.put_many(computed)
+
+        with self._lru_lock:
+            for key in keys:
+                self._lru[key] = vectors[key]
+                self._lru.move_to_end(key)
+            while len(self._lru) > self.lru_size:
+                self._lru.popitem(last=False)
+
+        return [vectors[key] for key in keys]
+
+    async def aembed(self, texts: List[str]) -> List[List[float]]:
+        """이벤트 루프를 막지 않도록 스레드에서 임베딩합니다."""
+        return await asyncio.to_thread(self.embed, texts)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "model": self.model_name,
+            "loaded": self._model is not None,
+            "lru_entries": len(self._lru),
+        }
+
+
+# 싱글톤 인스턴스 (서버 쿼리용, 프로세스 내 LRU만 사용)
+pill_embedder = PillEmbedder(
+    model_name=EMBEDDING_MODEL,
+    batch_size=EMBEDDING_BATCH_SIZE,
+    threads=EMBEDDING_THREADS,
+    lru_size=EMBEDDING_LRU_SIZE,
+)
@@ -0,0 +1,72 @@
+# backend/search/imprint_catalog.py
+"""
+인쇄문자 카탈로그 로더
+
+pills 인덱스의 모든 알약에서 인쇄문자/마크 코드와 모양/색상 그룹만 읽어 옵니다.
+인쇄문자 자동완성, 오타 교정 등 인쇄문자 전체 목록이 필요한 메모리 색인이 함께 사용합니다.
+
+- 로컬 알약 엔진 스냅샷이 요청한 인덱스 세대와 같으면 스냅샷에서 읽고 (ES 요청 없음)
+- 스냅샷이 없거나 재색인 전 세대이면(백그라운드 갱신 전) ES를 스캔합니다.
+"""
+import logging
+from typing import Any, Dict, List, Optional
+
+from backend.search.local_engine import pill_engine
+
+logger = logging.getLogger(__name__)
+
+# 인쇄문자 필드 -> 종류
+IMPRINT_FIELDS = {
+    "print_front": "print",
+    "print_back": "print",
+    "mark_code_front_anal": "mark",
+    "mark_code_back_anal": "mark",
+}
+CATALOG_SOURCE_FIELDS = ["item_seq", "shape_group", "color_group", *IMPRINT_FIELDS]
+
+
+def compact_imprint(value: Any) -> str:
+    """분할선(|)과 공백을 제거한 인쇄문자"""
+    if not isinstance(value, str):
+        return ""
+    return value.replace("|", "").replace(" ", "").strip()
+
+
+def _project(source: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: source.get(field) for field in CATALOG_SOURCE_FIELDS}
+
+
+async def load_imprint_catalog(es, index_name: str, index_version: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    알약별 인쇄문자 레코드 목록을 반환합니다.
+
+    Args:
+        index_version: 호출자가 색인에 기록할 pills 인덱스 세대 (search_cache.index_version)
+            로컬 스냅샷의 세대가 이와 다르면 스냅샷을 쓰지 않습니다. (None이면 세대 확인 없이 스냅샷 사용)
+
+    Returns:
+        {"item_seq", "shape_group", "color_group", "print_front", "print_back",
+         "mark_code_front_anal", "mark_code_back_anal"} 딕셔너리 리스트
+    """
+    snapshot_version, docs = pill_engine.snapshot_docs()
+    if docs and index_version is not None and snapshot_version not in (None, index_version):
+        logger.info(f"로컬 스냅샷 세대({snapshot_version})가 현재 세대({index_version})와 달라 ES에서 카탈로그 로드")
+    elif docs:
+        records = [_project(source) for _, source in docs]
+        logger.info(f"인쇄문자 카탈로그 로드 (로컬 스냅샷): {len(records)}건")
+        return records
+
+    from elasticsearch.helpers import async_scan
+
+    records = [
+        _project(hit.get("_source", {}))
+        async for hit in async_scan(
+            es,
+            index=index_name,
+            query={"query": {"match_all": {}}},
+            _source_includes=CATALOG_SOURCE_FIELDS,
+            size=1000,
+        )
+    ]
+    logger.info(f"인쇄문자 카탈로그 로드 (ES): {len(records)}건")
+    return records
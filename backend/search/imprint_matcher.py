@@ -0,0 +1,292 @@
+# backend/search/imprint_matcher.py
+"""
+OCR 혼동 가중 편집 거리 인쇄문자 매처 (SymSpell)
+
+ES fuzziness AUTO는 모든 편집을 같은 비용으로 보고 쿼리마다 오토마톤을 확장하므로 느리고,
+"IO5"와 "105"처럼 흔한 OCR 혼동도 임의 문자 치환과 같게 취급합니다.
+
+- 알려진 모든 인쇄문자(print_front/print_back)의 정규화 키에 대해 최대 IMPRINT_MATCHER_MAX_EDITS개
+  문자를 지운 문자열을 미리 계산해 두고(SymSpell), 쿼리도 같은 방식으로 지워 후보 키를 찾습니다.
+- 후보는 가중 Levenshtein 거리로 다시 평가합니다. SIMILAR_CHARS/PATTERN_MAP에 있는 혼동 쌍의 치환은
+  혼동 확률이 높을수록 싸고, 그 밖의 삽입/삭제/치환은 1입니다.
+- 결과는 원래 색인 값(분할선 포함) 목록이므로 search_pills는 keyword 필드 terms 조회만 보냅니다.
+  정규화 키가 같은 값(대소문자/분할선만 다름)은 정확 일치에 가깝게, 나머지는 부분 일치로 점수를 줍니다.
+"""
+import asyncio
+import logging
+import os
+import time
+from bisect import bisect_left
+from functools import lru_cache
+from itertools import combinations
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.search.cache import search_cache
+from backend.search.imprint_catalog import compact_imprint, load_imprint_catalog
+from backend.search.transform import SIMILAR_CHARS, PATTERN_MAP
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+IMPRINT_MATCHER_MAX_EDITS = int(os.getenv("IMPRINT_MATCHER_MAX_EDITS", 2))
+IMPRINT_MATCHER_MAX_COST = float(os.getenv("IMPRINT_MATCHER_MAX_COST", 1.0))
+IMPRINT_MATCHER_MAX_RESULTS = int(os.getenv("IMPRINT_MATCHER_MAX_RESULTS", 8))
+# 이 길이 이하의 인쇄문자는 혼동 쌍 치환만 허용 (fuzziness AUTO와 같이 임의 편집은 불허)
+IMPRINT_MATCHER_SHORT_LENGTH = 2
+
+_EDIT_COST = 1.0
+# 혼동 쌍 치환 비용 하한 (혼동 확률이 아무리 높아도 정확 일치보다는 비싸게)
+_MIN_CONFUSION_COST = 0.25
+_PRINT_FIELDS = ("print_front", "print_back")
+
+
+def _confusion_cost(probability: float) -> float:
+    return round(max(_MIN_CONFUSION_COST, _EDIT_COST - 1.5 * probability), 3)
+
+
+def build_confusion_costs() -> Tuple[Dict[Tuple[str, str], float], Dict[Tuple[str, str], float]]:
+    """
+    SIMILAR_CHARS/PATTERN_MAP에서 (대문자 기준, 양방향) 치환 비용표를 만듭니다.
+
+    Returns:
+        (단일 문자 치환 비용, 두 문자 묶음 치환 비용)
+    """
+    char_costs: Dict[Tuple[str, str], float] = {}
+    for source, confusions in SIMILAR_CHARS.items():
+        for target, probability in confusions.items():
+            a, b = source.upper(), target.upper()
+            if a == b or "|" in (a, b):
+                continue
+            cost = _confusion_cost(probability)
+            for pair in ((a, b), (b, a)):
+                char_costs[pair] = min(cost, char_costs.get(pair, _EDIT_COST))
+
+    pair_costs: Dict[Tuple[str, str], float] = {}
+    for source, confusions in PATTERN_MAP.items():
+        for target, probability in confusions.items():
+            a, b = source.upper(), target.upper()
+            if a == b:
+                continue
+            # 두 문자를 한 번에 바꾸는 비용 (두 번의 임의 치환보다 싸고 한 번보다는 비쌈)
+            cost = round(_EDIT_COST + _confusion_cost(probability) / 2, 3)
+            for pair in ((a, b), (b, a)):
+                pair_costs[pair] = min(cost, pair_costs.get(pair, 2 * _EDIT_COST))
+    return char_costs, pair_costs
+
+
+CHAR_COSTS, PAIR_COSTS = build_confusion_costs()
+
+
+def weighted_distance(source: str, target: str, max_cost: float = float("inf")) -> float:
+    """
+    혼동 쌍 가중 Levenshtein 거리 (대문자 문자열 기준)
+    행의 최솟값이 max_cost를 넘으면 바로 inf를 반환합니다.
+    """
+    if source == target:
+        return 0.0
+    n, m = len(source), len(target)
+    previous2: Optional[List[float]] = None
+    previous = [j * _EDIT_COST for j in range(m + 1)]
+    for i in range(1, n + 1):
+        current = [i * _EDIT_COST] + [0.0] * m
+        s_char = source[i - 1]
+        for j in range(1, m + 1):
+            t_char = target[j - 1]
+            if s_char == t_char:
+                substitution = previous[j - 1]
+            else:
+                substitution = previous[j - 1] + CHAR_COSTS.get((s_char, t_char), _EDIT_COST)
+            best = min(previous[j] + _EDIT_COST, current[j - 1] + _EDIT_COST, substitution)
+            if previous2 is not None and j > 1:
+                pair_cost = PAIR_COSTS.get((source[i - 2:i], target[j - 2:j]))
+                if pair_cost is not None:
+                    best = min(best, previous2[j - 2] + pair_cost)
+            current[j] = best
+        if min(current) > max_cost:
+            return float("inf")
+        previous2, previous = previous, current
+    return previous[m]
+
+
+def _deletes(key: str, max_edits: int) -> set:
+    """key에서 최대 max_edits개 문자를 지운 문자열 (원본 포함, 빈 문자열 제외)"""
+    out = {key}
+    for count in range(1, min(max_edits, len(key) - 1) + 1):
+        for positions in combinations(range(len(key)), count):
+            out.add("".join(char for i, char in enumerate(key) if i not in positions))
+    return out
+
+
+class _MatcherSnapshot:
+    """
+    한 번 만든 뒤 바꾸지 않는 매처 색인 (키, 원래 값, 삭제 색인, 매칭 결과 캐시)
+    색인을 다시 만들면 새 스냅샷으로 통째로 교체하므로 캐시 결과와 키 목록이 서로 다른 세대일 수 없습니다.
+    """
+    __slots__ = ("keys", "values", "deletes", "max_edits", "max_cost", "max_results", "match")
+
+    def __init__(self, keys: List[str], values: List[Tuple[str, ...]], deletes: Dict[str, Any],
+                 max_edits: int, max_cost: float, max_results: int):
+        self.keys = keys
+        # 키와 같은 순서의 원래 색인 값들 (분할선/대소문자 포함)
+        self.values = values
+        self.deletes = deletes
+        self.max_edits = max_edits
+        self.max_cost = max_cost
+        self.max_results = max_results
+        self.match = lru_cache(maxsize=4096)(self._match)
+
+    def _match(self, key: str) -> Tuple[Tuple[float, str], ...]:
+        short = len(key) <= IMPRINT_MATCHER_SHORT_LENGTH
+        max_edits = 1 if short else self.max_edits
+        max_cost = min(self.max_cost, _EDIT_COST - 0.01) if short else self.max_cost
+
+        candidates = set()
+        for deleted in _deletes(key, max_edits):
+            found = self.deletes.get(deleted)
+            if found is None:
+                continue
+            if isinstance(found, int):
+                candidates.add(found)
+            else:
+                candidates.update(found)
+
+        # 짧은 키는 비용 1 미만(혼동 치환)만 허용하므로 길이가 같은 후보만 가능
+        max_length_diff = 0 if short else max_edits
+        scored = []
+        for key_idx in candidates:
+            candidate = self.keys[key_idx]
+            if abs(len(candidate) - len(key)) > max_length_diff:
+                continue
+            cost = weighted_distance(key, candidate, max_cost)
+            if cost <= max_cost:
+                scored.append((cost, candidate))
+        scored.sort()
+        return tuple(scored[:self.max_results])
+
+    def values_of(self, key: str) -> Tuple[str, ...]:
+        return self.values[bisect_left(self.keys, key)]
+
+
+class ImprintMatcher:
+    def __init__(self, max_edits: int, max_cost: float, max_results: int):
+        self.max_edits = max_edits
+        self.max_cost = max_cost
+        self.max_results = max_results
+        self._snapshot = self.compile([])
+        self._version: Optional[str] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self.stats = {"queries": 0, "builds": 0, "build_errors": 0, "last_build_ms": 0.0}
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._snapshot.keys)
+
+    def compile(self, records: List[Dict[str, Any]]) -> _MatcherSnapshot:
+        """
+        카탈로그 레코드(print_front/print_back)로 새 스냅샷을 만듭니다.
+        현재 색인은 건드리지 않으므로 스레드에서 실행해도 됩니다.
+        """
+        values_by_key: Dict[str, set] = {}
+        for record in records:
+            for field in _PRINT_FIELDS:
+                value = record.get(field)
+                for raw in value if isinstance(value, list) else [value]:
+                    key = compact_imprint(raw).upper()
+                    if key:
+                        values_by_key.setdefault(key, set()).add(raw)
+
+        keys = sorted(values_by_key)
+        deletes: Dict[str, Any] = {}
+        for key_idx, key in enumerate(keys):
+            for deleted in _deletes(key, self.max_edits):
+                # 대부분의 삭제 문자열은 키 하나만 가리키므로 int로 두고 둘 이상일 때만 리스트로
+                existing = deletes.get(deleted)
+                if existing is None:
+                    deletes[deleted] = key_idx
+                elif isinstance(existing, int):
+                    deletes[deleted] = [existing, key_idx]
+                else:
+                    existing.append(key_idx)
+
+        return _MatcherSnapshot(keys, [tuple(sorted(values_by_key[key])) for key in keys], deletes,
+                                self.max_edits, self.max_cost, self.max_results)
+
+    def build(self, records: List[Dict[str, Any]]) -> int:
+        """카탈로그 레코드로 색인을 만들어 바로 교체하고 키 수를 반환합니다."""
+        self._snapshot = self.compile(records)
+        return len(self._snapshot.keys)
+
+    def _match_on(self, snapshot: _MatcherSnapshot, imprint: str) -> List[Tuple[str, float]]:
+        self.stats["queries"] += 1
+        key = compact_imprint(imprint).upper()
+        if not key or not snapshot.keys:
+            return []
+        return [(candidate, cost) for cost, candidate in snapshot.match(key)]
+
+    def match(self, imprint: str) -> List[Tuple[str, float]]:
+        """
+        인쇄문자와 가까운 알려진 인쇄문자 키를 (키, 가중 거리) 순으로 반환합니다.
+        정확히 같은 키는 거리 0으로 포함됩니다.
+        """
+        return self._match_on(self._snapshot, imprint)
+
+    def match_values(self, imprint: str) -> Tuple[List[str], List[str]]:
+        """
+        가까운 인쇄문자의 원래 색인 값 목록 (keyword 필드 terms 조회용)
+
+        Returns:
+            (정규화 키가 같은 값: 대소문자/분할선만 다른 값과 정확히 같은 값, 그 밖의 가까운 값)
+        """
+        # 매칭과 값 조회에 같은 스냅샷을 사용 (도중에 색인이 교체되어도 세대가 섞이지 않도록)
+        snapshot = self._snapshot
+        exact: List[str] = []
+        near: List[str] = []
+        for candidate, cost in self._match_on(snapshot, imprint):
+            (near if cost else exact).extend(snapshot.values_of(candidate))
+        return exact, near
+
+    async def refresh(self, es, index_name: str) -> bool:
+        """카탈로그를 다시 읽어 색인을 만듭니다. 실패해도 예외를 던지지 않습니다."""
+        try:
+            version = await search_cache.index_version()
+            started = time.perf_counter()
+            records = await load_imprint_catalog(es, index_name, version)
+            # 스레드에서는 새 스냅샷만 만들고, 교체는 이벤트 루프 스레드에서 한 번의 대입으로
+            snapshot = await asyncio.to_thread(self.compile, records)
+            self._snapshot = snapshot
+            self._version = version
+            self.stats["builds"] += 1
+            self.stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"인쇄문자 매처 색인 생성: 키 {len(snapshot.keys)}개, 삭제 문자열 {len(snapshot.deletes)}개 "
+                        f"({self.stats['last_build_ms']}ms)")
+            return True
+        except Exception as e:
+            self.stats["build_errors"] += 1
+            logger.error(f"인쇄문자 매처 색인 생성 실패: {e}", exc_info=True)
+            return False
+
+    async def ensure_fresh(self, es, index_name: str) -> None:
+        """pills 인덱스 세대가 바뀌었으면 백그라운드에서 색인을 다시 만듭니다."""
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        if await search_cache.index_version() != self._version:
+            self._refreshing = asyncio.create_task(self.refresh(es, index_name))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "keys": len(self._snapshot.keys),
+            "deletes": len(self._snapshot.deletes),
+            "index_version": self._version,
+            "match_cache": self._snapshot.match.cache_info()._asdict(),
+        }
+
+
+# 싱글톤 인스턴스
+imprint_matcher = ImprintMatcher(
+    max_edits=IMPRINT_MATCHER_MAX_EDITS,
+    max_cost=IMPRINT_MATCHER_MAX_COST,
+    max_results=IMPRINT_MATCHER_MAX_RESULTS,
+)
@@ -0,0 +1,188 @@
+# backend/search/imprint_suggest.py
+"""
+인쇄문자 자동완성 (메모리 접두사 색인)
+
+이미지 검색이 실패해 사용자가 인쇄문자를 직접 입력할 때, 입력 중인 접두사로 알려진
+인쇄문자(print_front/print_back)와 마크 코드를 제안합니다.
+
+- 인쇄문자 카탈로그를 정규화 키(분할선/공백 제거, 대문자) 기준으로 합쳐 정렬된 배열로 보관하고
+  접두사 범위를 이진 탐색으로 찾습니다. (ES 요청 없음)
+- 범위가 넓은 짧은 접두사(IMPRINT_SUGGEST_RANKED_PREFIX_LEN 글자 이하)는 접두사별 키 번호를 제안 순서대로
+  미리 정렬해 두고 앞에서부터 limit개를 채우며, 긴 접두사는 범위 전체를 순위화합니다.
+  (어느 쪽이든 범위 전체가 순위 대상이라 알약 수가 많은 키가 잘려 나가지 않음)
+- 키마다 해당 알약들의 (모양 그룹, 색상 그룹) 조합을 보관해 모양/색상으로 거를 수 있습니다.
+- pills 인덱스 세대가 바뀌면(재색인) 백그라운드에서 다시 만들고, 그동안은 기존 색인으로 응답합니다.
+"""
+import asyncio
+import heapq
+import logging
+import os
+import time
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, FrozenSet, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.search.cache import search_cache
+from backend.search.imprint_catalog import IMPRINT_FIELDS, compact_imprint, load_imprint_catalog
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+IMPRINT_SUGGEST_ENABLED = os.getenv("IMPRINT_SUGGEST_ENABLED", "true").lower() == "true"
+# 제안 순서를 미리 정렬해 둘 접두사 최대 길이 (키마다 이 길이만큼 번호를 더 보관)
+IMPRINT_SUGGEST_RANKED_PREFIX_LEN = int(os.getenv("IMPRINT_SUGGEST_RANKED_PREFIX_LEN", 2))
+
+_KEY_END = "\U0010ffff"
+
+
+def suggest_key(value: str) -> str:
+    """자동완성 비교 키 (분할선/공백 제거, 대문자)"""
+    return compact_imprint(value).upper()
+
+
+def _values(value: Any) -> List[str]:
+    if isinstance(value, list):
+        return [v for v in value if isinstance(v, str) and v.strip()]
+    if isinstance(value, str) and value.strip():
+        return [value]
+    return []
+
+
+Entry = Tuple[str, str, int, FrozenSet[Tuple[str, str]]]
+
+
+class ImprintSuggester:
+    def __init__(self, ranked_prefix_len: int):
+        self.ranked_prefix_len = ranked_prefix_len
+        # (정렬된 키, 키와 같은 순서의 (표시 문자열, 종류, 알약 수, (모양 그룹, 색상 그룹) 조합),
+        #  짧은 접두사 -> 제안 순서로 정렬된 키 번호) - 검색 중 교체되어도 섞이지 않도록 한 튜플로 보관
+        self._index: Tuple[List[str], List[Entry], Dict[str, array]] = ([], [], {})
+        self._version: Optional[str] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self.stats = {"queries": 0, "builds": 0, "build_errors": 0, "last_build_ms": 0.0}
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._index[0])
+
+    def build(self, records: List[Dict[str, Any]]) -> int:
+        """카탈로그 레코드로 접두사 색인을 만들고 키 수를 반환합니다."""
+        aggregated: Dict[str, Dict[str, Any]] = {}
+        for record in records:
+            shape_group = record.get("shape_group") or ""
+            color_groups = _values(record.get("color_group")) or [""]
+            pairs = {(shape_group, color_group) for color_group in color_groups}
+            for field, kind in IMPRINT_FIELDS.items():
+                for value in _values(record.get(field)):
+                    # 인쇄문자는 분할선 없이, 마크 코드는 설명 그대로 표시
+                    display = compact_imprint(value) if kind == "print" else value.strip()
+                    key = suggest_key(value)
+                    if not key:
+                        continue
+                    entry = aggregated.get(key)
+                    if entry is None:
+                        entry = aggregated[key] = {"display": display, "kind": kind, "items": set(), "pairs": set()}
+                    entry["items"].add(record.get("item_seq"))
+                    entry["pairs"].update(pairs)
+
+        keys = sorted(aggregated)
+        entries = [
+            (aggregated[key]["display"], aggregated[key]["kind"], len(aggregated[key]["items"]),
+             frozenset(aggregated[key]["pairs"]))
+            for key in keys
+        ]
+
+        # 정확 일치 다음의 제안 순서(알약 수 많은 순, 짧은 순, 키 순)로 짧은 접두사별 키 번호 목록 생성
+        ranked: Dict[str, array] = {}
+        for i in sorted(range(len(keys)), key=lambda i: (-entries[i][2], len(keys[i]), keys[i])):
+            for length in range(1, min(len(keys[i]), self.ranked_prefix_len) + 1):
+                ranked.setdefault(keys[i][:length], array("I")).append(i)
+
+        # 검색 중인 요청이 섞인 상태를 보지 않도록 한 번의 대입으로 교체
+        self._index = (keys, entries, ranked)
+        return len(keys)
+
+    def suggest(self, prefix: str, shape_group: Optional[str] = None,
+                color_groups: Optional[List[str]] = None, limit: int = 10) -> List[Dict[str, Any]]:
+        """
+        접두사로 시작하는 인쇄문자/마크 코드를 제안합니다.
+        정확히 일치하는 키를 먼저, 나머지는 해당 알약 수가 많은 순, 짧은 순으로 정렬합니다.
+
+        Args:
+            prefix: 입력 중인 인쇄문자
+            shape_group: 모양 그룹 필터 (get_shape_group 결과)
+            color_groups: 색상 그룹 필터 (get_color_group 결과, 하나라도 겹치면 통과)
+            limit: 최대 제안 수
+        """
+        self.stats["queries"] += 1
+        key = suggest_key(prefix)
+        if not key:
+            return []
+        keys, entries, ranked = self._index
+        wanted_colors = set(color_groups) if color_groups else None
+
+        def allowed(i: int) -> bool:
+            if shape_group is None and wanted_colors is None:
+                return True
+            return any(
+                (shape_group is None or pair_shape == shape_group)
+                and (wanted_colors is None or pair_color in wanted_colors)
+                for pair_shape, pair_color in entries[i][3]
+            )
+
+        lo = bisect_left(keys, key)
+        exact = lo if lo < len(keys) and keys[lo] == key else None
+        if key in ranked:
+            # 미리 정렬된 순서에서 조건을 통과하는 키를 limit개까지
+            selected = [exact] if exact is not None and allowed(exact) else []
+            for i in ranked[key]:
+                if len(selected) >= limit:
+                    break
+                if i != exact and allowed(i):
+                    selected.append(i)
+        else:
+            hi = bisect_left(keys, key + _KEY_END, lo)
+            selected = heapq.nsmallest(
+                limit,
+                (i for i in range(lo, hi) if allowed(i)),
+                key=lambda i: (i != exact, -entries[i][2], len(keys[i]), keys[i]),
+            )
+
+        return [
+            {"imprint": entries[i][0], "kind": entries[i][1], "count": entries[i][2]}
+            for i in selected
+        ]
+
+    async def refresh(self, es, index_name: str) -> bool:
+        """카탈로그를 다시 읽어 색인을 만듭니다. 실패해도 예외를 던지지 않습니다."""
+        try:
+            version = await search_cache.index_version()
+            started = time.perf_counter()
+            records = await load_imprint_catalog(es, index_name, version)
+            key_count = await asyncio.to_thread(self.build, records)
+            self._version = version
+            self.stats["builds"] += 1
+            self.stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"인쇄문자 자동완성 색인 생성: 키 {key_count}개 ({self.stats['last_build_ms']}ms)")
+            return True
+        except Exception as e:
+            self.stats["build_errors"] += 1
+            logger.error(f"인쇄문자 자동완성 색인 생성 실패: {e}", exc_info=True)
+            return False
+
+    async def ensure_fresh(self, es, index_name: str) -> None:
+        """pills 인덱스 세대가 바뀌었으면 백그라운드에서 색인을 다시 만듭니다."""
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        if await search_cache.index_version() != self._version:
+            self._refreshing = asyncio.create_task(self.refresh(es, index_name))
+
+    def get_stats(self) -> Dict[str, Any]:
+        keys, _, ranked = self._index
+        return {**self.stats, "keys": len(keys), "ranked_prefixes": len(ranked), "index_version": self._version}
+
+
+# 싱글톤 인스턴스
+imprint_suggester = ImprintSuggester(ranked_prefix_len=IMPRINT_SUGGEST_RANKED_PREFIX_LEN)
@@ -0,0 +1,1026 @@
+# backend/search/local_engine.py
+"""
+pills 인덱스 스냅샷을 메모리에 올려 Elasticsearch 왕복 없이 알약 검색을 수행하는 로컬 엔진.
+
+- 스냅샷은 mmap 가능한 단일 바이너리 파일로 저장되며, 여러 uvicorn 워커가 같은 페이지 캐시를 공유합니다.
+  용어 사전(정렬된 용어 표), 역색인, 문서 모두 파일 안에 있고 헤더(JSON)에는 위치와 크기만 둡니다.
+- print_front/print_back/mark_code_*_anal 에 대한 역색인, shape_group/color_group 에 대한 비트셋을 유지합니다.
+- build_es_query 가 만든 쿼리 DSL의 일치 조건(must/filter/should/minimum_should_match, fuzziness)은 ES와 같고,
+  점수도 ES 기본 BM25(k1=1.2, b=0.75)와 같은 식으로 계산합니다. (용어 빈도, Lucene과 같은 방식으로 부호화한
+  필드 길이 norm, 필드별 문서 수/평균 길이를 스냅샷에 저장, keyword는 norm 없음, terms는 상수 점수,
+  fuzzy는 top_terms_blended_freqs)
+  단, 단일 샤드 전체 통계 기준이라 여러 샤드 인덱스의 샤드별 통계나 삭제 문서가 남은 세그먼트 통계와는
+  점수가 조금 다를 수 있으므로 기본은 꺼져 있고(LOCAL_PILL_ENGINE_ENABLED), 켜기 전에
+  benchmarks/check_local_parity.py로 실제 ES 결과와의 일치율을 확인해야 합니다.
+- 스냅샷 헤더에 만든 시점의 pills 인덱스 세대(search_cache.index_version)를 기록하고,
+  세대가 바뀌면(재색인) 새 스냅샷을 만드는 동안 ES로 검색합니다.
+- 해석할 수 없는 쿼리는 UnsupportedQueryError를 발생시키고, 호출 측은 ES로 폴백합니다.
+"""
+import asyncio
+import json
+import logging
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+from array import array
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.search.cache import search_cache
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+# 로컬 엔진 설정 (기본 비활성화)
+LOCAL_PILL_ENGINE_ENABLED = os.getenv("LOCAL_PILL_ENGINE_ENABLED", "false").lower() == "true"
+LOCAL_PILL_SNAPSHOT_PATH = os.getenv("LOCAL_PILL_SNAPSHOT_PATH", "snapshots/pills.pillsnap")
+LOCAL_PILL_SNAPSHOT_MAX_AGE = float(os.getenv("LOCAL_PILL_SNAPSHOT_MAX_AGE", 86400))  # 초 단위
+
+SNAPSHOT_MAGIC = b"PILLSNP1"
+SNAPSHOT_VERSION = 4
+
+# 쿼리 필드명 -> (색인 방식, _source 필드명)
+#   keyword: 원본 값 그대로의 역색인
+#   text: custom_korean_english 분석기와 같은 방식으로 토큰화한 역색인
+#   ngram: english_ngram_analyzer와 같은 방식(2~3-gram)으로 토큰화한 역색인
+#   bitset: 값별 문서 비트셋 (카디널리티가 낮은 필터 필드)
+FIELD_SPECS: Dict[str, Tuple[str, str]] = {
+    "item_seq": ("keyword", "item_seq"),
+    "drug_shape": ("keyword", "drug_shape"),
+    "color_classes": ("keyword", "color_classes"),
+    "print_front.keyword": ("keyword", "print_front"),
+    "print_back.keyword": ("keyword", "print_back"),
+    "print_front_canon": ("keyword", "print_front_canon"),
+    "print_back_canon": ("keyword", "print_back_canon"),
+    "mark_code_front_canon": ("keyword", "mark_code_front_canon"),
+    "mark_code_back_canon": ("keyword", "mark_code_back_canon"),
+    "print_front": ("text", "print_front"),
+    "print_back": ("text", "print_back"),
+    "mark_code_front_anal": ("text", "mark_code_front_anal"),
+    "mark_code_back_anal": ("text", "mark_code_back_anal"),
+    "print_front_normalized": ("ngram", "print_front_normalized"),
+    "print_back_normalized": ("ngram", "print_back_normalized"),
+    "shape_group": ("bitset", "shape_group"),
+    "color_group": ("bitset", "color_group"),
+}
+
+# 스냅샷에 담지 않는 필드 (384차원 임베딩은 검색 응답에 필요하지 않음)
+SNAPSHOT_SOURCE_EXCLUDES = ["embedding"]
+
+_TOKEN_RE = re.compile(r"\w+")
+_NGRAM_TOKEN_RE = re.compile(r"[^\W_]+")
+NGRAM_MIN, NGRAM_MAX = 2, 3
+
+
+class UnsupportedQueryError(Exception):
+    """로컬 엔진이 해석할 수 없는 쿼리 (ES로 폴백해야 함)"""
+
+
+def analyze_text(value: str) -> List[str]:
+    """
+    custom_korean_english 분석기 근사: '|' 제거 -> standard 토크나이저 -> lowercase
+    """
+    if not value:
+        return []
+    return [token.lower() for token in _TOKEN_RE.findall(value.replace("|", ""))]
+
+
+def analyze_ngrams(value: str) -> List[str]:
+    """
+    english_ngram_analyzer 근사: 문자/숫자 구간별 2~3-gram -> lowercase (중복 토큰 유지)
+    """
+    grams = []
+    for token in _NGRAM_TOKEN_RE.findall(value or ""):
+        token = token.lower()
+        for start in range(len(token)):
+            for size in range(NGRAM_MIN, NGRAM_MAX + 1):
+                if start + size <= len(token):
+                    grams.append(token[start:start + size])
+    return grams
+
+
+def _required_should(total: int, minimum_should_match: Any) -> int:
+    """match 쿼리 minimum_should_match(정수 또는 백분율, 음수 포함)를 필요한 토큰 수로 변환합니다."""
+    if minimum_should_match is None:
+        return 1
+    text = str(minimum_should_match).strip()
+    if text.endswith("%"):
+        percent = int(text[:-1])
+        required = total * percent // 100 if percent >= 0 else total - (total * -percent // 100)
+    else:
+        required = int(text)
+        if required < 0:
+            required = total + required
+    return min(total, max(1, required))
+
+
+def project_source(source: Dict[str, Any], source_filter: Any) -> Dict[str, Any]:
+    """
+    ES _source 필터({"includes": [...], "excludes": [...]} / 필드 리스트 / bool)를 최상위 필드 기준으로 적용합니다.
+    """
+    if source_filter is None or source_filter is True:
+        return source
+    if source_filter is False:
+        return {}
+    if isinstance(source_filter, (list, str)):
+        source_filter = {"includes": source_filter}
+    if not isinstance(source_filter, dict) or set(source_filter) - {"includes", "excludes"}:
+        raise UnsupportedQueryError(f"지원하지 않는 _source 필터: {source_filter}")
+
+    includes = _field_values(source_filter.get("includes"))
+    excludes = set(_field_values(source_filter.get("excludes")))
+    if any("*" in field or "." in field for field in [*includes, *excludes]):
+        raise UnsupportedQueryError(f"지원하지 않는 _source 필터: {source_filter}")
+
+    if includes:
+        return {field: source[field] for field in includes if field in source and field not in excludes}
+    return {field: value for field, value in source.items() if field not in excludes}
+
+
+def _field_values(value: Any) -> List[str]:
+    if value is None:
+        return []
+    if isinstance(value, list):
+        return [str(v) for v in value if v is not None and v != ""]
+    if value == "":
+        return []
+    return [str(value)]
+
+
+def _auto_fuzziness(term: str) -> int:
+    """ES fuzziness AUTO(3,6) 규칙"""
+    length = len(term)
+    if length < 3:
+        return 0
+    if length < 6:
+        return 1
+    return 2
+
+
+def _bounded_osa_distance(a: str, b: str, max_dist: int) -> int:
+    """
+    전치(transposition)를 포함한 편집 거리(OSA). max_dist를 넘으면 max_dist + 1을 반환합니다.
+    """
+    if a == b:
+        return 0
+    la, lb = len(a), len(b)
+    if abs(la - lb) > max_dist:
+        return max_dist + 1
+
+    prev_prev: List[int] = []
+    prev = list(range(lb + 1))
+    for i in range(1, la + 1):
+        cur = [i] + [0] * lb
+        row_min = cur[0]
+        ca = a[i - 1]
+        for j in range(1, lb + 1):
+            cb = b[j - 1]
+            cost = 0 if ca == cb else 1
+            value = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                value = min(value, prev_prev[j - 2] + 1)
+            cur[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_dist:
+            return max_dist + 1
+        prev_prev, prev = prev, cur
+    return prev[lb]
+
+
+# ES(Lucene BM25Similarity) 기본 파라미터
+BM25_K1 = 1.2
+BM25_B = 0.75
+# ES fuzzy match의 top_terms_blended_freqs 기본 확장 용어 수 (max_expansions)
+FUZZY_MAX_EXPANSIONS = 50
+
+
+def _int_to_int4(value: int) -> int:
+    """Lucene SmallFloat.longToInt4: 상위 4비트만 남기는 손실 부호화"""
+    bits = value.bit_length()
+    if bits < 4:
+        return value
+    shift = bits - 4
+    return (value >> shift) & 0x07 | (shift + 1) << 3
+
+
+def _int4_to_int(encoded: int) -> int:
+    bits = encoded & 0x07
+    shift = (encoded >> 3) - 1
+    return bits if shift == -1 else (bits | 0x08) << shift
+
+
+# 24 미만의 필드 길이는 그대로, 그 이상은 int4로 부호화 (Lucene SmallFloat.intToByte4)
+_NORM_FREE_VALUES = 255 - _int_to_int4(2 ** 31 - 1)
+
+
+def encode_norm(length: int) -> int:
+    """필드 길이(토큰 수) -> 1바이트 norm (Lucene BM25 norm과 같은 부호화)"""
+    if length < _NORM_FREE_VALUES:
+        return length
+    return _NORM_FREE_VALUES + _int_to_int4(length - _NORM_FREE_VALUES)
+
+
+# norm 바이트 -> BM25 계산에 쓰는 필드 길이 (ES도 부호화된 길이로 점수를 계산함)
+NORM_LENGTHS = [
+    byte if byte < _NORM_FREE_VALUES else _NORM_FREE_VALUES + _int4_to_int(byte - _NORM_FREE_VALUES)
+    for byte in range(256)
+]
+
+
+def bm25_idf(doc_freq: int, doc_count: int) -> float:
+    """Lucene BM25 idf (doc_count: 해당 필드 값이 있는 문서 수)"""
+    return math.log(1 + (doc_count - doc_freq + 0.5) / (doc_freq + 0.5))
+
+
+_BYTE_BITS = [tuple(i for i in range(8) if byte >> i & 1) for byte in range(256)]
+# 용어 문자 집합 비트마스크 폭 (문자 종류가 더 많으면 비트를 나눠 씀, 걸러내기가 느슨해질 뿐 결과는 같음)
+_MASK_BITS = 64
+
+
+def _iter_bits(bits: int) -> Iterable[int]:
+    """비트셋(int)의 켜진 비트 위치를 오름차순으로 순회합니다."""
+    if not bits:
+        return
+    data = bits.to_bytes((bits.bit_length() + 7) // 8, "little")
+    for byte_idx, byte in enumerate(data):
+        if byte:
+            base = byte_idx * 8
+            for offset in _BYTE_BITS[byte]:
+                yield base + offset
+
+
+def _char_bits(alphabet: str) -> Dict[str, int]:
+    return {char: 1 << (i % _MASK_BITS) for i, char in enumerate(alphabet)}
+
+
+def _align(data: bytearray, size: int = 8) -> None:
+    data += b"\x00" * (-len(data) % size)
+
+
+def _write_term_table(data: bytearray, term_map: Dict[str, List[int]],
+                      freq_map: Optional[Dict[str, List[int]]] = None) -> Dict[str, Any]:
+    """
+    용어 사전과 역색인을 data에 이어 쓰고 헤더에 둘 위치 정보를 반환합니다.
+    용어는 (길이, 용어) 순으로 정렬해 같은 길이의 용어가 연속 구간(lengths)에 오도록 둡니다.
+    (정확 조회는 구간 안 이진 탐색, 편집 거리 조회는 길이 구간만 훑음)
+    freq_map이 있으면(text/ngram 필드) 문서 번호 배열 바로 뒤에 같은 길이의 용어 빈도(tf) 배열을 둡니다.
+    """
+    terms = sorted(term_map, key=lambda term: (len(term), term))
+    entries = array("I")
+    for term in terms:
+        doc_ids = term_map[term]
+        entries.extend((len(data), len(doc_ids)))
+        data += array("I", doc_ids).tobytes()
+        if freq_map is not None:
+            data += array("I", freq_map[term]).tobytes()
+
+    alphabet = "".join(sorted(set("".join(terms))))
+    char_bits = _char_bits(alphabet)
+    masks = array("Q")
+    lengths: Dict[str, List[int]] = {}
+    offsets = array("I", [0])
+    blob = bytearray()
+    for i, term in enumerate(terms):
+        mask = 0
+        for char in term:
+            mask |= char_bits[char]
+        masks.append(mask)
+        bucket = lengths.setdefault(str(len(term)), [i, i])
+        bucket[1] = i + 1
+        blob += term.encode("utf-8")
+        offsets.append(len(blob))
+
+    _align(data)
+    table = {"term_count": len(terms), "alphabet": alphabet, "lengths": lengths}
+    for name, values in (("entries", entries.tobytes()), ("masks", masks.tobytes()),
+                         ("offsets", offsets.tobytes()), ("blob", bytes(blob))):
+        table[f"{name}_offset"] = len(data)
+        data += values
+        _align(data)
+    table["blob_length"] = len(blob)
+    return table
+
+
+class _TermTable:
+    """mmap 위의 필드 용어 사전 (write_snapshot의 _write_term_table 형식)"""
+
+    def __init__(self, data: memoryview, spec: Dict[str, Any]):
+        count = spec["term_count"]
+        self.count = count
+        self._entries = data[spec["entries_offset"]:spec["entries_offset"] + 8 * count].cast("I")
+        self._masks = data[spec["masks_offset"]:spec["masks_offset"] + 8 * count].cast("Q")
+        self._offsets = data[spec["offsets_offset"]:spec["offsets_offset"] + 4 * (count + 1)].cast("I")
+        self._blob = data[spec["blob_offset"]:spec["blob_offset"] + spec["blob_length"]]
+        self._lengths = {int(length): tuple(bucket) for length, bucket in spec["lengths"].items()}
+        self._char_bits = _char_bits(spec["alphabet"])
+
+    def release(self) -> None:
+        for view in (self._entries, self._masks, self._offsets, self._blob):
+            view.release()
+
+    def _term_bytes(self, i: int) -> bytes:
+        return bytes(self._blob[self._offsets[i]:self._offsets[i + 1]])
+
+    def term(self, i: int) -> str:
+        return self._term_bytes(i).decode("utf-8")
+
+    def entry(self, i: int) -> Tuple[int, int]:
+        """(data 안 위치, 길이): 역색인이면 문서 번호 수, 비트셋이면 바이트 수"""
+        return self._entries[2 * i], self._entries[2 * i + 1]
+
+    def find(self, term: str) -> Optional[int]:
+        """용어 번호 (같은 길이 구간에서 이진 탐색, UTF-8 바이트 순서 = 코드 포인트 순서)"""
+        bucket = self._lengths.get(len(term))
+        if bucket is None:
+            return None
+        lo, hi = bucket
+        encoded = term.encode("utf-8")
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_bytes(mid) < encoded:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < bucket[1] and self._term_bytes(lo) == encoded:
+            return lo
+        return None
+
+    def near(self, token: str, max_edits: int) -> List[Tuple[int, int]]:
+        """
+        token과 편집 거리(OSA)가 max_edits 이하인 (용어 번호, 편집 거리)
+        길이 차이가 max_edits 이내인 구간만 훑고, 문자 집합 비트마스크로 먼저 거른 뒤 편집 거리를 계산합니다.
+        (상대에 없는 문자 수가 max_edits를 넘으면 편집 거리도 max_edits를 넘음)
+        """
+        token_mask = 0
+        unknown_chars = 0
+        for char in set(token):
+            bit = self._char_bits.get(char)
+            if bit is None:
+                unknown_chars += 1
+            else:
+                token_mask |= bit
+        if unknown_chars > max_edits:
+            return []
+
+        matches = []
+        masks = self._masks
+        for length in range(max(1, len(token) - max_edits), len(token) + max_edits + 1):
+            bucket = self._lengths.get(length)
+            if bucket is None:
+                continue
+            for i in range(*bucket):
+                mask = masks[i]
+                if (mask & ~token_mask).bit_count() > max_edits:
+                    continue
+                if (token_mask & ~mask).bit_count() + unknown_chars > max_edits:
+                    continue
+                distance = _bounded_osa_distance(token, self.term(i), max_edits)
+                if distance <= max_edits:
+                    matches.append((i, distance))
+        return matches
+
+
+def write_snapshot(path: str, docs: List[Tuple[str, Dict[str, Any]]], index_name: str,
+                   source_indices: Optional[List[str]] = None, index_version: Optional[str] = None) -> None:
+    """
+    (doc_id, _source) 목록으로 스냅샷 파일을 생성합니다.
+    임시 파일에 기록한 뒤 os.replace로 교체하므로 다른 워커가 읽는 중이어도 안전합니다.
+    index_version이 없으면(파일에서 만든 벤치마크/테스트 스냅샷) 인덱스 세대 확인을 하지 않습니다.
+
+    파일 구조:
+        MAGIC(8) | header_len(u32) | header(JSON) | padding | data
+        data = 필드별 (postings(u32 배열, text/ngram은 tf 배열 포함) + 용어 표 + text/ngram은 문서별 norm(u8))
+               + 비트셋 필드별 (bitsets(바이트) + 용어 표) + 문서 테이블(u64 오프셋) + 문서(JSON)
+    헤더의 필드별 doc_count(값이 있는 문서 수)/sum_ttf(전체 토큰 수)는 BM25 idf와 평균 필드 길이에 쓰입니다.
+    """
+    doc_count = len(docs)
+    bitset_bytes = (doc_count + 7) // 8
+
+    postings: Dict[str, Dict[str, List[int]]] = {}
+    freqs: Dict[str, Dict[str, List[int]]] = {}
+    norms: Dict[str, array] = {}
+    bitsets: Dict[str, Dict[str, int]] = {}
+    field_stats: Dict[str, Dict[str, int]] = {}
+    for field, (kind, _) in FIELD_SPECS.items():
+        field_stats[field] = {"doc_count": 0, "sum_ttf": 0}
+        if kind == "bitset":
+            bitsets[field] = {}
+            continue
+        postings[field] = {}
+        if kind in ("text", "ngram"):
+            freqs[field] = {}
+            norms[field] = array("B")
+
+    for doc_idx, (_, source) in enumerate(docs):
+        for field, (kind, source_field) in FIELD_SPECS.items():
+            values = _field_values(source.get(source_field))
+            stats = field_stats[field]
+            if kind in ("text", "ngram"):
+                analyze = analyze_text if kind == "text" else analyze_ngrams
+                tokens = [token for value in values for token in analyze(value)]
+                norms[field].append(encode_norm(len(tokens)))
+                if tokens:
+                    stats["doc_count"] += 1
+                    stats["sum_ttf"] += len(tokens)
+                for term, tf in Counter(tokens).items():
+                    postings[field].setdefault(term, []).append(doc_idx)
+                    freqs[field].setdefault(term, []).append(tf)
+                continue
+
+            # keyword는 ES와 같이 norm 없이 문서당 용어 존재 여부만 색인
+            terms = set(values)
+            if terms:
+                stats["doc_count"] += 1
+                stats["sum_ttf"] += len(terms)
+            if kind == "bitset":
+                for value in terms:
+                    bitsets[field][value] = bitsets[field].get(value, 0) | (1 << doc_idx)
+            else:
+                for term in terms:
+                    postings[field].setdefault(term, []).append(doc_idx)
+
+    data = bytearray()
+    header_fields: Dict[str, Dict[str, Any]] = {}
+
+    for field, term_map in postings.items():
+        kind = FIELD_SPECS[field][0]
+        header_fields[field] = {"kind": kind, **field_stats[field],
+                                **_write_term_table(data, term_map, freqs.get(field))}
+        if field in norms:
+            header_fields[field]["norms_offset"] = len(data)
+            data += norms[field].tobytes()
+            _align(data)
+
+    for field, term_map in bitsets.items():
+        # 비트셋 필드는 용어 표의 항목이 (비트셋 위치, 바이트 수)
+        bitset_entries = {}
+        for term in sorted(term_map):
+            bitset_entries[term] = len(data)
+            data += term_map[term].to_bytes(bitset_bytes, "little")
+        _align(data)
+        table = _write_term_table(data, {term: [] for term in bitset_entries})
+        entries = array("I")
+        for term in sorted(bitset_entries, key=lambda term: (len(term), term)):
+            entries.extend((bitset_entries[term], bitset_bytes))
+        data[table["entries_offset"]:table["entries_offset"] + 8 * len(bitset_entries)] = entries.tobytes()
+        header_fields[field] = {"kind": "bitset", **field_stats[field], **table}
+
+    _align(data)
+    doc_table_offset = len(data)
+    encoded_docs = [
+        json.dumps([doc_id, source], ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        for doc_id, source in docs
+    ]
+    offsets = [0]
+    for blob in encoded_docs:
+        offsets.append(offsets[-1] + len(blob))
+    data += array("Q", offsets).tobytes()
+    doc_blob_offset = len(data)
+    for blob in encoded_docs:
+        data += blob
+
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "index": index_name,
+        "source_indices": source_indices or [index_name],
+        "index_version": index_version,
+        "created_at": time.time(),
+        "byteorder": sys.byteorder,
+        "doc_count": doc_count,
+        "bitset_bytes": bitset_bytes,
+        "doc_table_offset": doc_table_offset,
+        "doc_blob_offset": doc_blob_offset,
+        "fields": header_fields,
+    }
+    header_bytes = json.dumps(header, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    prefix_len = len(SNAPSHOT_MAGIC) + 4 + len(header_bytes)
+    padding = b"\x00" * (-prefix_len % 8)
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(struct.pack("<I", len(header_bytes)))
+        f.write(header_bytes)
+        f.write(padding)
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+class _Snapshot:
+    """
+    mmap으로 연 스냅샷 한 세대 (읽기 전용)
+    만든 뒤에는 바뀌지 않으므로 여러 스레드가 lock 없이 동시에 검색합니다.
+    교체된 세대는 명시적으로 닫지 않고, 진행 중인 검색이 참조를 놓으면 GC가 mmap을 해제합니다.
+    """
+
+    def __init__(self, path: str, mm: mmap.mmap, data: memoryview, header: Dict[str, Any]):
+        self.path = path
+        self.mm = mm
+        self.data = data
+        self.header = header
+        self.tables = {field: _TermTable(data, spec) for field, spec in header["fields"].items()}
+        self.all_docs = (1 << header["doc_count"]) - 1
+        # (field, 용어 번호) -> 비트셋 int (같은 키를 여러 스레드가 동시에 채워도 값이 같으므로 안전)
+        self.bitset_cache: Dict[Tuple[str, int], int] = {}
+
+        # BM25 평균 필드 길이와 norm 바이트별 길이 보정값 k1 * (1 - b + b * dl / avgdl)
+        self.avgdl: Dict[str, float] = {}
+        self.norms: Dict[str, memoryview] = {}
+        self.length_factors: Dict[str, List[float]] = {}
+        for field, spec in header["fields"].items():
+            avgdl = spec["sum_ttf"] / spec["doc_count"] if spec["doc_count"] else 1.0
+            self.avgdl[field] = avgdl
+            if "norms_offset" in spec:
+                offset = spec["norms_offset"]
+                self.norms[field] = data[offset:offset + header["doc_count"]]
+                self.length_factors[field] = [
+                    BM25_K1 * (1 - BM25_B + BM25_B * length / avgdl) for length in NORM_LENGTHS
+                ]
+
+    @classmethod
+    def open(cls, path: str) -> "_Snapshot":
+        # mmap은 파일 디스크립터를 복제하므로 파일은 바로 닫음
+        with open(path, "rb") as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        if mm[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+            mm.close()
+            raise ValueError(f"스냅샷 형식이 올바르지 않습니다: {path}")
+
+        header_len = struct.unpack_from("<I", mm, len(SNAPSHOT_MAGIC))[0]
+        header_start = len(SNAPSHOT_MAGIC) + 4
+        header = json.loads(mm[header_start:header_start + header_len].decode("utf-8"))
+        if header.get("version") != SNAPSHOT_VERSION or header.get("byteorder") != sys.byteorder:
+            mm.close()
+            raise ValueError(f"호환되지 않는 스냅샷입니다: {path}")
+
+        data_start = header_start + header_len
+        data_start += -data_start % 8
+        return cls(path, mm, memoryview(mm)[data_start:], header)
+
+    # ----- 색인 접근 -----
+    def _table(self, field: str) -> _TermTable:
+        table = self.tables.get(field)
+        if table is None:
+            raise UnsupportedQueryError(f"스냅샷에 색인되지 않은 필드: {field}")
+        return table
+
+    def _kind(self, field: str) -> str:
+        self._table(field)
+        return self.header["fields"][field]["kind"]
+
+    def _bits_of(self, doc_ids: Iterable[int]) -> int:
+        buf = bytearray(self.header["bitset_bytes"])
+        for doc_idx in doc_ids:
+            buf[doc_idx >> 3] |= 1 << (doc_idx & 7)
+        return int.from_bytes(buf, "little")
+
+    def _doc_ids(self, table: _TermTable, term_idx: int) -> memoryview:
+        offset, count = table.entry(term_idx)
+        return self.data[offset:offset + 4 * count].cast("I")
+
+    def _postings_bits(self, field: str, term: str) -> int:
+        table = self._table(field)
+        term_idx = table.find(term)
+        if term_idx is None:
+            return 0
+        return self._bits_of(self._doc_ids(table, term_idx))
+
+    def _bitset(self, field: str, term: str) -> int:
+        table = self._table(field)
+        term_idx = table.find(term)
+        if term_idx is None:
+            return 0
+        key = (field, term_idx)
+        bits = self.bitset_cache.get(key)
+        if bits is None:
+            offset, length = table.entry(term_idx)
+            bits = int.from_bytes(self.data[offset:offset + length], "little")
+            self.bitset_cache[key] = bits
+        return bits
+
+    def _term_bits(self, field: str, term: Any) -> int:
+        # text 필드에 대한 term 쿼리도 ES와 같이 분석하지 않은 값을 색인 토큰과 그대로 비교
+        if self._kind(field) == "bitset":
+            return self._bitset(field, str(term))
+        return self._postings_bits(field, str(term))
+
+    def _keyword_weight(self, field: str, doc_freq: int, boost: float) -> float:
+        """norm이 없는 keyword 필드의 BM25 점수 (tf=1, 필드 길이 1로 계산되어 문서마다 같음)"""
+        doc_count = self.header["fields"][field]["doc_count"]
+        length_factor = BM25_K1 * (1 - BM25_B + BM25_B / self.avgdl[field])
+        return boost * bm25_idf(doc_freq, doc_count) / (1 + length_factor)
+
+    def _add_text_scores(self, field: str, table: _TermTable, term_idx: int, weight: float,
+                         scores: Dict[int, float]) -> None:
+        """text/ngram 용어의 문서별 BM25 점수(weight = boost * idf)를 scores에 더합니다."""
+        offset, count = table.entry(term_idx)
+        doc_ids = self.data[offset:offset + 4 * count].cast("I")
+        tfs = self.data[offset + 4 * count:offset + 8 * count].cast("I")
+        norms = self.norms[field]
+        length_factors = self.length_factors[field]
+        for doc_idx, tf in zip(doc_ids, tfs):
+            scores[doc_idx] = scores.get(doc_idx, 0.0) + weight * tf / (tf + length_factors[norms[doc_idx]])
+
+    def _term_query(self, field: str, term: Any, boost: float) -> Tuple[int, Dict[int, float], float]:
+        """ES term 쿼리와 같은 BM25 점수"""
+        kind = self._kind(field)
+        term = str(term)
+        if kind == "bitset":
+            bits = self._bitset(field, term)
+            return bits, {}, self._keyword_weight(field, bits.bit_count(), boost) if bits else 0.0
+
+        table = self._table(field)
+        term_idx = table.find(term)
+        if term_idx is None:
+            return 0, {}, 0.0
+        doc_ids = self._doc_ids(table, term_idx)
+        if kind == "keyword":
+            return self._bits_of(doc_ids), {}, self._keyword_weight(field, len(doc_ids), boost)
+
+        scores: Dict[int, float] = {}
+        weight = boost * bm25_idf(len(doc_ids), self.header["fields"][field]["doc_count"])
+        self._add_text_scores(field, table, term_idx, weight, scores)
+        return self._bits_of(doc_ids), scores, 0.0
+
+    def _token_scores(self, field: str, table: _TermTable, token: str, max_edits: int,
+                      boost: float) -> Dict[int, float]:
+        """
+        match 쿼리 토큰 하나의 문서별 점수
+        fuzziness가 있으면 ES(Lucene FuzzyQuery의 top_terms_blended_freqs)와 같이 편집 거리 안의 용어를
+        유사도(1 - 거리 / 짧은 쪽 길이) 순으로 최대 FUZZY_MAX_EXPANSIONS개 모아, 그중 가장 큰 문서 빈도로 idf를 맞춘 뒤
+        용어별 점수에 유사도를 곱해 합산합니다.
+        """
+        if max_edits == 0:
+            term_idx = table.find(token)
+            expansions = [] if term_idx is None else [(term_idx, 1.0)]
+        else:
+            expansions = []
+            for term_idx, distance in table.near(token, max_edits):
+                term = table.term(term_idx)
+                similarity = 1.0 if distance == 0 else 1.0 - distance / min(len(term), len(token))
+                expansions.append((-similarity, term, term_idx))
+            expansions.sort()
+            expansions = [(term_idx, -neg) for neg, _, term_idx in expansions[:FUZZY_MAX_EXPANSIONS]]
+
+        scores: Dict[int, float] = {}
+        if not expansions:
+            return scores
+        doc_freq = max(table.entry(term_idx)[1] for term_idx, _ in expansions)
+        idf = bm25_idf(doc_freq, self.header["fields"][field]["doc_count"])
+        for term_idx, similarity in expansions:
+            self._add_text_scores(field, table, term_idx, boost * idf * similarity, scores)
+        return scores
+
+    def _doc(self, doc_idx: int) -> Tuple[str, Dict[str, Any]]:
+        table = self.header["doc_table_offset"]
+        start, end = struct.unpack_from("<QQ", self.data, table + 8 * doc_idx)
+        blob_offset = self.header["doc_blob_offset"]
+        doc_id, source = json.loads(bytes(self.data[blob_offset + start:blob_offset + end]).decode("utf-8"))
+        return doc_id, source
+
+    def docs(self) -> List[Tuple[str, Dict[str, Any]]]:
+        return [self._doc(doc_idx) for doc_idx in range(self.header["doc_count"])]
+
+    # ----- 쿼리 평가 -----
+    def _eval(self, clause: Dict[str, Any]) -> Tuple[int, Dict[int, float], float]:
+        """
+        쿼리 절을 평가해 (일치 문서 비트셋, 문서별 점수, 상수 점수)를 반환합니다.
+        문서별 점수가 없는 일치 문서는 상수 점수를 받습니다.
+        """
+        if len(clause) != 1:
+            raise UnsupportedQueryError(f"지원하지 않는 쿼리 절: {list(clause)}")
+        (kind, body), = clause.items()
+
+        if kind == "match_none":
+            return 0, {}, 0.0
+        if kind == "match_all":
+            return self.all_docs, {}, 1.0
+        if kind == "bool":
+            return self._eval_bool(body)
+        if kind == "term":
+            (field, spec), = body.items()
+            if isinstance(spec, dict):
+                value, boost = spec.get("value"), float(spec.get("boost", 1.0))
+            else:
+                value, boost = spec, 1.0
+            return self._term_query(field, value, boost)
+        if kind == "terms":
+            # ES terms 쿼리는 상수 점수(boost)
+            boost = float(body.get("boost", 1.0))
+            (field, values), = ((k, v) for k, v in body.items() if k != "boost")
+            bits = 0
+            for value in values:
+                bits |= self._term_bits(field, value)
+            return bits, {}, boost
+        if kind == "match":
+            return self._eval_match(body)
+        raise UnsupportedQueryError(f"지원하지 않는 쿼리 유형: {kind}")
+
+    def _eval_match(self, body: Dict[str, Any]) -> Tuple[int, Dict[int, float], float]:
+        (field, spec), = body.items()
+        if not isinstance(spec, dict):
+            spec = {"query": spec}
+        if set(spec) - {"query", "boost", "fuzziness", "minimum_should_match"}:
+            raise UnsupportedQueryError(f"지원하지 않는 match 옵션: {sorted(spec)}")
+        kind = self._kind(field)
+        if kind == "ngram":
+            if "fuzziness" in spec:
+                raise UnsupportedQueryError(f"n-gram 필드의 fuzziness match: {field}")
+            tokens = analyze_ngrams(str(spec.get("query", "")))
+        elif kind == "text":
+            tokens = analyze_text(str(spec.get("query", "")))
+        else:
+            raise UnsupportedQueryError(f"text 필드가 아닌 match 쿼리: {field}")
+
+        if not tokens:
+            return 0, {}, 0.0
+        boost = float(spec.get("boost", 1.0))
+        fuzziness = spec.get("fuzziness")
+        required = _required_should(len(tokens), spec.get("minimum_should_match"))
+        table = self._table(field)
+
+        # 토큰별 should 절의 BM25 점수 합 (중복 토큰도 ES와 같이 각각 절 하나)
+        scores: Dict[int, float] = {}
+        matched_counts: Dict[int, int] = {}
+        for token in tokens:
+            if fuzziness is None:
+                max_edits = 0
+            elif str(fuzziness).upper() == "AUTO":
+                max_edits = _auto_fuzziness(token)
+            else:
+                max_edits = int(fuzziness)
+            for doc_idx, score in self._token_scores(field, table, token, max_edits, boost).items():
+                scores[doc_idx] = scores.get(doc_idx, 0.0) + score
+                matched_counts[doc_idx] = matched_counts.get(doc_idx, 0) + 1
+
+        if required > 1:
+            scores = {doc_idx: score for doc_idx, score in scores.items() if matched_counts[doc_idx] >= required}
+        return self._bits_of(scores), scores, 0.0
+
+    def _eval_bool(self, body: Dict[str, Any]) -> Tuple[int, Dict[int, float], float]:
+        if set(body) - {"must", "filter", "should", "must_not", "minimum_should_match", "boost"}:
+            raise UnsupportedQueryError(f"지원하지 않는 bool 옵션: {sorted(body)}")
+
+        def as_list(value):
+            if value is None:
+                return []
+            return value if isinstance(value, list) else [value]
+
+        must = [self._eval(c) for c in as_list(body.get("must"))]
+        filters = [self._eval(c)[0] for c in as_list(body.get("filter"))]
+        must_not = [self._eval(c)[0] for c in as_list(body.get("must_not"))]
+        should = [self._eval(c) for c in as_list(body.get("should"))]
+
+        has_required = bool(must or filters)
+        msm = body.get("minimum_should_match")
+        if msm is None:
+            msm = 0 if has_required else (1 if should else 0)
+        msm = int(msm)
+
+        bits = self.all_docs
+        for must_bits, _, _ in must:
+            bits &= must_bits
+        for filter_bits in filters:
+            bits &= filter_bits
+        for not_bits in must_not:
+            bits &= ~not_bits
+
+        if msm == 1:
+            any_should = 0
+            for should_bits, _, _ in should:
+                any_should |= should_bits
+            bits &= any_should
+        elif msm > 1:
+            counts: Dict[int, int] = {}
+            for should_bits, _, _ in should:
+                for doc_idx in _iter_bits(should_bits & bits):
+                    counts[doc_idx] = counts.get(doc_idx, 0) + 1
+            bits &= self._bits_of(doc_idx for doc_idx, count in counts.items() if count >= msm)
+
+        # 최종 일치 문서에 대해서만 절별 점수를 합산 (filter/must_not은 점수 없음)
+        boost = float(body.get("boost", 1.0))
+        scores: Dict[int, float] = {}
+        matched = None
+        for clause_bits, clause_scores, const in must + should:
+            if clause_scores:
+                if matched is None:
+                    matched = set(_iter_bits(bits))
+                for doc_idx, score in clause_scores.items():
+                    if doc_idx in matched:
+                        scores[doc_idx] = scores.get(doc_idx, 0.0) + score * boost
+            elif const:
+                for doc_idx in _iter_bits(clause_bits & bits):
+                    scores[doc_idx] = scores.get(doc_idx, 0.0) + const * boost
+        return bits, scores, 0.0
+
+    def search(self, query_body: Dict[str, Any], index_name: str) -> List[Dict[str, Any]]:
+        if set(query_body) - {"size", "query", "sort", "_source"}:
+            raise UnsupportedQueryError(f"지원하지 않는 요청 옵션: {sorted(query_body)}")
+        sort = query_body.get("sort")
+        if sort not in (None, [{"_score": {"order": "desc"}}], ["_score"]):
+            raise UnsupportedQueryError(f"지원하지 않는 정렬: {sort}")
+
+        size = int(query_body.get("size", 10))
+        source_filter = query_body.get("_source")
+        bits, scores, const = self._eval(query_body.get("query", {"match_all": {}}))
+
+        # ES와 동일하게 점수 내림차순, 동점은 색인 순서
+        ranked = sorted(_iter_bits(bits), key=lambda doc_idx: (-scores.get(doc_idx, const), doc_idx))[:size]
+
+        hits = []
+        for doc_idx in ranked:
+            doc_id, source = self._doc(doc_idx)
+            hits.append({
+                "_index": index_name or self.header.get("index", ""),
+                "_id": doc_id,
+                "_score": scores.get(doc_idx, const),
+                "_source": project_source(source, source_filter),
+            })
+        return hits
+
+
+class LocalPillEngine:
+    """
+    mmap으로 연 스냅샷 위에서 build_es_query 쿼리를 평가하는 인메모리 검색 엔진
+    search는 이벤트 루프 밖(asyncio.to_thread)에서 호출됩니다. 스냅샷(_Snapshot)은 불변이라
+    검색은 lock 없이 시작 시점의 참조 하나로 끝까지 수행하고, load/close는 참조만 바꿉니다.
+    """
+
+    def __init__(self):
+        self._snapshot: Optional[_Snapshot] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self.stats = {"loads": 0, "refreshes": 0, "refresh_errors": 0, "unsupported": 0, "search_errors": 0}
+
+    @property
+    def _header(self) -> Dict[str, Any]:
+        snapshot = self._snapshot
+        return snapshot.header if snapshot is not None else {}
+
+    @property
+    def ready(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def doc_count(self) -> int:
+        return self._header.get("doc_count", 0)
+
+    @property
+    def created_at(self) -> float:
+        return self._header.get("created_at", 0.0)
+
+    @property
+    def index_version(self) -> Optional[str]:
+        """스냅샷을 만든 시점의 pills 인덱스 세대 (파일에서 만든 스냅샷은 None)"""
+        return self._header.get("index_version")
+
+    def is_current(self, index_version: str) -> bool:
+        """스냅샷이 현재 인덱스 세대와 같은지 (세대가 기록되지 않은 스냅샷은 항상 True)"""
+        snapshot = self._snapshot
+        return snapshot is not None and snapshot.header.get("index_version") in (None, index_version)
+
+    def load(self, path: str) -> None:
+        """스냅샷 파일을 mmap으로 엽니다. 기존에 열린 스냅샷은 교체됩니다. (진행 중인 검색은 이전 스냅샷으로 끝남)"""
+        snapshot = _Snapshot.open(path)
+        self._snapshot = snapshot
+        self.stats["loads"] += 1
+        logger.info(f"로컬 알약 엔진 스냅샷 로드: {path} (문서 {snapshot.header['doc_count']}개)")
+
+    def close(self) -> None:
+        self._snapshot = None
+
+    async def refresh(self, es, index_name: str, index_version: str) -> bool:
+        """
+        index_version 세대의 스냅샷을 로드합니다. 다른 워커가 이미 같은 세대로 만든 파일이 있으면 그대로 쓰고,
+        없으면 ES에서 다시 만듭니다. 실패해도 예외를 던지지 않습니다. (기존 스냅샷은 로드되지 않은 상태로 남지 않음)
+        """
+        snapshot = self._snapshot
+        path = snapshot.path if snapshot is not None else LOCAL_PILL_SNAPSHOT_PATH
+        try:
+            header = _snapshot_header(path)
+            if header is None or header.get("version") != SNAPSHOT_VERSION \
+                    or header.get("index_version") != index_version:
+                await build_snapshot_from_es(es, index_name, path, index_version)
+            await asyncio.to_thread(self.load, path)
+            self.stats["refreshes"] += 1
+            return True
+        except Exception as e:
+            self.stats["refresh_errors"] += 1
+            logger.error(f"로컬 알약 엔진 스냅샷 갱신 실패: {e}", exc_info=True)
+            return False
+
+    def ensure_fresh(self, es, index_name: str, index_version: str) -> None:
+        """스냅샷 세대가 index_version과 다르면 백그라운드에서 갱신합니다. (그동안 호출 측은 ES 사용)"""
+        if self.is_current(index_version):
+            return
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        logger.info(f"pills 인덱스 세대 변경 감지 ({self.index_version} -> {index_version}), 로컬 스냅샷 갱신")
+        self._refreshing = asyncio.create_task(self.refresh(es, index_name, index_version))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "ready": self.ready,
+            "doc_count": self.doc_count,
+            "index_version": self.index_version,
+            "age_seconds": round(time.time() - self.created_at, 1) if self.ready else None,
+            "refreshing": self._refreshing is not None and not self._refreshing.done(),
+        }
+
+    def snapshot_docs(self) -> Tuple[Optional[str], List[Tuple[str, Dict[str, Any]]]]:
+        """(스냅샷 인덱스 세대, 모든 (doc_id, _source) 색인 순서) - 한 스냅샷 참조에서 읽으므로 교체되어도 일관됨"""
+        snapshot = self._snapshot
+        if snapshot is None:
+            return None, []
+        return snapshot.header.get("index_version"), snapshot.docs()
+
+    def search(self, query_body: Dict[str, Any], index_name: str = "") -> List[Dict[str, Any]]:
+        """
+        ES search 요청 본문(build_es_query 결과)을 평가해 ES hits 형태로 반환합니다.
+        """
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise UnsupportedQueryError("로컬 엔진이 로드되지 않았습니다.")
+        return snapshot.search(query_body, index_name)
+
+
+async def build_snapshot_from_es(es, index_name: str, path: str, index_version: Optional[str] = None) -> int:
+    """ES 인덱스 전체를 스캔해 스냅샷 파일을 생성하고 문서 수를 반환합니다. (index_version: 헤더에 기록할 인덱스 세대)"""
+    from elasticsearch.helpers import async_scan
+
+    # 별칭이면 실제 인덱스 이름 (재색인 후 별칭 교체 감지용)
+    source_indices = sorted((await es.indices.get_alias(index=index_name)).keys())
+
+    docs: List[Tuple[str, Dict[str, Any]]] = []
+    async for hit in async_scan(
+        es,
+        index=index_name,
+        query={"query": {"match_all": {}}},
+        _source_excludes=SNAPSHOT_SOURCE_EXCLUDES,
+        size=1000,
+        preserve_order=True,
+    ):
+        docs.append((hit["_id"], hit.get("_source", {})))
+
+    await asyncio.to_thread(write_snapshot, path, docs, index_name, source_indices, index_version)
+    logger.info(f"로컬 알약 엔진 스냅샷 생성 완료: {path} (문서 {len(docs)}개)")
+    return len(docs)
+
+
+def _snapshot_header(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            header_len = struct.unpack("<I", f.read(4))[0]
+            return json.loads(f.read(header_len).decode("utf-8"))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+async def init_local_engine(es, index_name: str, path: str, max_age: float) -> bool:
+    """
+    앱 시작 시 스냅샷을 준비하고 로드합니다.
+      - 스냅샷이 없거나, max_age보다 오래되었거나, 인덱스 세대(재색인/별칭 교체)가 다르거나,
+        ES 문서 수와 다르면 ES에서 다시 생성
+      - 실행 중 세대가 바뀌면 검색 경로(ensure_fresh)에서 다시 갱신
+      - 실패해도 예외를 던지지 않고 False를 반환 (검색은 ES로 계속 동작)
+    """
+    try:
+        index_version = await search_cache.index_version()
+        header = _snapshot_header(path)
+        stale = (
+            header is None
+            or header.get("version") != SNAPSHOT_VERSION
+            or header.get("index") != index_name
+            or header.get("index_version") != index_version
+            or time.time() - header.get("created_at", 0) > max_age
+        )
+        if not stale:
+            count = (await es.count(index=index_name))["count"]
+            stale = count != header.get("doc_count")
+
+        if stale:
+            logger.info(f"로컬 알약 엔진 스냅샷 갱신 필요: {path}")
+            await build_snapshot_from_es(es, index_name, path, index_version)
+
+        await asyncio.to_thread(pill_engine.load, path)
+        return True
+    except Exception as e:
+        logger.error(f"로컬 알약 엔진 초기화 실패, ES 검색만 사용합니다: {e}", exc_info=True)
+        return False
+
+
+# 싱글톤 인스턴스
+pill_engine = LocalPillEngine()
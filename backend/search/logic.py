@@ -1,50 +1,332 @@
 # backend/search/logic.py
+import asyncio
 import json
-from typing import Dict, Any, List
+import os
+from typing import Dict, Any, List, Optional, Tuple
 import logging
 
+from elasticsearch import ConnectionTimeout
 from fastapi import HTTPException
 
 from backend.utils.helpers import normalize_color, get_color_group, normalize_shape, get_shape_group
-from backend.search.transform import generate_character_variations
+from backend.search.transform import generate_character_variations, canonicalize_imprint
+from backend.search.local_engine import pill_engine, UnsupportedQueryError
+from backend.search.cache import search_cache
+from backend.search.medicine_cache import medicine_cache
+from backend.search.imprint_matcher import imprint_matcher
+from backend.search.profiling import query_profiler, attach_profile
+from backend.search.templates import QueryTemplates
+from backend.search.embedding import pill_embedder, pill_query_text
 
 logger = logging.getLogger(__name__)
 
-from backend.db.elastic import es, INDEX_NAME
-
-
-async def search_pills(features: Dict[str, Any], top_k: int = 5) -> List[Dict[str, Any]]:
+from backend.db.elastic import get_es, INDEX_NAME, MEDICINE_INDEX_NAME
+
+# Elasticsearch 요청 시간 초과 시 응답 (빈 결과로 숨기지 않고 바로 실패)
+ES_TIMEOUT_DETAIL = "검색 서버 응답 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."
+
+# 인쇄문자 유사 문자 처리 방식
+#   variations: 쿼리 시점에 유사 문자 변형을 생성해 변형마다 절을 추가 (기존 방식)
+#   canonical: 색인된 OCR 혼동 문자 정규형 필드(*_canon)에 정규형 term 조회 (ingest canonical 선행 필요)
+IMPRINT_QUERY_MODE = os.getenv("IMPRINT_QUERY_MODE", "variations")
+
+# 인쇄문자 부분 일치 방식
+#   fuzzy: print_front/print_back에 fuzziness AUTO match (기존 방식)
+#   ngram: print_*_normalized(2~3-gram) 필드에 n-gram 겹침 비율로 match (ingest normalized 선행 필요)
+#   weighted: 메모리 SymSpell 색인에서 OCR 혼동 가중 편집 거리로 찾은 인쇄문자를 keyword terms 조회
+#             (색인이 준비되기 전에는 fuzzy로 대체)
+IMPRINT_FUZZY_MODE = os.getenv("IMPRINT_FUZZY_MODE", "fuzzy")
+IMPRINT_NGRAM_MIN_MATCH = os.getenv("IMPRINT_NGRAM_MIN_MATCH", "50%")
+
+# 검색 응답 _source 프로필
+#   card: 앱 검색 결과 카드에 표시하는 필드만
+#   full: 384차원 embedding을 제외한 전체 필드
+#   id: item_seq만 (후속 조회용 내부 프로필)
+#   photo: item_seq와 비정규화된 medicine_data 표시 필드 (사진 검색, ingest enrich 선행 필요)
+SOURCE_PROFILES: Dict[str, Dict[str, List[str]]] = {
+    "card": {
+        "includes": [
+            "item_seq", "item_name", "entp_name", "item_image", "class_name", "chart",
+            "drug_shape", "color_classes", "print_front", "print_back",
+            "mark_code_front_anal", "mark_code_back_anal", "line_front", "line_back"
+        ]
+    },
+    "full": {"excludes": ["embedding"]},
+    "id": {"includes": ["item_seq"]},
+    "photo": {"includes": ["item_seq", "medicine"]},
+}
+DEFAULT_SOURCE_PROFILE = "card"
+
+# 검색 방식
+#   lexical: bool 쿼리만 사용 (기존 방식)
+#   hybrid: bool 쿼리 + embedding kNN 결과를 RRF(Reciprocal Rank Fusion)로 결합 (ingest embeddings 선행 필요)
+PILL_SEARCH_MODE = os.getenv("PILL_SEARCH_MODE", "lexical")
+HYBRID_RANK_WINDOW = int(os.getenv("HYBRID_RANK_WINDOW", 20))  # 방식별로 합칠 상위 결과 수
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", 60))
+HYBRID_NUM_CANDIDATES_FACTOR = int(os.getenv("HYBRID_NUM_CANDIDATES_FACTOR", 5))
+
+
+async def search_pills(features: Dict[str, Any], top_k: int = 5,
+                       profile: str = DEFAULT_SOURCE_PROFILE) -> List[Dict[str, Any]]:
     try:
         # features가 문자열(str)이라면 JSON으로 변환
         if isinstance(features, str):
             features = json.loads(features)  # JSON 문자열을 딕셔너리로 변환
 
-        norm_features = preprocess_features(features)
-        query_body = build_es_query(norm_features, top_k)
-        logger.warning(f"QUERY BODY:\n{json.dumps(query_body, indent=2, ensure_ascii=False)}")
-
-        response = await es.search(index=INDEX_NAME, body=query_body)
-        raw_results = response["hits"]["hits"]
+        if PILL_SEARCH_MODE == "hybrid":
+            return (await search_pills_batch([features], top_k, profile))[0]
 
-        if not raw_results:
-            logger.info("검색 결과가 없습니다.")
-            return []
+        if IMPRINT_FUZZY_MODE == "weighted":
+            await imprint_matcher.ensure_fresh(get_es(), INDEX_NAME)
+        norm_features = preprocess_features(features)
 
-        # 점수 기반 필터링 적용
-        filtered_results = filter_results_by_score(results=raw_results, min_results=1, max_results=top_k)
+        # 같은 특징 조합의 검색 결과 캐시 조회
+        cache_key = search_cache.make_key(norm_features, top_k, profile, PILL_SEARCH_MODE)
+        cached = await search_cache.get(cache_key)
+        if cached is not None:
+            logger.info(f"검색 캐시 적중: {len(cached)}건")
+            return cached
 
-        logger.info(f"원본 결과 수: {len(raw_results)}, 필터링 후 결과 수: {len(filtered_results)}")
+        query_body = query_templates.render(norm_features, top_k, profile)
 
+        raw_results = await search_local_engine(query_body)
+        if not raw_results:
+            client = get_es("search")
+            sampled = query_profiler.should_sample()
+            response = await client.search(
+                index=INDEX_NAME, body=attach_profile(query_body) if sampled else query_body, request_cache=True
+            )
+            query_profiler.observe(client, INDEX_NAME, "lexical", norm_features, query_body, response, sampled)
+            raw_results = response["hits"]["hits"]
+
+        filtered_results = finalize_search_hits(raw_results, top_k)
+        await search_cache.set(cache_key, filtered_results)
         return filtered_results
 
     except json.JSONDecodeError:
         logger.error("❌ JSON decoding failed: Invalid JSON format.", exc_info=True)
         return []
+    except HTTPException:
+        raise
+    except ConnectionTimeout as e:
+        logger.error(f"❌ Pill search timed out: {e}")
+        raise HTTPException(status_code=504, detail=ES_TIMEOUT_DETAIL)
     except Exception as e:
         logger.error(f"❌ Pill search failed: {e}", exc_info=True)
         return []
 
 
+async def search_pills_batch(features_list: List[Dict[str, Any]], top_k: int = 5,
+                             profile: str = DEFAULT_SOURCE_PROFILE) -> List[List[Dict[str, Any]]]:
+    """
+    한 사진에서 검출된 여러 알약 후보를 한 번의 _msearch 요청으로 검색합니다.
+    PILL_SEARCH_MODE=hybrid이면 후보마다 bool 쿼리와 embedding kNN 쿼리를 함께 보내 RRF로 합칩니다.
+
+    Args:
+        features_list: search_pills와 같은 형식의 특징 딕셔너리(또는 JSON 문자열) 리스트
+        top_k: 후보별 최대 반환 결과 수
+        profile: 반환할 _source 필드 프로필 (SOURCE_PROFILES)
+
+    Returns:
+        입력 순서와 같은 후보별 검색 결과 리스트 (실패한 후보는 빈 리스트)
+
+    Raises:
+        HTTPException(504): Elasticsearch 요청 시간 초과
+    """
+    results: List[List[Dict[str, Any]]] = [[] for _ in features_list]
+    # 캐시 키 -> (정규화된 특징, 같은 특징을 가진 후보 인덱스들) (한 사진 안의 중복 후보는 한 번만 검색)
+    pending: Dict[str, Tuple[Dict[str, Any], List[int]]] = {}
+    if IMPRINT_FUZZY_MODE == "weighted":
+        await imprint_matcher.ensure_fresh(get_es(), INDEX_NAME)
+
+    for idx, features in enumerate(features_list):
+        try:
+            if isinstance(features, str):
+                features = json.loads(features)
+
+            norm_features = preprocess_features(features)
+            cache_key = search_cache.make_key(norm_features, top_k, profile, PILL_SEARCH_MODE)
+            if cache_key in pending:
+                pending[cache_key][1].append(idx)
+                continue
+
+            cached = await search_cache.get(cache_key)
+            if cached is not None:
+                results[idx] = cached
+                continue
+
+            pending[cache_key] = (norm_features, [idx])
+        except Exception as e:
+            logger.error(f"❌ Pill search query build failed (candidate {idx}): {e}", exc_info=True)
+
+    if not pending:
+        return results
+
+    # 하이브리드 모드: 후보별 쿼리 임베딩을 한 번에 계산 (실패 시 lexical 검색만 수행)
+    vectors: Optional[List[List[float]]] = None
+    if PILL_SEARCH_MODE == "hybrid":
+        try:
+            vectors = await pill_embedder.aembed([pill_query_text(norm) for norm, _ in pending.values()])
+        except Exception as e:
+            logger.warning(f"쿼리 임베딩 실패, lexical 검색만 수행: {e}")
+    window = max(top_k, HYBRID_RANK_WINDOW) if vectors else top_k
+
+    searches: List[Any] = []
+    # 프로파일링용 _msearch 항목별 (쿼리 종류, 정규화된 특징, 원래 본문, profile 여부)
+    observed: List[Tuple[str, Dict[str, Any], Any, bool]] = []
+    # (캐시 키, 로컬 엔진 결과, lexical 응답 위치, kNN 응답 위치)
+    plans: List[Tuple[str, List[Dict[str, Any]], Optional[int], Optional[int]]] = []
+    for i, (cache_key, (norm_features, _)) in enumerate(pending.items()):
+        query_body = query_templates.render(norm_features, window, profile)
+        lexical_hits = await search_local_engine(query_body)
+        lexical_pos = knn_pos = None
+        if not lexical_hits:
+            lexical_pos = len(observed)
+            sampled = query_profiler.should_sample()
+            searches.append({"index": INDEX_NAME, "request_cache": True})
+            searches.append(attach_profile(query_body) if sampled else query_body)
+            observed.append(("lexical", norm_features, query_body, sampled))
+        if vectors:
+            knn_pos = len(observed)
+            knn_body = build_knn_query(norm_features, vectors[i], window, profile)
+            sampled = query_profiler.should_sample()
+            searches.append({"index": INDEX_NAME})
+            searches.append(attach_profile(knn_body) if sampled else knn_body)
+            observed.append(("knn", norm_features, knn_body, sampled))
+        plans.append((cache_key, lexical_hits, lexical_pos, knn_pos))
+
+    responses: List[Dict[str, Any]] = []
+    if searches:
+        client = get_es("search")
+        try:
+            response = await client.msearch(searches=searches)
+            responses = response["responses"]
+        except ConnectionTimeout as e:
+            logger.error(f"❌ Pill batch search timed out: {e}")
+            raise HTTPException(status_code=504, detail=ES_TIMEOUT_DETAIL)
+        except Exception as e:
+            logger.error(f"❌ Pill batch search failed: {e}", exc_info=True)
+            return results
+
+        for (kind, norm_features, body, sampled), item in zip(observed, responses):
+            if "error" not in item:
+                query_profiler.observe(client, INDEX_NAME, kind, norm_features, body, item, sampled)
+
+    for cache_key, lexical_hits, lexical_pos, knn_pos in plans:
+        indices = pending[cache_key][1]
+        # 하이브리드 키에는 lexical/kNN 결과를 모두 얻었을 때만 저장 (임베딩/한쪽 검색 실패 결과를 TTL 동안 고정하지 않음)
+        cacheable = PILL_SEARCH_MODE != "hybrid" or knn_pos is not None
+        if lexical_pos is not None:
+            item = responses[lexical_pos]
+            if "error" in item:
+                logger.error(f"❌ Pill search failed (candidates {indices}): {item['error']}")
+                lexical_hits = None
+                cacheable = False
+            else:
+                lexical_hits = item["hits"]["hits"]
+
+        if knn_pos is None:
+            if lexical_hits is None:
+                continue
+            filtered_results = finalize_search_hits(lexical_hits, top_k)
+        else:
+            item = responses[knn_pos]
+            if "error" in item:
+                logger.error(f"❌ Pill kNN search failed (candidates {indices}): {item['error']}")
+                knn_hits = []
+                cacheable = False
+            else:
+                knn_hits = item["hits"]["hits"]
+            filtered_results = fuse_rrf([lexical_hits or [], knn_hits], top_k)
+
+        if cacheable:
+            await search_cache.set(cache_key, filtered_results)
+        for idx in indices:
+            results[idx] = filtered_results
+
+    return results
+
+
+def build_knn_query(norm: Dict[str, Any], vector: List[float], k: int, profile: str) -> Dict[str, Any]:
+    """
+    embedding 필드 kNN 검색 요청 본문을 만듭니다.
+    모양/색상 그룹은 bool 쿼리와 같은 조건을 kNN 사전 필터로 적용합니다.
+    """
+    filters = []
+    if "shape_group" in norm:
+        filters.append({"term": {"shape_group": norm["shape_group"]}})
+    color_groups = norm.get("primary_color_group", []) + norm.get("secondary_color_group", [])
+    if color_groups:
+        filters.append({"terms": {"color_group": color_groups}})
+    knn = {
+        "field": "embedding",
+        "query_vector": vector,
+        "k": k,
+        "num_candidates": k * HYBRID_NUM_CANDIDATES_FACTOR,
+    }
+    if filters:
+        knn["filter"] = filters
+    return {"size": k, "knn": knn, "_source": SOURCE_PROFILES[profile]}
+
+
+def fuse_rrf(rankings: List[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+    """
+    여러 검색 결과 순위를 Reciprocal Rank Fusion으로 합칩니다.
+    score(d) = Σ 1 / (HYBRID_RRF_K + rank), 결과의 _score는 RRF 점수로 바뀝니다.
+    """
+    fused: Dict[str, float] = {}
+    first_hits: Dict[str, Dict[str, Any]] = {}
+    for hits in rankings:
+        for rank, hit in enumerate(hits, start=1):
+            doc_id = hit["_id"]
+            fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+            first_hits.setdefault(doc_id, hit)
+
+    # 동점은 먼저 나온 순위 목록(bool 쿼리)의 순서를 유지
+    order = {doc_id: i for i, doc_id in enumerate(first_hits)}
+    ranked = sorted(fused, key=lambda doc_id: (-fused[doc_id], order[doc_id]))[:top_k]
+    return [{**first_hits[doc_id], "_score": round(fused[doc_id], 6)} for doc_id in ranked]
+
+
+def finalize_search_hits(raw_results: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    """검색 원본 결과에 점수 기반 필터링을 적용합니다."""
+    if not raw_results:
+        logger.info("검색 결과가 없습니다.")
+        return []
+
+    # 점수 기반 필터링 적용
+    filtered_results = filter_results_by_score(results=raw_results, min_results=1, max_results=top_k)
+
+    logger.info(f"원본 결과 수: {len(raw_results)}, 필터링 후 결과 수: {len(filtered_results)}")
+
+    return filtered_results
+
+
+async def search_local_engine(query_body: str) -> List[Dict[str, Any]]:
+    """
+    로컬 알약 엔진이 로드되어 있으면 ES 대신 스냅샷에서 검색합니다. (평가는 이벤트 루프 밖 스레드에서)
+    엔진이 없거나, 스냅샷이 현재 인덱스 세대가 아니거나(백그라운드 갱신 시작), 해석할 수 없는 쿼리이거나,
+    검색 중 오류가 나거나, 결과가 없으면 빈 리스트를 반환해 ES로 폴백합니다.
+    """
+    if not pill_engine.ready:
+        return []
+    index_version = await search_cache.index_version()
+    if not pill_engine.is_current(index_version):
+        pill_engine.ensure_fresh(get_es("admin"), INDEX_NAME, index_version)
+        return []
+    try:
+        return await asyncio.to_thread(pill_engine.search, json.loads(query_body), INDEX_NAME)
+    except UnsupportedQueryError as e:
+        pill_engine.stats["unsupported"] += 1
+        logger.info(f"로컬 엔진 미지원 쿼리, ES로 폴백: {e}")
+        return []
+    except Exception as e:
+        # 로컬 엔진 오류로 검색이 실패하지 않도록 ES로 폴백
+        pill_engine.stats["search_errors"] += 1
+        logger.error(f"로컬 엔진 검색 실패, ES로 폴백: {e}", exc_info=True)
+        return []
+
+
 def filter_results_by_score(results: List[Dict[str, Any]],
                             min_results: int = 1,
                             max_results: int = 5,
@@ -151,40 +433,68 @@ def analyze_score_distribution(scores: List[float]) -> Dict[str, Any]:
     return analysis
 
 async def search_medicine_by_item_seq(item_seq: str)-> Dict[str, Any]:
-    try:
-        query = {
-                    "term": {
-                        "item_seq": {
-                            "value": item_seq
-                        }
-                    }
-                }
-
-        result = await es.search(
-            index="medicine_data",
-            body={
-                "query": query,
-                "size": 1  # 단일 문서만 반환
-            }
+    docs = await search_medicines_by_item_seqs([item_seq])
+    doc = docs.get(item_seq)
+    if doc is None:
+        raise HTTPException(
+            status_code=404,
+            detail="해당 의약품 정보를 찾을 수 없습니다."
         )
-        hits = result.get("hits", {}).get("hits", [])
-        doc = hits[0]["_source"]
+    return doc
+
 
-        return doc
+async def search_medicines_by_item_seqs(item_seqs: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 item_seq의 의약품 문서를 조회합니다.
+    medicine_cache(L1/L2)에 없는 item_seq만 한 번의 terms 검색으로 ES에서 가져옵니다.
+
+    Args:
+        item_seqs: 조회할 item_seq 목록 (중복 허용)
+
+    Returns:
+        item_seq -> 의약품 문서(_source) 딕셔너리 (찾지 못한 item_seq는 포함되지 않음)
+    """
+    try:
+        return await medicine_cache.get_many(item_seqs, fetch_medicine_docs)
+    except ConnectionTimeout as e:
+        logger.error(f"의약품 일괄 검색 시간 초과: {e}")
+        raise HTTPException(status_code=504, detail=ES_TIMEOUT_DETAIL)
     except Exception as e:
-        logger.error(f"의약품 검색 중 오류 발생: {str(e)}", exc_info=True)
+        logger.error(f"의약품 일괄 검색 중 오류 발생: {str(e)}", exc_info=True)
         raise HTTPException(
             status_code=500,
             detail="의약품 검색 중 오류가 발생했습니다."
         )
 
 
+async def fetch_medicine_docs(item_seqs: List[str]) -> Dict[str, Dict[str, Any]]:
+    """medicine_data 인덱스에서 item_seq 목록의 문서를 terms 검색 한 번으로 조회합니다."""
+    if not item_seqs:
+        return {}
+
+    result = await get_es("mget").search(
+        index=MEDICINE_INDEX_NAME,
+        body={
+            "query": {"terms": {"item_seq": item_seqs}},
+            "size": len(item_seqs)
+        }
+    )
+    hits = result.get("hits", {}).get("hits", [])
+
+    # item_seq당 첫 문서만 사용
+    docs: Dict[str, Dict[str, Any]] = {}
+    for hit in hits:
+        doc = hit["_source"]
+        docs.setdefault(doc.get("item_seq"), doc)
+    return docs
+
+
 def preprocess_features(features: Dict[str, Any]) -> Dict[str, Any]:
     """
     사용자로부터 받은 검색 파라미터를 전처리합니다.
       - drug_shape: normalize_shape와 get_shape_group를 이용해 정규화
       - color_classes: 단일 문자열이면 리스트로 변환하고, 주색상/보조색상 구분 후 그룹화
-      - imprint: 좌우 공백 제거, '마크' 포함 여부 체크, 유사 문자 변형 생성
+      - imprint: 좌우 공백 제거, '마크' 포함 여부 체크, 유사 문자 변형 또는 정규형 생성, 부분 일치 방식 지정
     """
     norm = {}
 
@@ -214,7 +524,19 @@ def preprocess_features(features: Dict[str, Any]) -> Dict[str, Any]:
     imprint = features.get("imprint", "").strip()
     norm["imprint"] = imprint
     norm["is_mark"] = "마크" in imprint
-    norm["imprint_variations"] = generate_character_variations(imprint) if imprint else []
+    norm["imprint_match"] = IMPRINT_FUZZY_MODE
+    if IMPRINT_FUZZY_MODE == "weighted":
+        if imprint_matcher.ready:
+            norm["imprint_exact_matches"], norm["imprint_matches"] = (
+                imprint_matcher.match_values(imprint) if imprint else ([], [])
+            )
+        else:
+            norm["imprint_match"] = "fuzzy"
+    if IMPRINT_QUERY_MODE == "canonical":
+        norm["imprint_canonical"] = canonicalize_imprint(imprint) if imprint else ""
+        norm["imprint_variations"] = []
+    else:
+        norm["imprint_variations"] = generate_character_variations(imprint) if imprint else []
 
     return norm
 
@@ -266,17 +588,8 @@ def build_es_query(norm: Dict[str, Any], top_k: int) -> Dict[str, Any]:
                 "print_back.keyword": {"value": imprint, "boost": 10.0}
             }
         })
-        # 퍼지 매칭: fuzzy 옵션 활용
-        should_clauses.append({
-            "match": {
-                "print_front": {"query": imprint, "boost": 5.0, "fuzziness": "AUTO"}
-            }
-        })
-        should_clauses.append({
-            "match": {
-                "print_back": {"query": imprint, "boost": 5.0, "fuzziness": "AUTO"}
-            }
-        })
+        # 부분 일치: fuzzy 또는 n-gram
+        should_clauses.extend(build_imprint_partial_clauses(norm, 5.0))
         # 마크 코드 검색
         if is_mark:
             should_clauses.append({
@@ -322,6 +635,17 @@ def build_es_query(norm: Dict[str, Any], top_k: int) -> Dict[str, Any]:
                     "mark_code_back_anal": {"query": variation, "boost": 6.0 if is_mark else 3.0}
                 }
             })
+        # OCR 혼동 문자 정규형 일치 (변형 목록 대신 정규형 term 조회)
+        imprint_canonical = norm.get("imprint_canonical")
+        if imprint_canonical:
+            for field in ("print_front_canon", "print_back_canon"):
+                should_clauses.append({
+                    "term": {field: {"value": imprint_canonical, "boost": 8.0 if is_mark else 5.0}}
+                })
+            for field in ("mark_code_front_canon", "mark_code_back_canon"):
+                should_clauses.append({
+                    "term": {field: {"value": imprint_canonical, "boost": 6.0 if is_mark else 3.0}}
+                })
 
     # 4. 최종 쿼리 구성: 두 개의 독립적인 쿼리를 OR로 결합
     main_query = {
@@ -344,12 +668,7 @@ def build_es_query(norm: Dict[str, Any], top_k: int) -> Dict[str, Any]:
         transparent_should.append({
             "term": {"print_back.keyword": {"value": imprint, "boost": 10.0}}
         })
-        transparent_should.append({
-            "match": {"print_front": {"query": imprint, "boost": 5.0, "fuzziness": "AUTO"}}
-        })
-        transparent_should.append({
-            "match": {"print_back": {"query": imprint, "boost": 5.0, "fuzziness": "AUTO"}}
-        })
+        transparent_should.extend(build_imprint_partial_clauses(norm, 5.0))
         
         # 유사 문자 변형도 포함
         for variation in norm.get("imprint_variations", []):
@@ -359,10 +678,18 @@ def build_es_query(norm: Dict[str, Any], top_k: int) -> Dict[str, Any]:
             transparent_should.append({
                 "term": {"print_back.keyword": {"value": variation, "boost": 5.0}}
             })
+
+        # 정규형 일치도 포함
+        if norm.get("imprint_canonical"):
+            for field in ("print_front_canon", "print_back_canon"):
+                transparent_should.append({
+                    "term": {field: {"value": norm["imprint_canonical"], "boost": 5.0}}
+                })
         
         transparent_query = {
             "bool": {
-                "must": [
+                # 점수에 영향이 없는 조건은 filter 컨텍스트에 두어 ES 필터 캐시를 사용
+                "filter": [
                     {"term": {"color_group": "투명"}},  # 색상이 투명인 항목
                     shape_group_filter  # shape_group 필터 추가
                 ],
@@ -387,3 +714,36 @@ def build_es_query(norm: Dict[str, Any], top_k: int) -> Dict[str, Any]:
     }
     
     return query_body
+
+
+
+def build_imprint_partial_clauses(norm: Dict[str, Any], boost: float) -> List[Dict[str, Any]]:
+    """
+    인쇄문자 앞/뒷면 부분 일치 절을 만듭니다.
+    - fuzzy: 편집 거리 확장(fuzziness AUTO) match
+    - ngram: 2~3-gram 필드에서 겹치는 n-gram 비율(IMPRINT_NGRAM_MIN_MATCH) 이상인 문서 match
+    - weighted: imprint_matcher가 찾은 인쇄문자 값들의 keyword terms 조회
+      (대소문자/분할선만 다른 값은 boost 2배, 혼동 문자/편집 거리로 찾은 값은 boost)
+    """
+    imprint = norm["imprint"]
+    if norm.get("imprint_match") == "weighted":
+        clauses = []
+        for field in ("print_front", "print_back"):
+            clauses.append({"terms": {f"{field}.keyword": norm["imprint_exact_matches"], "boost": boost * 2}})
+            clauses.append({"terms": {f"{field}.keyword": norm["imprint_matches"], "boost": boost}})
+        return clauses
+    if norm.get("imprint_match") == "ngram":
+        return [
+            {"match": {f"{field}_normalized": {
+                "query": imprint, "boost": boost, "minimum_should_match": IMPRINT_NGRAM_MIN_MATCH
+            }}}
+            for field in ("print_front", "print_back")
+        ]
+    return [
+        {"match": {field: {"query": imprint, "boost": boost, "fuzziness": "AUTO"}}}
+        for field in ("print_front", "print_back")
+    ]
+
+
+# 특징 조합의 구조별로 컴파일된 검색 쿼리 템플릿 (build_es_query 기반)
+query_templates = QueryTemplates(build_es_query, SOURCE_PROFILES)
@@ -0,0 +1,193 @@
+# backend/search/medicine_cache.py
+"""
+medicine_data 문서 read-through 캐시 (item_seq 단위)
+
+- L1: 프로세스 내 LRU, 항목 수가 아닌 직렬화 바이트 크기로 상한 관리
+- L2: Redis 공유 캐시, 압축 JSON(zlib)으로 저장
+- 존재하지 않는 item_seq도 짧은 TTL로 캐싱(negative caching)해 반복 조회를 막습니다.
+"""
+import json
+import logging
+import os
+import time
+import zlib
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+MEDICINE_CACHE_ENABLED = os.getenv("MEDICINE_CACHE_ENABLED", "true").lower() == "true"
+MEDICINE_CACHE_MAX_BYTES = int(os.getenv("MEDICINE_CACHE_MAX_BYTES", 64 * 1024 * 1024))
+MEDICINE_CACHE_TTL = int(os.getenv("MEDICINE_CACHE_TTL", 86400))  # 초 단위
+MEDICINE_CACHE_NEGATIVE_TTL = int(os.getenv("MEDICINE_CACHE_NEGATIVE_TTL", 300))  # 초 단위
+MEDICINE_CACHE_REDIS_ENABLED = os.getenv("MEDICINE_CACHE_REDIS_ENABLED", "false").lower() == "true"
+
+# Redis에 저장하는 "문서 없음" 표시
+_NEGATIVE_MARKER = b"-"
+
+DocLoader = Callable[[List[str]], Awaitable[Dict[str, Dict[str, Any]]]]
+
+
+def encode_doc(doc: Dict[str, Any]) -> bytes:
+    """문서를 압축된 compact JSON 바이트로 직렬화합니다."""
+    return zlib.compress(json.dumps(doc, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+
+
+def decode_doc(payload: bytes) -> Dict[str, Any]:
+    return json.loads(zlib.decompress(payload).decode("utf-8"))
+
+
+class MedicineDocCache:
+    def __init__(self, max_bytes: int, ttl: int, negative_ttl: int, redis_enabled: bool):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.redis_enabled = redis_enabled
+
+        # item_seq -> (만료 시각, 압축 문서 바이트 또는 None(문서 없음))
+        self._entries: "OrderedDict[str, Tuple[float, Optional[bytes]]]" = OrderedDict()
+        self._bytes = 0
+
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "loads": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    def _redis_key(self, item_seq: str) -> str:
+        return f"medicine_doc:{item_seq}"
+
+    def _entry_size(self, item_seq: str, payload: Optional[bytes]) -> int:
+        return len(item_seq) + (len(payload) if payload else 0) + 64  # 항목 관리 오버헤드 근사치
+
+    def _put_local(self, item_seq: str, payload: Optional[bytes], ttl: int) -> None:
+        old = self._entries.pop(item_seq, None)
+        if old is not None:
+            self._bytes -= self._entry_size(item_seq, old[1])
+        self._entries[item_seq] = (time.monotonic() + ttl, payload)
+        self._bytes += self._entry_size(item_seq, payload)
+        while self._bytes > self.max_bytes and self._entries:
+            evicted_seq, (_, evicted_payload) = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(evicted_seq, evicted_payload)
+            self.stats["evictions"] += 1
+
+    def _get_local(self, item_seq: str) -> Tuple[bool, Optional[bytes]]:
+        entry = self._entries.get(item_seq)
+        if entry is None:
+            return False, None
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            del self._entries[item_seq]
+            self._bytes -= self._entry_size(item_seq, payload)
+            return False, None
+        self._entries.move_to_end(item_seq)
+        return True, payload
+
+    async def get_many(self, item_seqs: List[str], loader: DocLoader) -> Dict[str, Dict[str, Any]]:
+        """
+        item_seq 목록의 문서를 L1 -> L2 -> loader(ES) 순서로 조회합니다.
+
+        Returns:
+            item_seq -> 문서 (존재하지 않는 item_seq는 포함되지 않음)
+        """
+        unique_seqs = list(dict.fromkeys(seq for seq in item_seqs if seq))
+        if not MEDICINE_CACHE_ENABLED:
+            return await loader(unique_seqs) if unique_seqs else {}
+
+        found: Dict[str, Dict[str, Any]] = {}
+        remaining: List[str] = []
+
+        # 1. 프로세스 내 캐시
+        for item_seq in unique_seqs:
+            cached, payload = self._get_local(item_seq)
+            if not cached:
+                remaining.append(item_seq)
+            elif payload is None:
+                self.stats["negative_hits"] += 1
+            else:
+                self.stats["l1_hits"] += 1
+                found[item_seq] = decode_doc(payload)
+
+        # 2. Redis 공유 캐시
+        redis = get_redis() if self.redis_enabled else None
+        if remaining and redis is not None:
+            try:
+                payloads = await redis.mget([self._redis_key(seq) for seq in remaining])
+                still_remaining = []
+                for item_seq, payload in zip(remaining, payloads):
+                    if payload is None:
+                        still_remaining.append(item_seq)
+                    elif payload == _NEGATIVE_MARKER:
+                        self.stats["negative_hits"] += 1
+                        self._put_local(item_seq, None, self.negative_ttl)
+                    else:
+                        self.stats["l2_hits"] += 1
+                        self._put_local(item_seq, payload, self.ttl)
+                        found[item_seq] = decode_doc(payload)
+                remaining = still_remaining
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"의약품 캐시 Redis 조회 실패: {e}")
+
+        if not remaining:
+            return found
+
+        # 3. 원본(ES) 조회 후 캐시 채우기 (없는 item_seq는 negative 캐싱)
+        self.stats["misses"] += len(remaining)
+        self.stats["loads"] += 1
+        loaded = await loader(remaining)
+
+        to_store: Dict[str, bytes] = {}
+        for item_seq in remaining:
+            doc = loaded.get(item_seq)
+            if doc is None:
+                self._put_local(item_seq, None, self.negative_ttl)
+                to_store[item_seq] = _NEGATIVE_MARKER
+            else:
+                payload = encode_doc(doc)
+                self._put_local(item_seq, payload, self.ttl)
+                to_store[item_seq] = payload
+                found[item_seq] = doc
+
+        if redis is not None:
+            try:
+                pipe = redis.pipeline(transaction=False)
+                for item_seq, payload in to_store.items():
+                    ttl = self.negative_ttl if payload == _NEGATIVE_MARKER else self.ttl
+                    pipe.set(self._redis_key(item_seq), payload, ex=ttl)
+                await pipe.execute()
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"의약품 캐시 Redis 저장 실패: {e}")
+
+        return found
+
+    def get_stats(self) -> Dict[str, Any]:
+        lookups = self.stats["l1_hits"] + self.stats["l2_hits"] + self.stats["negative_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "redis_enabled": self.redis_enabled,
+        }
+
+
+# 싱글톤 인스턴스
+medicine_cache = MedicineDocCache(
+    max_bytes=MEDICINE_CACHE_MAX_BYTES,
+    ttl=MEDICINE_CACHE_TTL,
+    negative_ttl=MEDICINE_CACHE_NEGATIVE_TTL,
+    redis_enabled=MEDICINE_CACHE_REDIS_ENABLED,
+)
@@ -0,0 +1,261 @@
+# backend/search/medicine_names.py
+"""
+의약품 이름 로컬 검색 (자모 n-gram / 초성)
+
+복용 일정 등록 대화에서 사용자가 말한 약 이름(음성 인식 오타, 초성 입력)으로 의약품 후보를 찾습니다.
+medicine_data의 이름(item_seq, item_name, entp_name)을 메모리에 색인하고, 확신할 수 있는 후보가 있으면
+원격 MEDEASY /medicine/search 호출 없이 바로 반환합니다. (확신 기준: 입력과 핵심 이름이 같거나 점수가
+MEDICINE_NAME_CONFIDENT_SCORE 이상, 초성 입력은 후보가 있으면)
+
+- 이름 정규화: 괄호 안 성분명과 첫 숫자(함량) 이후를 제거한 핵심 이름 ("타이레놀정500밀리그람(…)" -> "타이레놀정")
+- 자모 3-gram: 핵심 이름을 자모로 분해하고 된소리/ㅔ·ㅐ 등 음성 인식에서 혼동되는 자모를 합쳐 색인
+  ("씬지록신" -> "신지로신"과 같은 자모열), 드문 n-gram으로 후보를 고른 뒤 Dice 계수로 순위를 매김
+- 초성: "ㅌㅇㄹㄴ"처럼 초성만 입력하면 정렬된 초성 키에서 접두사로 찾음
+"""
+import asyncio
+import logging
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.utils.hangul import chosung, is_chosung_query, loose_jamo
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+MEDICINE_NAME_INDEX_ENABLED = os.getenv("MEDICINE_NAME_INDEX_ENABLED", "false").lower() == "true"
+MEDICINE_NAME_MIN_SCORE = float(os.getenv("MEDICINE_NAME_MIN_SCORE", 0.45))
+MEDICINE_NAME_LIMIT = int(os.getenv("MEDICINE_NAME_LIMIT", 10))
+MEDICINE_NAME_CONFIDENT_SCORE = float(os.getenv("MEDICINE_NAME_CONFIDENT_SCORE", 0.8))
+MEDICINE_NAME_INDEX_TTL = float(os.getenv("MEDICINE_NAME_INDEX_TTL", 86400))  # 초 단위
+# 색인 생성 실패 후 다시 시도하기까지 기다리는 시간 (대화 턴마다 전체 스캔을 반복하지 않도록)
+MEDICINE_NAME_RETRY_INTERVAL = float(os.getenv("MEDICINE_NAME_RETRY_INTERVAL", 300))  # 초 단위
+
+# 후보를 고를 때 건너뛰는 흔한 n-gram의 문서 비율 (예: "정"의 자모열)
+_MAX_GRAM_DF_RATIO = 0.05
+# Dice 계수를 다시 계산할 최대 후보 수
+_MAX_CANDIDATES = 300
+
+_BRACKETS_RE = re.compile(r"\(.*?\)|\[.*?\]|（.*?）")
+_NON_NAME_RE = re.compile(r"[^0-9a-zA-Z가-힣ㄱ-ㅎ]")
+
+
+def search_name(name: str) -> str:
+    """괄호 안 내용과 첫 숫자(함량) 이후를 제거한 이름 (원격 검색어로 사용)"""
+    name = _BRACKETS_RE.sub("", name or "")
+    digit = re.search(r"\d", name)
+    if digit and digit.start() > 0:
+        name = name[:digit.start()]
+    return " ".join(name.split())
+
+
+def core_name(name: str) -> str:
+    """search_name에서 공백/기호를 빼고 소문자로 바꾼 비교용 핵심 이름"""
+    return _NON_NAME_RE.sub("", search_name(name)).lower()
+
+
+def _trigrams(jamo: str) -> set:
+    padded = f" {jamo} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class MedicineNameIndex:
+    def __init__(self, min_score: float, confident_score: float = MEDICINE_NAME_CONFIDENT_SCORE,
+                 retry_interval: float = MEDICINE_NAME_RETRY_INTERVAL):
+        self.min_score = min_score
+        self.confident_score = confident_score
+        self.retry_interval = retry_interval
+        self._display: List[str] = []
+        # 핵심 이름별 의약품 목록 ({"item_seq", "item_name", "entp_name"}, 함량만 다른 제품 포함)
+        self._products: List[List[Dict[str, str]]] = []
+        self._jamo: List[str] = []
+        self._names: List[str] = []
+        self._postings: Dict[str, array] = {}
+        self._chosung_keys: List[str] = []
+        self._chosung_docs: List[int] = []
+        self._built_at = 0.0
+        self._failed_at: Optional[float] = None
+        self._refreshing: Optional[asyncio.Task] = None
+        self.stats = {"queries": 0, "hits": 0, "misses": 0, "builds": 0, "build_errors": 0, "last_build_ms": 0.0}
+
+    @property
+    def ready(self) -> bool:
+        return bool(self._display)
+
+    def build(self, records: List[Dict[str, Any]]) -> int:
+        """
+        medicine_data 레코드({"item_seq", "item_name", "entp_name"}) 목록으로 색인을 만들고 핵심 이름 수를 반환합니다.
+        함량만 다른 제품은 하나의 핵심 이름 아래에 모읍니다.
+        """
+        display, jamo_names, names, products = [], [], [], []
+        seen: Dict[str, int] = {}
+        postings: Dict[str, List[int]] = {}
+        chosung_entries: List[Tuple[str, int]] = []
+        for record in records:
+            item_name = record.get("item_name") or ""
+            name = core_name(item_name)
+            if not name:
+                continue
+            product = {
+                "item_seq": str(record.get("item_seq") or ""),
+                "item_name": item_name,
+                "entp_name": record.get("entp_name") or "",
+            }
+            if name in seen:
+                products[seen[name]].append(product)
+                continue
+            doc_idx = len(display)
+            seen[name] = doc_idx
+            products.append([product])
+            display.append(search_name(item_name))
+            jamo = loose_jamo(name)
+            jamo_names.append(jamo)
+            names.append(name)
+            for gram in _trigrams(jamo):
+                postings.setdefault(gram, []).append(doc_idx)
+            chosung_entries.append((chosung(name), doc_idx))
+
+        chosung_entries.sort()
+        # 검색 중인 요청이 섞인 상태를 보지 않도록 한 번에 교체
+        (self._display, self._products, self._jamo, self._names, self._postings,
+         self._chosung_keys, self._chosung_docs) = (
+            display, products, jamo_names, names, {gram: array("I", ids) for gram, ids in postings.items()},
+            [key for key, _ in chosung_entries], [doc_idx for _, doc_idx in chosung_entries],
+        )
+        self._built_at = time.monotonic()
+        return len(display)
+
+    def _search_chosung(self, query: str, limit: int) -> List[Tuple[float, int]]:
+        key = query.replace(" ", "")
+        lo = bisect_left(self._chosung_keys, key)
+        hi = bisect_left(self._chosung_keys, key + "\U0010ffff", lo)
+        # 초성이 완전히 같은 이름을 먼저, 나머지는 짧은 순
+        ranked = sorted(range(lo, hi), key=lambda i: (len(self._chosung_keys[i]), self._chosung_keys[i]))[:limit]
+        return [(round(len(key) / len(self._chosung_keys[i]), 4), self._chosung_docs[i]) for i in ranked]
+
+    def _search_jamo(self, query: str, limit: int) -> List[Tuple[float, int]]:
+        name = core_name(query) or _NON_NAME_RE.sub("", query).lower()
+        if not name:
+            return []
+        jamo = loose_jamo(name)
+        grams = _trigrams(jamo)
+
+        # 흔한 n-gram은 후보 선정에서 제외 (모두 흔하면 가장 드문 것 하나만 사용)
+        max_df = max(1, int(len(self._display) * _MAX_GRAM_DF_RATIO))
+        known = sorted((len(self._postings[gram]), gram) for gram in grams if gram in self._postings)
+        selective = [gram for df, gram in known if df <= max_df] or [gram for _, gram in known[:1]]
+        counts: Counter = Counter()
+        for gram in selective:
+            counts.update(self._postings[gram])
+
+        scored = []
+        for doc_idx, _ in counts.most_common(_MAX_CANDIDATES):
+            doc_jamo = self._jamo[doc_idx]
+            doc_grams = _trigrams(doc_jamo)
+            score = 2 * len(grams & doc_grams) / (len(grams) + len(doc_grams))
+            if self._names[doc_idx] == name:
+                score += 0.5
+            elif doc_jamo.startswith(jamo):
+                score += 0.1
+            scored.append((round(min(score, 1.0), 4), doc_idx))
+        # 입력과 핵심 이름이 같은 후보는 보정 후보보다 항상 먼저
+        scored.sort(key=lambda item: (self._names[item[1]] != name, -item[0], len(self._names[item[1]]), item[1]))
+        return scored[:limit]
+
+    def _search(self, query: str, limit: int) -> Tuple[List[Tuple[float, int]], bool]:
+        """(min_score 이상인 (점수, 이름 번호) 목록, 첫 후보를 확신할 수 있는지)"""
+        self.stats["queries"] += 1
+        query = (query or "").strip()
+        if not self.ready or not query:
+            return [], False
+        if is_chosung_query(query):
+            scored = self._search_chosung(query, limit)
+            confident = bool(scored)
+        else:
+            scored = [(score, doc_idx) for score, doc_idx in self._search_jamo(query, limit)
+                      if score >= self.min_score]
+            confident = bool(scored) and (
+                self._names[scored[0][1]] == core_name(query) or scored[0][0] >= self.confident_score
+            )
+        self.stats["hits" if scored else "misses"] += 1
+        return scored, confident
+
+    def search(self, query: str, limit: int = MEDICINE_NAME_LIMIT) -> List[Dict[str, Any]]:
+        """
+        이름(또는 초성)으로 의약품 이름 후보({"name", "score"})를 점수 순으로 반환합니다.
+        min_score 미만의 후보는 제외합니다.
+        """
+        scored, _ = self._search(query, limit)
+        return [{"name": self._display[doc_idx], "score": score} for score, doc_idx in scored]
+
+    def candidates(self, query: str, limit: int = MEDICINE_NAME_LIMIT) -> Tuple[List[Dict[str, str]], bool]:
+        """
+        이름 후보 순서대로 펼친 의약품 후보({"item_seq", "item_name", "entp_name"}) 최대 limit개와
+        확신 여부를 반환합니다. 확신할 수 없으면 호출 측이 원격 검색을 먼저 시도합니다.
+        """
+        scored, confident = self._search(query, limit)
+        products = [product for _, doc_idx in scored for product in self._products[doc_idx]]
+        return products[:limit], confident
+
+    async def refresh(self, es, index_name: str) -> bool:
+        """medicine_data를 스캔해 색인을 다시 만듭니다. 실패해도 예외를 던지지 않습니다."""
+        from elasticsearch.helpers import async_scan
+
+        try:
+            started = time.perf_counter()
+            records = []
+            async for hit in async_scan(
+                es,
+                index=index_name,
+                query={"query": {"match_all": {}}},
+                _source_includes=["item_seq", "item_name", "entp_name"],
+                size=1000,
+            ):
+                records.append(hit.get("_source", {}))
+            doc_count = await asyncio.to_thread(self.build, records)
+            self._failed_at = None
+            self.stats["builds"] += 1
+            self.stats["last_build_ms"] = round((time.perf_counter() - started) * 1000, 1)
+            logger.info(f"의약품 이름 색인 생성: {doc_count}건 ({self.stats['last_build_ms']}ms)")
+            return True
+        except Exception as e:
+            self.stats["build_errors"] += 1
+            self._failed_at = time.monotonic()
+            logger.error(f"의약품 이름 색인 생성 실패: {e}", exc_info=True)
+            return False
+
+    def ensure_fresh(self, es, index_name: str, ttl: float = MEDICINE_NAME_INDEX_TTL) -> None:
+        """
+        색인이 ttl보다 오래되었으면 백그라운드에서 다시 만듭니다. (그동안은 기존 색인 사용)
+        직전 생성이 실패했으면 retry_interval이 지날 때까지 다시 시도하지 않습니다.
+        """
+        if self._refreshing is not None and not self._refreshing.done():
+            return
+        if self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_interval:
+            return
+        if self.ready and time.monotonic() - self._built_at < ttl:
+            return
+        self._refreshing = asyncio.create_task(self.refresh(es, index_name))
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "names": len(self._display),
+            "products": sum(map(len, self._products)),
+            "retry_in_seconds": (
+                round(max(0.0, self.retry_interval - (time.monotonic() - self._failed_at)), 1)
+                if self._failed_at is not None else None
+            ),
+            "grams": len(self._postings),
+            "age_seconds": round(time.monotonic() - self._built_at, 1) if self.ready else None,
+        }
+
+
+# 싱글톤 인스턴스
+medicine_name_index = MedicineNameIndex(min_score=MEDICINE_NAME_MIN_SCORE)
@@ -0,0 +1,103 @@
+# backend/search/photo_metrics.py
+"""
+알약 사진 식별 재시도 지표
+
+사진 업로드(UPLOAD_PILLS_PHOTO) 한 번이 Gemini 분석 + ES 검색 한 번이며,
+사용자가 결과를 보고 "찾는 약이 없다"(NOT_FOUND)고 하면 다시 촬영합니다.
+사용자별로 진행 중인 식별 시도 횟수를 세고, 결과가 확정되면(상세 조회/등록 = 식별 성공,
+다른 대화로 전환 = 포기) 검색 방식(lexical/hybrid)별로 집계합니다.
+
+    재시도 수/식별 성공 = Σ(성공까지의 업로드 수 - 1) / 성공 수
+"""
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 진행 중인 시도를 보관하는 최대 사용자 수와 유효 시간
+_MAX_OPEN_SESSIONS = 10000
+_SESSION_TTL = 3600  # 초 단위
+# 성공까지의 업로드 수 분포 (이 값 이상은 마지막 구간에 합산)
+_HISTOGRAM_MAX = 5
+
+
+class PhotoIdentificationMetrics:
+    def __init__(self):
+        # user_id -> (마지막 시도 시각, 검색 방식, 업로드 수)
+        self._open: "OrderedDict[Any, Tuple[float, str, int]]" = OrderedDict()
+        self._modes: Dict[str, Dict[str, Any]] = {}
+
+    def _mode_stats(self, mode: str) -> Dict[str, Any]:
+        stats = self._modes.get(mode)
+        if stats is None:
+            stats = {
+                "uploads": 0,
+                "empty_results": 0,
+                "not_found": 0,
+                "identified": 0,
+                "abandoned": 0,
+                "retries_before_success": 0,
+                "uploads_to_success": {str(i): 0 for i in range(1, _HISTOGRAM_MAX + 1)},
+            }
+            self._modes[mode] = stats
+        return stats
+
+    def record_upload(self, user_id: Any, mode: str, result_count: int) -> None:
+        """사진 업로드 1회 (분석 + 검색)"""
+        now = time.monotonic()
+        entry = self._open.pop(user_id, None)
+        if entry is not None and now - entry[0] < _SESSION_TTL and entry[1] == mode:
+            uploads = entry[2] + 1
+        else:
+            uploads = 1
+        self._open[user_id] = (now, mode, uploads)
+        while len(self._open) > _MAX_OPEN_SESSIONS:
+            self._open.popitem(last=False)
+
+        stats = self._mode_stats(mode)
+        stats["uploads"] += 1
+        if result_count == 0:
+            stats["empty_results"] += 1
+
+    def record_not_found(self, user_id: Any) -> None:
+        """사용자가 검색 결과에 찾는 약이 없다고 응답 (재촬영 예정)"""
+        entry = self._open.get(user_id)
+        if entry is not None:
+            self._mode_stats(entry[1])["not_found"] += 1
+
+    def record_identified(self, user_id: Any) -> None:
+        """검색 결과에서 약을 골라 상세 조회/등록으로 진행 (식별 성공)"""
+        entry = self._open.pop(user_id, None)
+        if entry is None:
+            return
+        _, mode, uploads = entry
+        stats = self._mode_stats(mode)
+        stats["identified"] += 1
+        stats["retries_before_success"] += uploads - 1
+        stats["uploads_to_success"][str(min(uploads, _HISTOGRAM_MAX))] += 1
+        logger.info(f"알약 사진 식별 성공: 업로드 {uploads}회 ({mode})")
+
+    def record_abandoned(self, user_id: Any) -> None:
+        """검색 결과 확인 중 다른 대화로 전환"""
+        entry = self._open.pop(user_id, None)
+        if entry is not None:
+            self._mode_stats(entry[1])["abandoned"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        modes = {}
+        for mode, stats in self._modes.items():
+            identified = stats["identified"]
+            modes[mode] = {
+                **stats,
+                "retries_per_success": round(stats["retries_before_success"] / identified, 3) if identified else None,
+                "uploads_per_success": round(
+                    (stats["retries_before_success"] + identified) / identified, 3
+                ) if identified else None,
+            }
+        return {"open_sessions": len(self._open), "modes": modes}
+
+
+# 싱글톤 인스턴스
+photo_metrics = PhotoIdentificationMetrics()
@@ -0,0 +1,198 @@
+# backend/search/profiling.py
+"""
+알약 검색 ES 쿼리 프로파일링 (선택적)
+
+build_es_query가 만드는 수십 개의 should 절 중 어느 절이 느린지 확인하기 위해
+일부 검색에만 "profile": true를 붙여 ES의 절별 실행 시간을 수집합니다.
+
+- 표본: ES_PROFILE_SAMPLE_RATE 비율의 검색에 profile을 붙여 그대로 실행
+- 느린 쿼리: profile 없이 ES_PROFILE_SLOW_MS(took) 이상 걸린 검색은 백그라운드에서 같은 본문을
+  profile과 함께 한 번 더 실행 (사용자 응답은 기다리지 않음)
+- 결과는 정규화된 특징과 함께 크기가 제한된 링 버퍼에 보관하며 /v2/debug/es-profile로 조회합니다.
+"""
+import asyncio
+import logging
+import os
+import random
+import time
+from collections import deque
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+ES_PROFILE_ENABLED = os.getenv("ES_PROFILE_ENABLED", "false").lower() == "true"
+ES_PROFILE_SAMPLE_RATE = float(os.getenv("ES_PROFILE_SAMPLE_RATE", 0.01))
+ES_PROFILE_SLOW_MS = float(os.getenv("ES_PROFILE_SLOW_MS", 200))  # 0이면 느린 쿼리 재실행 안 함
+ES_PROFILE_BUFFER_SIZE = int(os.getenv("ES_PROFILE_BUFFER_SIZE", 100))
+ES_PROFILE_MAX_CLAUSES = int(os.getenv("ES_PROFILE_MAX_CLAUSES", 20))  # 항목당 보관할 느린 절 수
+# 동시에 진행할 수 있는 느린 쿼리 재실행 수 (ES가 느릴 때 부하를 더하지 않도록)
+_MAX_PENDING_REPROFILES = 4
+
+# 링 버퍼에 보관할 특징 (변형 목록은 개수만 기록)
+_FEATURE_KEYS = ("imprint", "is_mark", "imprint_match", "imprint_canonical", "drug_shape", "shape_group",
+                 "primary_color", "primary_color_group", "secondary_color", "secondary_color_group")
+
+
+def attach_profile(body: Any) -> Any:
+    """검색 요청 본문(JSON 문자열 또는 dict)에 "profile": true를 추가합니다."""
+    if isinstance(body, str):
+        # 템플릿으로 렌더링한 본문은 항상 객체이므로 여는 중괄호 뒤에 끼워 넣음
+        return '{"profile":true,' + body[1:] if body != "{}" else '{"profile":true}'
+    return {**body, "profile": True}
+
+
+def _flatten_query_profile(node: Dict[str, Any], depth: int, out: List[Dict[str, Any]]) -> None:
+    out.append({
+        "type": node.get("type"),
+        "description": node.get("description"),
+        "depth": depth,
+        "time_ms": round(node.get("time_in_nanos", 0) / 1e6, 3),
+    })
+    for child in node.get("children", []):
+        _flatten_query_profile(child, depth + 1, out)
+
+
+def summarize_profile(profile: Dict[str, Any], max_clauses: int) -> Dict[str, Any]:
+    """
+    ES profile 응답을 절별 실행 시간 요약으로 바꿉니다.
+    같은 절(설명 문자열)은 샤드별 시간을 합산하고, 느린 순으로 max_clauses개만 남깁니다.
+    """
+    clauses: Dict[tuple, Dict[str, Any]] = {}
+    rewrite_ms = collector_ms = 0.0
+    shards = profile.get("shards", [])
+    for shard in shards:
+        for search in shard.get("searches", []):
+            rewrite_ms += search.get("rewrite_time", 0) / 1e6
+            for collector in search.get("collector", []):
+                collector_ms += collector.get("time_in_nanos", 0) / 1e6
+            flat: List[Dict[str, Any]] = []
+            for node in search.get("query", []):
+                _flatten_query_profile(node, 0, flat)
+            for item in flat:
+                key = (item["type"], item["description"], item["depth"])
+                merged = clauses.get(key)
+                if merged is None:
+                    clauses[key] = dict(item)
+                else:
+                    merged["time_ms"] = round(merged["time_ms"] + item["time_ms"], 3)
+
+    # 최상위 bool 절은 전체 시간이므로 하위 절만 느린 순으로 정렬
+    ranked = sorted(clauses.values(), key=lambda item: (item["depth"] == 0, -item["time_ms"]))
+    return {
+        "shards": len(shards),
+        "query_ms": round(sum(item["time_ms"] for item in clauses.values() if item["depth"] == 0), 3),
+        "rewrite_ms": round(rewrite_ms, 3),
+        "collector_ms": round(collector_ms, 3),
+        "clauses": ranked[:max_clauses],
+    }
+
+
+class QueryProfiler:
+    def __init__(self, enabled: bool, sample_rate: float, slow_ms: float, buffer_size: int, max_clauses: int):
+        self.enabled = enabled
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.max_clauses = max_clauses
+
+        self._entries: deque = deque(maxlen=buffer_size)
+        self._pending: set = set()
+        self.stats = {"sampled": 0, "slow": 0, "slow_skipped": 0, "recorded": 0, "errors": 0}
+
+    def should_sample(self) -> bool:
+        """이번 검색에 profile을 붙일지 결정합니다."""
+        return self.enabled and self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def observe(self, client, index: str, kind: str, norm: Dict[str, Any], body: Any,
+                response: Dict[str, Any], sampled: bool) -> None:
+        """
+        ES 검색 응답(_msearch 항목 포함)을 확인합니다.
+        표본 검색이면 profile 결과를 기록하고, 표본이 아니면서 느린 검색이면 백그라운드 재실행을 예약합니다.
+
+        Args:
+            client: 느린 쿼리 재실행에 사용할 ES 클라이언트
+            index: 검색한 인덱스
+            kind: 쿼리 종류 (lexical, knn)
+            norm: preprocess_features 결과
+            body: profile을 붙이지 않은 원래 요청 본문
+            response: 검색 응답
+            sampled: 요청에 profile을 붙였는지 여부
+        """
+        if not self.enabled:
+            return
+        took = response.get("took", 0)
+        if sampled:
+            self.stats["sampled"] += 1
+            self._record("sampled", kind, norm, took, response.get("profile"))
+        elif self.slow_ms and took >= self.slow_ms:
+            self.stats["slow"] += 1
+            if len(self._pending) >= _MAX_PENDING_REPROFILES:
+                self.stats["slow_skipped"] += 1
+                return
+            task = asyncio.create_task(self._reprofile(client, index, kind, norm, body, took))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+
+    async def _reprofile(self, client, index: str, kind: str, norm: Dict[str, Any], body: Any,
+                         original_took: int) -> None:
+        try:
+            response = await client.search(index=index, body=attach_profile(body), request_cache=False)
+            self._record("slow", kind, norm, original_took, response.get("profile"),
+                         profiled_took=response.get("took"))
+        except Exception as e:
+            self.stats["errors"] += 1
+            logger.warning(f"느린 쿼리 프로파일링 실패: {e}")
+
+    def _record(self, reason: str, kind: str, norm: Dict[str, Any], took: int,
+                profile: Optional[Dict[str, Any]], profiled_took: Optional[int] = None) -> None:
+        if not profile:
+            self.stats["errors"] += 1
+            return
+        features = {key: norm[key] for key in _FEATURE_KEYS if norm.get(key) not in (None, "", False)}
+        features["imprint_variations"] = len(norm.get("imprint_variations", []))
+        entry = {
+            "timestamp": time.time(),
+            "reason": reason,
+            "kind": kind,
+            "took_ms": took,
+            "features": features,
+            **summarize_profile(profile, self.max_clauses),
+        }
+        if profiled_took is not None:
+            entry["profiled_took_ms"] = profiled_took
+        self._entries.append(entry)
+        self.stats["recorded"] += 1
+        if reason == "slow":
+            top = entry["clauses"][0] if entry["clauses"] else {}
+            logger.info(f"느린 알약 검색 프로파일: took {took}ms, 가장 느린 절 {top.get('description')} "
+                        f"({top.get('time_ms')}ms)")
+
+    def get_entries(self, limit: int) -> List[Dict[str, Any]]:
+        """최근 항목부터 최대 limit개를 반환합니다."""
+        return list(reversed(self._entries))[:limit]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "enabled": self.enabled,
+            "sample_rate": self.sample_rate,
+            "slow_ms": self.slow_ms,
+            "entries": len(self._entries),
+            "capacity": self._entries.maxlen,
+            "pending": len(self._pending),
+        }
+
+
+# 싱글톤 인스턴스
+query_profiler = QueryProfiler(
+    enabled=ES_PROFILE_ENABLED,
+    sample_rate=ES_PROFILE_SAMPLE_RATE,
+    slow_ms=ES_PROFILE_SLOW_MS,
+    buffer_size=ES_PROFILE_BUFFER_SIZE,
+    max_clauses=ES_PROFILE_MAX_CLAUSES,
+)
@@ -0,0 +1,126 @@
+# backend/search/templates.py
+"""
+알약 검색 쿼리 템플릿
+
+build_es_query가 만드는 쿼리는 특징 조합의 "모양"(모양/색상 필터 유무, 인쇄문자 유무, 마크 여부,
+변형 개수, 정규형 유무, 부분 일치 방식, _source 프로필)에 따라 구조가 정해지고,
+요청마다 달라지는 것은 값(인쇄문자, 변형 문자열, 색상 그룹, top_k 등)뿐입니다.
+
+- 모양별로 build_es_query를 자리표시자 값으로 한 번만 실행해 JSON 조각으로 컴파일하고 LRU에 보관합니다.
+- 요청 시에는 파라미터 값만 JSON 직렬화해 조각 사이에 끼워 넣습니다 (중첩 dict 재구성/직렬화 없음).
+- 같은 요청은 항상 같은 바이트열이 되므로 ES shard request cache 키로 재사용됩니다.
+"""
+import json
+import re
+from functools import lru_cache
+from json.encoder import encode_basestring
+from typing import Any, Callable, Dict, List, Tuple
+
+_PLACEHOLDER_RE = re.compile(r'"\{\{([\w.]+)\}\}"')
+
+
+def _placeholder(name: str) -> str:
+    return "{{" + name + "}}"
+
+
+def _to_json(value: Any) -> str:
+    """파라미터 값 직렬화 (문자열/정수/문자열 리스트는 json.dumps 호출 없이 C 인코더로 처리)"""
+    if isinstance(value, str):
+        return encode_basestring(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    if isinstance(value, list) and all(isinstance(item, str) for item in value):
+        return "[" + ",".join(map(encode_basestring, value)) + "]"
+    return json.dumps(value, ensure_ascii=False)
+
+
+def query_shape(norm: Dict[str, Any], profile: str) -> Tuple:
+    """쿼리 구조를 결정하는 특징만 추린 템플릿 키를 반환합니다."""
+    return (
+        "shape_group" in norm,
+        "primary_color_group" in norm,
+        "secondary_color_group" in norm,
+        bool(norm.get("imprint")),
+        bool(norm.get("is_mark", False)),
+        len(norm.get("imprint_variations", [])),
+        bool(norm.get("imprint_canonical")),
+        norm.get("imprint_match"),
+        profile,
+    )
+
+
+def query_params(norm: Dict[str, Any], top_k: int) -> Dict[str, Any]:
+    """템플릿 자리표시자에 채울 파라미터 값을 반환합니다."""
+    params: Dict[str, Any] = {"top_k": top_k}
+    for field in ("shape_group", "primary_color_group", "secondary_color_group", "imprint", "imprint_canonical",
+                  "imprint_exact_matches", "imprint_matches"):
+        if field in norm:
+            params[field] = norm[field]
+    for i, variation in enumerate(norm.get("imprint_variations", [])):
+        params[f"imprint_variations.{i}"] = variation
+    return params
+
+
+class CompiledQuery:
+    """자리표시자 위치로 나뉜 JSON 조각과 파라미터 이름 목록"""
+
+    __slots__ = ("head", "slots")
+
+    def __init__(self, skeleton: str):
+        parts = _PLACEHOLDER_RE.split(skeleton)
+        # split 결과는 [조각, 이름, 조각, 이름, ..., 조각]
+        self.head: str = parts[0]
+        self.slots: List[Tuple[str, str]] = list(zip(parts[1::2], parts[2::2]))
+
+    def render(self, params: Dict[str, Any]) -> str:
+        encoded = {name: _to_json(value) for name, value in params.items()}
+        out = [self.head]
+        for name, fragment in self.slots:
+            out.append(encoded[name])
+            out.append(fragment)
+        return "".join(out)
+
+
+def compile_query(builder: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+                  shape: Tuple, source_filter: Dict[str, Any]) -> CompiledQuery:
+    """
+    쿼리 모양에 맞는 자리표시자 특징으로 builder(build_es_query)를 실행해 템플릿으로 컴파일합니다.
+    """
+    has_shape, has_primary, has_secondary, has_imprint, is_mark, n_variations, has_canonical, imprint_match, _ = shape
+    norm: Dict[str, Any] = {"is_mark": is_mark, "imprint_match": imprint_match}
+    if has_shape:
+        norm["shape_group"] = _placeholder("shape_group")
+    if has_primary:
+        norm["primary_color_group"] = _placeholder("primary_color_group")
+    if has_secondary:
+        norm["secondary_color_group"] = _placeholder("secondary_color_group")
+    if has_imprint:
+        norm["imprint"] = _placeholder("imprint")
+        norm["imprint_variations"] = [_placeholder(f"imprint_variations.{i}") for i in range(n_variations)]
+        if has_canonical:
+            norm["imprint_canonical"] = _placeholder("imprint_canonical")
+        if imprint_match == "weighted":
+            norm["imprint_exact_matches"] = _placeholder("imprint_exact_matches")
+            norm["imprint_matches"] = _placeholder("imprint_matches")
+
+    body = builder(norm, _placeholder("top_k"))
+    body["_source"] = source_filter
+    return CompiledQuery(json.dumps(body, ensure_ascii=False, separators=(",", ":")))
+
+
+class QueryTemplates:
+    def __init__(self, builder: Callable[[Dict[str, Any], Any], Dict[str, Any]],
+                 source_profiles: Dict[str, Dict[str, Any]], maxsize: int = 256):
+        self._builder = builder
+        self._source_profiles = source_profiles
+        self._compiled = lru_cache(maxsize=maxsize)(self._compile)
+
+    def _compile(self, shape: Tuple) -> CompiledQuery:
+        return compile_query(self._builder, shape, self._source_profiles[shape[-1]])
+
+    def render(self, norm: Dict[str, Any], top_k: int, profile: str) -> str:
+        """전처리된 특징으로 ES 검색 요청 본문(JSON 문자열)을 만듭니다."""
+        return self._compiled(query_shape(norm, profile)).render(query_params(norm, top_k))
+
+    def cache_info(self):
+        return self._compiled.cache_info()
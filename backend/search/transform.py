@@ -1,4 +1,115 @@
-from typing import List
+from functools import lru_cache
+from typing import Dict, List, Tuple, Union
+
+# OCR 혼동 문자 그룹 -> 대표 문자 (색인/쿼리 양쪽에서 같은 정규형을 만들기 위함)
+# 실제 인쇄문자에서 서로 바뀌어 인식되는 일이 잦은 쌍만 둡니다. (A/4, T/7, D/0처럼 드문 쌍까지 묶으면
+# 서로 다른 제품의 정규형이 같아져 정규형 일치 절이 엉뚱한 문서를 끌어올림, 드문 쌍은 변형 목록(SIMILAR_CHARS)이 처리)
+CONFUSABLE_GROUPS = {
+    '1': '1Il',
+    '0': '0O',
+    '5': '5S',
+    '8': '8B',
+}
+
+CONFUSABLE_CANONICAL = {
+    char: canonical
+    for canonical, chars in CONFUSABLE_GROUPS.items()
+    for char in chars
+}
+
+# 정규형에서 제거하는 문자 (분할선 '|' 및 공백)
+CANONICAL_STRIP_CHARS = {'|', ' ', '\t', '\n', '\r'}
+
+
+def canonicalize_imprint(text: str) -> str:
+    """
+    인쇄문자를 OCR 혼동 문자 기준 정규형으로 변환합니다.
+    - 혼동 문자 그룹(1/I/l, 0/O, 5/S, 8/B)은 대표 문자로 통일
+    - 그 외 영문자는 대문자로 통일(소문자 o/s/b/i도 대문자를 거쳐 그룹에 포함), 분할선('|')과 공백은 제거
+    예: 'TYL|500', 'TYLSOO', 'TYL 5OO' -> 'TYL500'
+    """
+    if not text:
+        return ""
+    chars = []
+    for char in text:
+        if char in CANONICAL_STRIP_CHARS:
+            continue
+        if char not in CONFUSABLE_CANONICAL:
+            char = char.upper()
+        chars.append(CONFUSABLE_CANONICAL.get(char, char))
+    return "".join(chars)
+
+
+def canonicalize_imprint_values(value: Union[str, List[str], None]) -> Union[str, List[str], None]:
+    """문자열 또는 문자열 리스트 필드 값을 정규형으로 변환합니다. (색인용)"""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [canonicalize_imprint(v) for v in value if isinstance(v, str) and v]
+    return canonicalize_imprint(str(value))
+
+
+def compact_imprint_values(value: Union[str, List[str], None]) -> Union[str, List[str], None]:
+    """
+    분할선('|')과 공백을 제거한 인쇄문자 값을 반환합니다. (n-gram 필드 색인용)
+    'TYL|500'이 'TYL', '500'으로 끊기지 않고 'TYL500' 하나의 n-gram 토큰열이 되도록 합니다.
+    """
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return ["".join(c for c in v if c not in CANONICAL_STRIP_CHARS) for v in value if isinstance(v, str) and v]
+    return "".join(c for c in str(value) if c not in CANONICAL_STRIP_CHARS)
+
+# 단일 문자 혼동 확률표 (원본 문자 -> {대체 문자: 혼동 확률})
+SIMILAR_CHARS: Dict[str, Dict[str, float]] = {
+    '1': {'I': 0.40, 'l': 0.30, '|': 0.10},
+    'I': {'1': 0.40, 'l': 0.35},
+    'l': {'1': 0.35, 'I': 0.35},
+    '0': {'O': 0.45, 'D': 0.15},
+    'O': {'0': 0.45, 'D': 0.15},
+    'o': {'0': 0.30},
+    '8': {'B': 0.30},
+    'B': {'8': 0.30},
+    '5': {'S': 0.30},
+    'S': {'5': 0.30},
+    '2': {'Z': 0.25},
+    'Z': {'2': 0.25, 'N': 0.05},
+    '6': {'G': 0.20},
+    'G': {'6': 0.20},
+    '3': {'E': 0.10},
+    'E': {'3': 0.10},
+    '4': {'A': 0.10},
+    'A': {'4': 0.10},
+    '7': {'T': 0.15, 'Y': 0.05},
+    'T': {'7': 0.15},
+    '9': {'g': 0.10, 'q': 0.10},
+    'L': {'I': 0.15, '1': 0.15},
+    '|': {'1': 0.30, 'I': 0.20},
+}
+
+# 문자쌍 혼동 확률표 (예: '73' -> 'EL')
+PATTERN_MAP: Dict[str, Dict[str, float]] = {
+    '73': {'EL': 0.05, 'EI': 0.03},
+    '52': {'SZ': 0.05},
+    '25': {'ZS': 0.05},
+    'Z5': {'ZS': 0.05},
+    '8B': {'BB': 0.05},
+    'I0': {'ID': 0.05, 'IO': 0.05},
+    '1O': {'IO': 0.05},
+    '0O': {'OO': 0.05},
+    'O0': {'00': 0.05},
+    'B8': {'88': 0.05},
+}
+
+# 숫자/문자 전체 치환 규칙
+ALPHA_ONLY_MAP = {'0': 'O', '1': 'I', '5': 'S', '2': 'Z', '8': 'B', '3': 'E', '4': 'A', '7': 'T'}
+NUM_ONLY_MAP = {'O': '0', 'I': '1', 'S': '5', 'Z': '2', 'B': '8', 'E': '3', 'A': '4', 'T': '7'}
+
+MAX_VARIATIONS = 10  # 반환할 최대 변형 수
+MAX_SUBSTITUTIONS = 2  # 변형 하나에 허용하는 최대 치환 위치 수
+BEAM_WIDTH = 32  # 위치별로 유지할 최대 후보 수
+UNLISTED_CONFUSION = 0.05  # 확률표에 없는 전체 치환 문자의 혼동 확률
+
 
 def generate_character_variations(text: str) -> List[str]:
     """
@@ -6,89 +117,76 @@ def generate_character_variations(text: str) -> List[str]:
     - 숫자 ↔ 알파벳
     - 알파벳 ↔ 유사한 알파벳
     - 자주 혼동되는 문자쌍(예: '73' → 'EL')
+
+    변형은 혼동 확률이 높은 순(동률이면 문자열 순)으로 정렬되어 항상 같은 순서로 반환되며,
+    결과는 imprint 단위로 LRU 캐싱됩니다.
     """
     if not text:
         return []
+    return list(_ranked_variations(text))
 
-    # 단일 문자 유사 매핑
-    similar_chars = {
-        '1': ['I', 'l', '|'],
-        'I': ['1', 'l'],
-        'l': ['1', 'I'],
-        '0': ['O', 'D'],
-        'O': ['0', 'D'],
-        'o': ['0'],
-        '8': ['B'],
-        'B': ['8'],
-        '5': ['S'],
-        'S': ['5'],
-        '2': ['Z'],
-        'Z': ['2', 'N'],
-        '6': ['G'],
-        'G': ['6'],
-        '3': ['E'],
-        'E': ['3'],
-        '4': ['A'],
-        'A': ['4'],
-        '7': ['T', 'Y'],
-        'T': ['7'],
-        '9': ['g', 'q'],
-        'L': ['I', '1'],
-        '|': ['1', 'I']
-    }
-
-    # 문자쌍 패턴 기반 유사 변환
-    pattern_map = {
-        '73': ['EL', 'EI'],
-        '52': ['SZ'],
-        '25': ['ZS'],
-        'Z5': ['ZS'],
-        '8B': ['BB'],
-        'I0': ['ID', 'IO'],
-        '1O': ['IO'],
-        '0O': ['OO'],
-        'O0': ['00'],
-        'B8': ['88'],
-    }
-
-    variations = set()
-
-    # 1. 단일 문자 치환
-    for i, char in enumerate(text):
-        if char in similar_chars:
-            for alt in similar_chars[char]:
-                new = text[:i] + alt + text[i+1:]
-                variations.add(new)
-
-    # 2. 문자쌍 패턴 치환
-    for i in range(len(text) - 1):
-        pair = text[i:i+2]
-        if pair in pattern_map:
-            for alt in pattern_map[pair]:
-                new = text[:i] + alt + text[i+2:]
-                variations.add(new)
-
-    # 3. 숫자/문자 전체 치환
+
+@lru_cache(maxsize=4096)
+def _ranked_variations(text: str) -> Tuple[str, ...]:
+    scores = _beam_search_variations(text)
+
+    # 숫자/문자 전체 치환 (숫자와 문자가 섞인 경우)
     if any(c.isdigit() for c in text) and any(c.isalpha() for c in text):
-        alpha_only = ''.join(
-            'O' if c == '0' else 'I' if c == '1' else 'S' if c == '5' else 
-            'Z' if c == '2' else 'B' if c == '8' else 
-            'E' if c == '3' else 'A' if c == '4' else 
-            'T' if c == '7' else c
-            for c in text
-        )
-        variations.add(alpha_only)
-
-        num_only = ''.join(
-            '0' if c.upper() == 'O' else '1' if c.upper() == 'I' else '5' if c.upper() == 'S' else 
-            '2' if c.upper() == 'Z' else '8' if c.upper() == 'B' else '3' if c.upper() == 'E' else 
-            '4' if c.upper() == 'A' else '7' if c.upper() == 'T' else c
-            for c in text
-        )
-        variations.add(num_only)
-
-    # 중복 제거 및 원본 제거
-    variations.discard(text)
-
-    # 최대 10개 반환
-    return list(variations)[:10]
+        for table, key in ((ALPHA_ONLY_MAP, lambda c: c), (NUM_ONLY_MAP, lambda c: c.upper())):
+            converted = []
+            score = 1.0
+            for char in text:
+                alt = table.get(key(char))
+                if alt is None or alt == char:
+                    converted.append(char)
+                    continue
+                converted.append(alt)
+                score *= SIMILAR_CHARS.get(char, {}).get(alt, UNLISTED_CONFUSION)
+            variant = "".join(converted)
+            if score > scores.get(variant, 0.0):
+                scores[variant] = score
+
+    # 원본 제거 후 확률 내림차순, 동률은 문자열 순으로 정렬
+    scores.pop(text, None)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+    return tuple(variant for variant, _ in ranked[:MAX_VARIATIONS])
+
+
+def _beam_search_variations(text: str) -> Dict[str, float]:
+    """
+    위치별로 원본 유지/단일 문자 치환/문자쌍 치환을 확장하는 빔 탐색.
+    최대 MAX_SUBSTITUTIONS 위치까지 치환하며, 위치마다 확률 상위 BEAM_WIDTH개 후보만 유지합니다.
+
+    Returns:
+        변형 문자열 -> 혼동 확률(치환 확률의 곱)
+    """
+    length = len(text)
+    # 위치 -> [(지금까지 만든 접두사, 확률, 치환 횟수)]
+    frontier: Dict[int, List[Tuple[str, float, int]]] = {0: [("", 1.0, 0)]}
+    results: Dict[str, float] = {}
+
+    for pos in range(length + 1):
+        states = frontier.pop(pos, [])
+        if not states:
+            continue
+        states.sort(key=lambda state: (-state[1], state[0]))
+        states = states[:BEAM_WIDTH]
+
+        if pos == length:
+            for prefix, prob, _ in states:
+                if prob > results.get(prefix, 0.0):
+                    results[prefix] = prob
+            break
+
+        char = text[pos]
+        pair = text[pos:pos + 2] if pos + 1 < length else ""
+        for prefix, prob, edits in states:
+            frontier.setdefault(pos + 1, []).append((prefix + char, prob, edits))
+            if edits >= MAX_SUBSTITUTIONS:
+                continue
+            for alt, alt_prob in SIMILAR_CHARS.get(char, {}).items():
+                frontier[pos + 1].append((prefix + alt, prob * alt_prob, edits + 1))
+            for alt, alt_prob in PATTERN_MAP.get(pair, {}).items():
+                frontier.setdefault(pos + 2, []).append((prefix + alt, prob * alt_prob, edits + 1))
+
+    return results
@@ -0,0 +1,61 @@
+# backend/search/warmup.py
+"""
+ES 검색 워밍업
+
+앱 시작 시 대표 검색 쿼리로 ES 캐시를 미리 데웁니다. (배포 직후 첫 요청의 cold cache 지연 방지)
+쿼리 본문은 실제 검색과 같은 경로(preprocess_features + query_templates)로 만듭니다.
+"""
+import logging
+import os
+import time
+from typing import Any, Dict, List
+
+from dotenv import load_dotenv
+
+from backend.search.logic import DEFAULT_SOURCE_PROFILE, preprocess_features, query_templates
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+ES_WARMUP_ENABLED = os.getenv("ES_WARMUP_ENABLED", "true").lower() == "true"
+ES_WARMUP_ROUNDS = int(os.getenv("ES_WARMUP_ROUNDS", 2))
+
+# 대표 검색 특징 조합 (모양만 / 색상만 / 인쇄문자 / 마크 / 투명 예외 / 2색)
+WARMUP_FEATURES: List[Dict[str, Any]] = [
+    {"drug_shape": "원형"},
+    {"color_classes": "하양"},
+    {"drug_shape": "원형", "color_classes": "하양"},
+    {"imprint": "TYL500", "drug_shape": "장방형", "color_classes": "하양"},
+    {"imprint": "IDG", "drug_shape": "원형", "color_classes": "노랑"},
+    {"imprint": "마크", "drug_shape": "원형", "color_classes": "분홍"},
+    {"imprint": "DW", "drug_shape": "타원형", "color_classes": "투명"},
+    {"imprint": "5", "drug_shape": "원형", "color_classes": ["하양", "빨강"]},
+]
+
+
+async def warmup_search(client, index_name: str, rounds: int = ES_WARMUP_ROUNDS) -> bool:
+    """
+    대표 검색 쿼리를 _msearch로 보내 ES 필터 캐시, shard request cache, global ordinals,
+    파일 시스템 캐시와 프로세스 내 쿼리 템플릿/변형 생성 캐시를 미리 데웁니다.
+    실패해도 예외를 던지지 않습니다.
+    """
+    try:
+        started = time.monotonic()
+        searches: List[Any] = []
+        for features in WARMUP_FEATURES:
+            body = query_templates.render(preprocess_features(features), 5, DEFAULT_SOURCE_PROFILE)
+            searches.append({"index": index_name, "request_cache": True})
+            searches.append(body)
+
+        took = []
+        for _ in range(max(1, rounds)):
+            response = await client.msearch(searches=searches)
+            took.append(max((item.get("took", 0) for item in response["responses"]), default=0))
+        logger.info(
+            f"ES 검색 워밍업 완료: 쿼리 {len(WARMUP_FEATURES)}개 x {rounds}회, "
+            f"회차별 최대 took(ms) {took} ({time.monotonic() - started:.2f}s)"
+        )
+        return True
+    except Exception as e:
+        logger.warning(f"ES 검색 워밍업 실패 (검색은 계속 동작): {e}")
+        return False
@@ -4,15 +4,24 @@ import os
 import json
 import logging
 import io
-import re
-from typing import Dict, Any, List, Optional
+import hashlib
+import asyncio
+from typing import Dict, Any, List, Tuple
 from fastapi import HTTPException
-from PIL import Image
+from PIL import Image, UnidentifiedImageError
 from google.cloud import aiplatform
 from vertexai.preview.generative_models import GenerativeModel, Part, SafetySetting, HarmCategory, HarmBlockThreshold
 from vertexai.generative_models import GenerationConfig
 from dotenv import load_dotenv
 
+from backend.services.image_preprocess import image_preprocessor, IMAGE_PREPROCESS_ENABLED
+from backend.services.vision_cache import vision_cache, image_digest
+from backend.services.vision_limiter import gemini_limiter
+from backend.services.vision_metrics import vision_metrics
+from backend.services import vision_response
+from backend.utils.helpers import SHAPE_GROUPS
+from backend.utils.image_io import ImageData, detect_image_mime
+
 logger = logging.getLogger("gemini_service")
 
 # 환경변수 로드 (.env 또는 도커 환경에서 주입)
@@ -30,6 +39,82 @@ try:
 except Exception as e:
     logger.error(f"❌ Vertex AI 초기화 오류: {e}")
 
+GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", 60))  # 초 단위, 슬롯을 얻은 뒤 호출 상한
+# 같은 504라도 검색(ES) 시간 초과와 구분할 수 있도록 고정 문구 사용
+VISION_TIMEOUT_DETAIL = "이미지 분석 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."
+# structured: 응답 스키마(JSON, 모양/색상 enum)로 받음, text: 자유 형식 프롬프트 응답에서 JSON 추출 (기존 방식)
+GEMINI_RESPONSE_MODE = os.getenv("GEMINI_RESPONSE_MODE", "structured").lower()
+# structured 출력 토큰 상한. 답 자체는 알약당 수십 토큰이지만 gemini-2.5 계열은 사고(thinking) 토큰도
+# 이 상한에 포함되므로 여유를 둠 (잘린 응답 수는 vision_metrics의 truncated로 확인)
+GEMINI_MAX_OUTPUT_TOKENS = int(os.getenv("GEMINI_MAX_OUTPUT_TOKENS", 2048))
+
+# 프롬프트: 반드시 필요한 3가지 필드만 반환하도록 요청합니다.
+PILL_ANALYSIS_PROMPT = (
+    "다음은 약품 이미지 분석 요청입니다.\n\n"
+    "당신(Gemini)은 이미지에서 약품의 식별 특성을 추출해야 하며, **아래 3가지 항목만 JSON 형식으로 반환**해야 합니다:\n\n"
+    "1. \"drug_shape\" – 약품의 모양. 다음 중 정확히 일치하는 단어 하나를 사용하세요: "
+    "원형, 타원형, 장방형, 반원형, 삼각형, 사각형, 마름모형, 오각형, 육각형, 팔각형, 기타\n\n"
+    "2. \"color_classes\" – 약품의 색상.\n"
+    "- 단일 색상인 경우 문자열 (예: \"분홍\")\n"
+    "- 두 가지 색상이 조합된 경우 리스트 (예: [\"하양\", \"분홍\"])\n"
+    "- 색상은 반드시 아래 목록에서 '정확히 일치하는 단어'만 사용하십시오: "
+    "하양, 노랑, 주황, 분홍, 빨강, 갈색, 연두, 초록, 청록, 파랑, 남색, 자주, 보라, 회색, 검정, 투명\n\n"
+    "- 연질 캡슐인 것 같다면, \"투명\"을 포함하세요.\n"
+    "3. \"imprint\": 약품에 인쇄된 문자(A-Z, a-z), 숫자(0-9), 그리고 + 등의 일반 특수기호를 정확히 추출하세요.\n"
+    "- 영어 대소문자를 구분해야 합니다.\n"
+    "- 중앙에 분할선이 있는 경우, 반드시 '|' 기호 하나로만 구분하십시오.\n"
+    "- 줄바꿈(\\n), 탭(\\t), 역슬래시(\\), 따옴표(\") 등은 절대 포함하지 마세요.\n\n"
+    "- **매우 중요**: 줄바꿈(\\n), 탭(\\t), 역슬래시(\\), 따옴표(\")와 같은 이스케이프 문자는 절대 포함하지 마세요.\n\n"
+    "※ 이미지에 여러 개의 약품이 감지된다면, 각 약품에 대해 위 정보를 포함한 JSON 객체를 배열 형태로 반환하세요.\n\n"
+    "예시 반환:\n"
+    "[\n"
+    "  {\"drug_shape\": \"원형\", \"color_classes\": \"하양\", \"imprint\": \"A+\"},\n"
+    "  {\"drug_shape\": \"장방형\", \"color_classes\": [\"하양\", \"분홍\"], \"imprint\": \"Q|200\"}\n"
+    "]"
+)
+
+# structured 방식의 모양/색상 enum (모양은 SHAPE_GROUPS, 색상은 위 프롬프트와 같은 목록)
+PILL_SHAPES = list(SHAPE_GROUPS)
+PILL_COLORS = ["하양", "노랑", "주황", "분홍", "빨강", "갈색", "연두", "초록", "청록", "파랑", "남색", "자주", "보라",
+               "회색", "검정", "투명"]
+# 한 사진에서 반환할 최대 알약 수 (출력 길이 상한)
+_MAX_PILLS_PER_PHOTO = 10
+
+PILL_RESPONSE_SCHEMA = {
+    "type": "array",
+    "max_items": _MAX_PILLS_PER_PHOTO,
+    "items": {
+        "type": "object",
+        "properties": {
+            "drug_shape": {"type": "string", "enum": PILL_SHAPES},
+            "color_classes": {"type": "array", "items": {"type": "string", "enum": PILL_COLORS}, "max_items": 2},
+            "imprint": {"type": "string"},
+        },
+        "required": ["drug_shape", "color_classes", "imprint"],
+    },
+}
+
+# structured 방식의 시스템 지시문: 형식/허용 값은 스키마가 강제하므로 판단 기준만 둡니다.
+# 요청마다 바이트 단위로 같은 접두부(시스템 지시문 -> 이미지)가 되도록 상수로 두고 이미지 앞에 보냅니다.
+# (Gemini 암시적 컨텍스트 캐시는 접두부가 최소 토큰 수 이상일 때만 적용되며, 적용 여부는 cached_content_token_count로 확인)
+PILL_ANALYSIS_INSTRUCTION = (
+    "당신은 약품 사진에서 식별 특성을 추출합니다. 사진에 보이는 약품마다 배열 원소 하나를 반환하세요.\n"
+    "- drug_shape: 약품의 모양\n"
+    "- color_classes: 약품의 색상. 한 가지 색이면 하나, 두 가지 색이 조합된 경우 두 개. "
+    "연질 캡슐인 것 같다면 \"투명\"을 포함하세요.\n"
+    "- imprint: 약품에 인쇄된 문자(A-Z, a-z), 숫자(0-9), 그리고 + 등의 일반 특수기호를 정확히 추출하세요. "
+    "영어 대소문자를 구분하고, 중앙에 분할선이 있는 경우 '|' 기호 하나로만 구분하십시오. 인쇄문자가 없으면 빈 문자열입니다.\n"
+    "- 사진에 약품이 없으면 빈 배열을 반환하세요."
+)
+
+SAFETY_SETTINGS = [
+    SafetySetting(category=HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, threshold=HarmBlockThreshold.BLOCK_NONE),
+    SafetySetting(category=HarmCategory.HARM_CATEGORY_HATE_SPEECH, threshold=HarmBlockThreshold.BLOCK_NONE),
+    SafetySetting(category=HarmCategory.HARM_CATEGORY_HARASSMENT, threshold=HarmBlockThreshold.BLOCK_NONE),
+    SafetySetting(category=HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT, threshold=HarmBlockThreshold.BLOCK_NONE)
+]
+TEXT_GENERATION_CONFIG = GenerationConfig(temperature=0.1, max_output_tokens=4096)
+
 model_name = "gemini-2.5-flash"
 try:
     model = GenerativeModel(model_name)
@@ -38,62 +123,117 @@ except Exception as e:
     logger.error(f"❌ Gemini 모델 로드 오류: {e}")
     model = None
 
-async def analyze_pill_image(image_path: str) -> List[Dict[str, Any]]:
+structured_model = None
+STRUCTURED_GENERATION_CONFIG = None
+if GEMINI_RESPONSE_MODE == "structured":
     try:
-        with Image.open(image_path) as img:
-            img_byte_arr = io.BytesIO()
-            img_format = img.format if img.format else "JPEG"
-            img.save(img_byte_arr, format=img_format)
-            img_bytes = img_byte_arr.getvalue()
-        
-        # 프롬프트: 반드시 필요한 3가지 필드만 반환하도록 요청합니다.
-        prompt = (
-            "다음은 약품 이미지 분석 요청입니다.\n\n"
-            "당신(Gemini)은 이미지에서 약품의 식별 특성을 추출해야 하며, **아래 3가지 항목만 JSON 형식으로 반환**해야 합니다:\n\n"
-            "1. \"drug_shape\" – 약품의 모양. 다음 중 정확히 일치하는 단어 하나를 사용하세요: "
-            "원형, 타원형, 장방형, 반원형, 삼각형, 사각형, 마름모형, 오각형, 육각형, 팔각형, 기타\n\n"
-            "2. \"color_classes\" – 약품의 색상.\n"
-            "- 단일 색상인 경우 문자열 (예: \"분홍\")\n"
-            "- 두 가지 색상이 조합된 경우 리스트 (예: [\"하양\", \"분홍\"])\n"
-            "- 색상은 반드시 아래 목록에서 '정확히 일치하는 단어'만 사용하십시오: "
-            "하양, 노랑, 주황, 분홍, 빨강, 갈색, 연두, 초록, 청록, 파랑, 남색, 자주, 보라, 회색, 검정, 투명\n\n"
-            "- 연질 캡슐인 것 같다면, \"투명\"을 포함하세요.\n"
-            "3. \"imprint\": 약품에 인쇄된 문자(A-Z, a-z), 숫자(0-9), 그리고 + 등의 일반 특수기호를 정확히 추출하세요.\n"
-            "- 영어 대소문자를 구분해야 합니다.\n"
-            "- 중앙에 분할선이 있는 경우, 반드시 '|' 기호 하나로만 구분하십시오.\n"
-            "- 줄바꿈(\\n), 탭(\\t), 역슬래시(\\), 따옴표(\") 등은 절대 포함하지 마세요.\n\n"
-            "- **매우 중요**: 줄바꿈(\\n), 탭(\\t), 역슬래시(\\), 따옴표(\")와 같은 이스케이프 문자는 절대 포함하지 마세요.\n\n"
-            "※ 이미지에 여러 개의 약품이 감지된다면, 각 약품에 대해 위 정보를 포함한 JSON 객체를 배열 형태로 반환하세요.\n\n"
-            "예시 반환:\n"
-            "[\n"
-            "  {\"drug_shape\": \"원형\", \"color_classes\": \"하양\", \"imprint\": \"A+\"},\n"
-            "  {\"drug_shape\": \"장방형\", \"color_classes\": [\"하양\", \"분홍\"], \"imprint\": \"Q|200\"}\n"
-            "]"
-        )
-        
-        logger.info("🔄 Gemini API 호출 중...")
-        
-        image_part = Part.from_data(mime_type=f"image/{img_format.lower()}", data=img_bytes)
-        prompt_part = Part.from_text(prompt)
-        
-        generation_config = GenerationConfig(temperature=0.1, max_output_tokens=4096)
-        safety_settings = [
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_DANGEROUS_CONTENT, threshold=HarmBlockThreshold.BLOCK_NONE),
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_HATE_SPEECH, threshold=HarmBlockThreshold.BLOCK_NONE),
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_HARASSMENT, threshold=HarmBlockThreshold.BLOCK_NONE),
-            SafetySetting(category=HarmCategory.HARM_CATEGORY_SEXUALLY_EXPLICIT, threshold=HarmBlockThreshold.BLOCK_NONE)
-        ]
-        
-        response = model.generate_content(
-            [prompt_part, image_part],
-            generation_config=generation_config,
-            safety_settings=safety_settings
+        structured_model = GenerativeModel(model_name, system_instruction=[PILL_ANALYSIS_INSTRUCTION])
+        STRUCTURED_GENERATION_CONFIG = GenerationConfig(
+            temperature=0.1,
+            max_output_tokens=GEMINI_MAX_OUTPUT_TOKENS,
+            response_mime_type="application/json",
+            response_schema=PILL_RESPONSE_SCHEMA,
         )
-        
-        if not response.text:
+    except Exception as e:
+        # 응답 스키마를 지원하지 않는 SDK 등: 기존 text 방식으로 동작
+        logger.error(f"❌ Gemini structured 응답 설정 오류, text 방식 사용: {e}")
+        GEMINI_RESPONSE_MODE = "text"
+
+# 비전 결과 캐시 네임스페이스: 모델이나 프롬프트/스키마가 바뀌면 이전 분석 결과를 재사용하지 않음
+_prompt_signature = (
+    PILL_ANALYSIS_INSTRUCTION + json.dumps(PILL_RESPONSE_SCHEMA, sort_keys=True, ensure_ascii=False)
+    if GEMINI_RESPONSE_MODE == "structured" else PILL_ANALYSIS_PROMPT
+)
+VISION_CACHE_NAMESPACE = (
+    f"{model_name}:{GEMINI_RESPONSE_MODE}:{hashlib.sha1(_prompt_signature.encode('utf-8')).hexdigest()[:8]}"
+)
+
+
+def _reencode_image(image: ImageData) -> bytes:
+    """Gemini가 그대로 받지 않는 형식을 JPEG로 재인코딩합니다. (CPU 작업이므로 스레드에서 실행)"""
+    with Image.open(io.BytesIO(image)) as img:
+        img_byte_arr = io.BytesIO()
+        img.convert("RGB").save(img_byte_arr, format="JPEG", quality=90)
+        return img_byte_arr.getvalue()
+
+
+async def prepare_image(image: ImageData, preprocess: bool = IMAGE_PREPROCESS_ENABLED) -> Tuple[bytes, str]:
+    """
+    Gemini에 보낼 (이미지 바이트, MIME 타입)을 반환합니다.
+    preprocess면 image_preprocessor로 정규화(EXIF 회전, 축소, 선택적 자르기, 재인코딩)하고,
+    아니면 JPEG/PNG/WEBP는 디코드/재인코딩 없이 그대로 사용합니다.
+
+    Raises:
+        HTTPException(400): 이미지로 읽을 수 없는 데이터
+    """
+    if preprocess:
+        try:
+            img_bytes, mime_type, _ = await image_preprocessor.process(bytes(image))
+            return img_bytes, mime_type
+        except (UnidentifiedImageError, OSError):
+            raise HTTPException(status_code=400, detail="지원하지 않는 이미지 형식입니다.")
+
+    try:
+        mime_type = detect_image_mime(image)
+        if mime_type is not None:
+            return (image if isinstance(image, bytes) else bytes(image)), mime_type
+        return await asyncio.to_thread(_reencode_image, image), "image/jpeg"
+    except (UnidentifiedImageError, OSError):
+        raise HTTPException(status_code=400, detail="지원하지 않는 이미지 형식입니다.")
+
+
+async def analyze_pill_image(image: ImageData, preprocess: bool = IMAGE_PREPROCESS_ENABLED) -> List[Dict[str, Any]]:
+    """
+    알약 사진에서 모양/색상/인쇄문자 후보를 추출합니다.
+
+    Args:
+        image: 이미지 바이트 (bytes / bytearray / memoryview, 임시 파일 없이 메모리에서 처리)
+        preprocess: Gemini 호출 전 이미지 정규화 여부 (벤치마크에서 원본과 비교할 때 끔)
+    """
+    try:
+        img_bytes, mime_type = await prepare_image(image, preprocess)
+
+        # 같은 사진을 다시 올렸으면(정규화 결과 바이트가 같으면) 이전 분석 후보를 재사용하고 Gemini 호출 생략
+        digest = image_digest(img_bytes)
+        cached = await vision_cache.get(VISION_CACHE_NAMESPACE, digest)
+        if cached is not None:
+            return cached
+
+        logger.info(f"🔄 Gemini API 호출 중... ({GEMINI_RESPONSE_MODE})")
+
+        image_part = Part.from_data(mime_type=mime_type, data=img_bytes)
+        if GEMINI_RESPONSE_MODE == "structured":
+            # 시스템 지시문이 고정 접두부, 요청마다 달라지는 이미지는 마지막
+            call_model, contents, generation_config = structured_model, [image_part], STRUCTURED_GENERATION_CONFIG
+        else:
+            call_model, generation_config = model, TEXT_GENERATION_CONFIG
+            contents = [Part.from_text(PILL_ANALYSIS_PROMPT), image_part]
+
+        # 비동기 API로 호출해 분석 중에도 이벤트 루프(웹소켓, 검색, 헬스 체크)가 멈추지 않도록 하고,
+        # 동시 호출 수는 gemini_limiter로 제한
+        async with gemini_limiter.slot():
+            response = await asyncio.wait_for(
+                call_model.generate_content_async(
+                    contents,
+                    generation_config=generation_config,
+                    safety_settings=SAFETY_SETTINGS
+                ),
+                timeout=GEMINI_REQUEST_TIMEOUT,
+            )
+
+        response_text = vision_response.response_text(response)
+        finish_reason = vision_response.finish_reason(response)
+        truncated = finish_reason == "MAX_TOKENS"
+        vision_metrics.record_response(GEMINI_RESPONSE_MODE, getattr(response, "usage_metadata", None),
+                                       finish_reason, empty=not response_text)
+        if not response_text and truncated:
+            # 사고 토큰이 상한을 다 써서 답이 없는 경우는 "의약품 없음"이 아니라 분석 실패
+            raise ValueError(f"Gemini 응답이 출력 토큰 상한({GEMINI_MAX_OUTPUT_TOKENS})에서 잘림")
+        if not response_text:
             raise HTTPException(status_code=422, detail="사진에서 의약품이 발견되지 않았습니다.")
 
-        json_data = _extract_json_from_response(response.text)
+        # 잘린 응답은 닫힌 배열 항목만 살리고, 살릴 항목이 없으면 ValueError(분석 실패)
+        json_data = vision_response.parse_response(response_text, GEMINI_RESPONSE_MODE, truncated)
 
         if isinstance(json_data, dict) and not json_data:
             raise HTTPException(status_code=422, detail="사진에서 의약품이 발견되지 않았습니다.")
@@ -102,30 +242,17 @@ async def analyze_pill_image(image_path: str) -> List[Dict[str, Any]]:
         elif not isinstance(json_data, (dict, list)):
             raise ValueError("Gemini API 응답 형식이 예상과 다릅니다.")
 
-        return [json_data] if isinstance(json_data, dict) else json_data
+        candidates = vision_response.normalize_candidates([json_data] if isinstance(json_data, dict) else json_data)
+        if not truncated:
+            # 잘린 응답은 사진 속 알약 일부가 빠졌을 수 있으므로 같은 사진을 다시 올리면 새로 분석
+            await vision_cache.set(VISION_CACHE_NAMESPACE, digest, candidates)
+        return candidates
 
     except HTTPException:
         raise  # 위에서 명시적으로 발생시킨 에러는 그대로 전달
+    except asyncio.TimeoutError:
+        logger.error(f"❌ Gemini API 응답 시간 초과 ({GEMINI_REQUEST_TIMEOUT}s)")
+        raise HTTPException(status_code=504, detail=VISION_TIMEOUT_DETAIL)
     except Exception as e:
         logger.error(f"❌ 이미지 분석 오류: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="이미지 분석 중 오류가 발생했습니다.")
-
-def _extract_json_from_response(response_text: str) -> Any:
-    """
-    Gemini 응답 텍스트에서 JSON 데이터를 추출합니다.
-    코드 블록 형태든 전체 텍스트 중 JSON 객체이든 상관없이 추출합니다.
-    """
-    try:
-        json_match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", response_text)
-        if json_match:
-            json_str = json_match.group(1)
-        else:
-            json_match = re.search(r"({[\s\S]*})", response_text)
-            if json_match:
-                json_str = json_match.group(1)
-            else:
-                raise ValueError("응답에서 JSON 데이터를 찾을 수 없습니다.")
-        return json.loads(json_str)
-    except Exception as e:
-        logger.error(f"❌ JSON 파싱 오류: {e}, 원본 응답: {response_text}")
-        raise ValueError(f"JSON 파싱 오류: {e}")
@@ -0,0 +1,217 @@
+# backend/services/image_preprocess.py
+"""
+비전 추론 전 이미지 정규화
+
+휴대폰 사진은 원본 해상도(4000px 이상, 수 MB)로 올라오므로 그대로 보내면 업로드 시간, 요청 크기,
+Gemini 이미지 토큰이 모두 커집니다. Gemini에 보내기 전에 다음을 적용합니다.
+
+- EXIF 방향 적용 (세로 사진이 누운 채로 분석되지 않도록)
+- 긴 변을 IMAGE_MAX_EDGE 이하로 축소 (JPEG은 디코드 단계에서 DCT 축소(draft)로 먼저 줄임)
+- 선택: 배경(테두리 중앙값 색)과 다른 영역의 경계 상자로 알약 부분만 자르기 (IMAGE_CROP_ENABLED)
+- IMAGE_OUTPUT_FORMAT(JPEG/WEBP), IMAGE_QUALITY로 재인코딩
+
+CPU 작업이므로 별도 프로세스 풀(IMAGE_PREPROCESS_WORKERS, 0이면 스레드)에서 실행합니다.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+from PIL import Image, ImageChops, ImageFilter, ImageOps, ImageStat
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+IMAGE_PREPROCESS_ENABLED = os.getenv("IMAGE_PREPROCESS_ENABLED", "true").lower() == "true"
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", 1024))
+IMAGE_CROP_ENABLED = os.getenv("IMAGE_CROP_ENABLED", "false").lower() == "true"
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "JPEG").upper()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", 85))
+IMAGE_PREPROCESS_WORKERS = int(os.getenv("IMAGE_PREPROCESS_WORKERS", 2))
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+# 배경 검출에 사용하는 축소 이미지 크기와 배경색 차이 임계값
+_CROP_PROBE_EDGE = 160
+_CROP_THRESHOLD = 40
+# 잘라낸 영역 주변 여백 비율 (인쇄문자가 가장자리에서 잘리지 않도록)
+_CROP_MARGIN = 0.12
+# 검출 영역이 이 비율보다 크면 자르지 않음 (자를 이득이 없음), 너무 작으면 잡음으로 보고 무시
+_CROP_MAX_AREA = 0.8
+_CROP_MIN_AREA = 0.005
+
+
+def find_subject_box(img: Image.Image) -> Optional[Tuple[int, int, int, int]]:
+    """
+    테두리 픽셀의 중앙값 색을 배경으로 보고, 배경과 색이 다른 영역의 경계 상자를 원본 좌표로 반환합니다.
+    배경이 균일하지 않거나 검출 영역이 너무 크거나 작으면 None
+    """
+    probe = img.copy()
+    probe.thumbnail((_CROP_PROBE_EDGE, _CROP_PROBE_EDGE))
+    width, height = probe.size
+    border = max(2, min(width, height) // 20)
+    strips = [
+        probe.crop((0, 0, width, border)), probe.crop((0, height - border, width, height)),
+        probe.crop((0, 0, border, height)), probe.crop((width - border, 0, width, height)),
+    ]
+    medians = [ImageStat.Stat(strip).median for strip in strips]
+    background = tuple(sorted(channel)[len(channel) // 2] for channel in zip(*medians))
+
+    diff = ImageChops.difference(probe, Image.new("RGB", probe.size, background)).convert("L")
+    mask = diff.point(lambda value: 255 if value > _CROP_THRESHOLD else 0).filter(ImageFilter.MedianFilter(5))
+    box = mask.getbbox()
+    if box is None:
+        return None
+    left, top, right, bottom = box
+    area = (right - left) * (bottom - top) / (width * height)
+    if not _CROP_MIN_AREA <= area <= _CROP_MAX_AREA:
+        return None
+
+    margin_x = int((right - left) * _CROP_MARGIN) + 1
+    margin_y = int((bottom - top) * _CROP_MARGIN) + 1
+    scale_x, scale_y = img.width / width, img.height / height
+    return (
+        max(0, int((left - margin_x) * scale_x)), max(0, int((top - margin_y) * scale_y)),
+        min(img.width, int((right + margin_x) * scale_x)), min(img.height, int((bottom + margin_y) * scale_y)),
+    )
+
+
+def _downscale(img: Image.Image, max_edge: int) -> None:
+    if max_edge and max(img.size) > max_edge:
+        # draft 이후 남은 배율은 2배 미만이라 LANCZOS와 화질 차이가 거의 없고 더 빠른 BICUBIC 사용
+        img.thumbnail((max_edge, max_edge), Image.BICUBIC)
+
+
+def normalize_image(data: bytes, max_edge: int, crop: bool, output_format: str,
+                    quality: int) -> Tuple[bytes, str, Dict[str, Any]]:
+    """
+    이미지를 정규화해 (바이트, MIME 타입, 처리 정보)를 반환합니다. (프로세스 풀에서 실행되는 순수 함수)
+    """
+    started = time.perf_counter()
+    with Image.open(io.BytesIO(data)) as img:
+        original_size = img.size
+        if img.format == "JPEG" and max_edge:
+            # 디코드 시 1/2, 1/4, 1/8 DCT 축소로 목표 크기 이상인 가장 작은 크기만 읽음
+            # 자를 때는 잘라낸 알약 영역의 해상도를 남기도록 두 배 크기로 읽음
+            draft_edge = max_edge * 2 if crop else max_edge
+            img.draft("RGB", (draft_edge, draft_edge))
+        img.load()
+        if not crop:
+            # 자르지 않으면 축소를 먼저 해 회전(EXIF 적용)할 픽셀 수를 줄임 (정사각 상한이므로 순서 무관)
+            _downscale(img, max_edge)
+        img = ImageOps.exif_transpose(img).convert("RGB")
+
+    box = find_subject_box(img) if crop else None
+    if box is not None:
+        # 원본 해상도에서 먼저 잘라 인쇄문자 디테일을 최대한 남김
+        img = img.crop(box)
+    _downscale(img, max_edge)
+
+    out = io.BytesIO()
+    if output_format == "WEBP":
+        img.save(out, format="WEBP", quality=quality, method=4)
+    else:
+        img.save(out, format="JPEG", quality=quality)
+    info = {
+        "original_size": original_size,
+        "size": img.size,
+        "cropped": box is not None,
+        "bytes_in": len(data),
+        "bytes_out": out.tell(),
+        "cpu_ms": round((time.perf_counter() - started) * 1000, 1),
+    }
+    return out.getvalue(), _MIME_TYPES.get(output_format, "image/jpeg"), info
+
+
+class ImagePreprocessor:
+    def __init__(self, max_edge: int, crop: bool, output_format: str, quality: int, workers: int):
+        self.max_edge = max_edge
+        self.crop = crop
+        self.output_format = output_format
+        self.quality = quality
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self.stats = {"processed": 0, "cropped": 0, "errors": 0, "bytes_in": 0, "bytes_out": 0,
+                      "pool_restarts": 0, "total_ms": 0.0}
+
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 0:
+            return None
+        if self._pool is None:
+            # 서버 프로세스의 스레드/소켓 상태를 물려받지 않도록 spawn으로 작업 프로세스 생성
+            self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def start(self) -> None:
+        """작업 프로세스를 미리 띄웁니다. (첫 사진 요청이 프로세스 생성 시간을 기다리지 않도록)"""
+        pool = self._executor()
+        if pool is not None:
+            loop = asyncio.get_running_loop()
+            await asyncio.gather(*(loop.run_in_executor(pool, time.sleep, 0) for _ in range(self.workers)))
+
+    async def process(self, data: bytes) -> Tuple[bytes, str, Dict[str, Any]]:
+        """
+        이미지를 정규화합니다.
+
+        Raises:
+            PIL.UnidentifiedImageError / OSError: 이미지로 읽을 수 없는 데이터
+        """
+        started = time.perf_counter()
+        args = (data, self.max_edge, self.crop, self.output_format, self.quality)
+        try:
+            pool = self._executor()
+            if pool is None:
+                result = await asyncio.to_thread(normalize_image, *args)
+            else:
+                try:
+                    result = await asyncio.get_running_loop().run_in_executor(pool, normalize_image, *args)
+                except BrokenProcessPool:
+                    # 작업 프로세스가 비정상 종료(OOM 등)되면 풀을 버리고 다음 요청에서 새로 만듦, 이번 요청은 스레드에서 처리
+                    logger.warning("이미지 전처리 프로세스 풀 손상, 다시 생성합니다.")
+                    self.stats["pool_restarts"] += 1
+                    self.close()
+                    result = await asyncio.to_thread(normalize_image, *args)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        info = result[2]
+        self.stats["processed"] += 1
+        self.stats["cropped"] += info["cropped"]
+        self.stats["bytes_in"] += info["bytes_in"]
+        self.stats["bytes_out"] += info["bytes_out"]
+        self.stats["total_ms"] += (time.perf_counter() - started) * 1000
+        return result
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        processed = self.stats["processed"]
+        return {
+            **{key: value for key, value in self.stats.items() if key != "total_ms"},
+            "enabled": IMAGE_PREPROCESS_ENABLED,
+            "max_edge": self.max_edge,
+            "crop": self.crop,
+            "output_format": self.output_format,
+            "quality": self.quality,
+            "workers": self.workers,
+            "mean_ms": round(self.stats["total_ms"] / processed, 1) if processed else 0.0,
+            "size_ratio": round(self.stats["bytes_out"] / self.stats["bytes_in"], 3) if self.stats["bytes_in"] else None,
+        }
+
+
+# 싱글톤 인스턴스
+image_preprocessor = ImagePreprocessor(
+    max_edge=IMAGE_MAX_EDGE,
+    crop=IMAGE_CROP_ENABLED,
+    output_format=IMAGE_OUTPUT_FORMAT,
+    quality=IMAGE_QUALITY,
+    workers=IMAGE_PREPROCESS_WORKERS,
+)
@@ -0,0 +1,149 @@
+# backend/services/vision_cache.py
+"""
+비전 분석 결과 캐시 (이미지 내용 해시 기준)
+
+같은 사진을 다시 올리면(재시도, 대화 중 재전송) Gemini 호출 없이 이전 분석 후보
+(drug_shape/color_classes/imprint)를 재사용합니다.
+
+- 키: Gemini에 보내는 정규화된 이미지 바이트의 SHA-256 (image_digest)
+  바이트가 하나라도 다르면 적중하지 않습니다. 지각 해시(dHash + 평균 색)로 비슷한 사진까지 묶으면
+  흰색 원형 정제처럼 인쇄문자만 다른 알약이 허용 거리 안에 들어와 다른 약의 결과를 돌려주므로 쓰지 않습니다.
+- L1: 프로세스 내 LRU (TTL 적용)
+- L2: 선택적 Redis (TTL 적용, 워커/파드 간 공유)
+- 네임스페이스(모델 이름 + 응답 방식 + 프롬프트 해시)가 키에 들어가므로 모델이나 프롬프트가 바뀌면 기존 결과는 쓰지 않습니다.
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from backend.db.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+VISION_CACHE_ENABLED = os.getenv("VISION_CACHE_ENABLED", "true").lower() == "true"
+VISION_CACHE_MAX_ENTRIES = int(os.getenv("VISION_CACHE_MAX_ENTRIES", 2000))
+VISION_CACHE_TTL = int(os.getenv("VISION_CACHE_TTL", 86400))  # 초 단위
+VISION_CACHE_REDIS_ENABLED = os.getenv("VISION_CACHE_REDIS_ENABLED", "false").lower() == "true"
+
+Candidates = List[Dict[str, Any]]
+
+
+def image_digest(data: bytes) -> str:
+    """캐시 키로 쓰는 이미지 바이트의 SHA-256 (16진수)"""
+    return hashlib.sha256(data).hexdigest()
+
+
+class VisionResultCache:
+    def __init__(self, max_entries: int, ttl: int, redis_enabled: bool):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.redis_enabled = redis_enabled
+
+        # (네임스페이스, 다이제스트) -> (만료 시각, 직렬화된 후보)
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, str]]" = OrderedDict()
+
+        self.stats = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "sets": 0,
+            "evictions": 0,
+            "errors": 0,
+        }
+
+    @staticmethod
+    def _redis_key(namespace: str, digest: str) -> str:
+        return f"vision_result:{namespace}:{digest}"
+
+    def _get_local(self, key: Tuple[str, str]) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, payload = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return payload
+
+    def _put_local(self, key: Tuple[str, str], payload: str) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get(self, namespace: str, digest: str) -> Optional[Candidates]:
+        """같은 이미지의 분석 후보를 반환합니다. 없으면 None (호출자가 수정해도 되는 새 객체)"""
+        if not VISION_CACHE_ENABLED:
+            return None
+
+        key = (namespace, digest)
+        payload = self._get_local(key)
+        if payload is not None:
+            self.stats["l1_hits"] += 1
+            logger.info("비전 결과 캐시 적중 (l1), Gemini 호출 생략")
+            return json.loads(payload)
+
+        redis = get_redis() if self.redis_enabled else None
+        if redis is not None:
+            try:
+                raw = await redis.get(self._redis_key(namespace, digest))
+                if raw is not None:
+                    payload = raw.decode("utf-8") if isinstance(raw, bytes) else raw
+                    self._put_local(key, payload)
+                    self.stats["l2_hits"] += 1
+                    logger.info("비전 결과 캐시 적중 (l2), Gemini 호출 생략")
+                    return json.loads(payload)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"비전 결과 캐시 Redis 조회 실패: {e}")
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, namespace: str, digest: str, candidates: Candidates) -> None:
+        if not VISION_CACHE_ENABLED or not candidates:
+            return
+        payload = json.dumps(candidates, ensure_ascii=False, separators=(",", ":"))
+        self._put_local((namespace, digest), payload)
+        self.stats["sets"] += 1
+
+        redis = get_redis() if self.redis_enabled else None
+        if redis is not None:
+            try:
+                await redis.set(self._redis_key(namespace, digest), payload, ex=self.ttl)
+            except Exception as e:
+                self.stats["errors"] += 1
+                logger.warning(f"비전 결과 캐시 Redis 저장 실패: {e}")
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        hits = self.stats["l1_hits"] + self.stats["l2_hits"]
+        lookups = hits + self.stats["misses"]
+        return {
+            **self.stats,
+            "enabled": VISION_CACHE_ENABLED,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl": self.ttl,
+            "redis_enabled": self.redis_enabled,
+        }
+
+
+# 싱글톤 인스턴스
+vision_cache = VisionResultCache(
+    max_entries=VISION_CACHE_MAX_ENTRIES,
+    ttl=VISION_CACHE_TTL,
+    redis_enabled=VISION_CACHE_REDIS_ENABLED,
+)
@@ -0,0 +1,100 @@
+# backend/services/vision_limiter.py
+"""
+Gemini 비전 호출 동시성 제한 / 대기 시간 지표
+
+사진 분석은 한 번에 수 초가 걸리는 외부 호출이므로, 동시에 진행하는 호출 수를 GEMINI_MAX_CONCURRENCY로
+제한하고 나머지는 이벤트 루프를 막지 않고 슬롯을 기다리게 합니다.
+
+- 슬롯을 GEMINI_QUEUE_TIMEOUT 안에 얻지 못하면 503으로 거절합니다. (무한정 쌓이지 않도록)
+- 최근 호출의 대기 시간(queue)과 호출 시간(call)을 링 버퍼에 보관해 p50/p95/max를 /v2/debug/gemini로 조회합니다.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Deque, Dict
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+logger = logging.getLogger(__name__)
+load_dotenv()
+
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", 8))
+GEMINI_QUEUE_TIMEOUT = float(os.getenv("GEMINI_QUEUE_TIMEOUT", 15))  # 초 단위, 슬롯 대기 상한
+# 대기/호출 시간 분위수를 계산할 최근 호출 수
+_SAMPLE_SIZE = 1000
+
+
+def _summary(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"p50": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class VisionCallLimiter:
+    def __init__(self, max_concurrency: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._queue_ms: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+        self._call_ms: Deque[float] = deque(maxlen=_SAMPLE_SIZE)
+        self.waiting = 0
+        self.in_flight = 0
+        self.stats = {"calls": 0, "errors": 0, "rejected": 0, "max_waiting": 0}
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        호출 슬롯을 얻은 동안 본문을 실행합니다.
+
+        Raises:
+            HTTPException(503): queue_timeout 안에 슬롯을 얻지 못함
+        """
+        queued_at = time.perf_counter()
+        self.waiting += 1
+        self.stats["max_waiting"] = max(self.stats["max_waiting"], self.waiting)
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.stats["rejected"] += 1
+            logger.warning(f"Gemini 호출 대기 시간 초과 ({self.queue_timeout}s, 대기 {self.waiting}건)")
+            raise HTTPException(status_code=503, detail="이미지 분석 요청이 많습니다. 잠시 후 다시 시도해 주세요.")
+        finally:
+            self.waiting -= 1
+
+        started = time.perf_counter()
+        self._queue_ms.append((started - queued_at) * 1000)
+        self.in_flight += 1
+        try:
+            yield
+        except BaseException:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+            self.stats["calls"] += 1
+            self._call_ms.append((time.perf_counter() - started) * 1000)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            **self.stats,
+            "max_concurrency": self.max_concurrency,
+            "queue_timeout": self.queue_timeout,
+            "waiting": self.waiting,
+            "in_flight": self.in_flight,
+            "queue_ms": _summary(self._queue_ms),
+            "call_ms": _summary(self._call_ms),
+        }
+
+
+# 싱글톤 인스턴스
+gemini_limiter = VisionCallLimiter(max_concurrency=GEMINI_MAX_CONCURRENCY, queue_timeout=GEMINI_QUEUE_TIMEOUT)
@@ -0,0 +1,86 @@
+# backend/services/vision_metrics.py
+"""
+Gemini 비전 응답 지표 (응답 방식별)
+
+- 호출마다 usage_metadata의 입력/출력/사고(thinking)/컨텍스트 캐시 토큰 수를 기록합니다.
+- 출력 토큰 상한에 걸려 잘린 응답(finish_reason=MAX_TOKENS), 빈 응답, JSON 파싱 실패를 셉니다.
+  잘린 응답 중 닫힌 배열 항목만 살려 쓴 경우는 salvaged로 따로 셉니다.
+  structured 방식은 파싱 실패가 0에 가까워야 하고, 잘림이 늘면 GEMINI_MAX_OUTPUT_TOKENS를 다시 봐야 합니다.
+"""
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# 출력 토큰 분위수를 계산할 최근 호출 수
+_SAMPLE_SIZE = 1000
+_TOKEN_FIELDS = ("prompt_token_count", "candidates_token_count", "thoughts_token_count", "cached_content_token_count")
+
+
+def _summary(samples: Deque[int]) -> Dict[str, int]:
+    if not samples:
+        return {"p50": 0, "p95": 0, "max": 0}
+    ordered = sorted(samples)
+    return {
+        "p50": ordered[len(ordered) // 2],
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+class VisionResponseMetrics:
+    def __init__(self):
+        self._modes: Dict[str, Dict[str, Any]] = {}
+        self._output_tokens: Dict[str, Deque[int]] = {}
+
+    def _mode_stats(self, mode: str) -> Dict[str, Any]:
+        stats = self._modes.get(mode)
+        if stats is None:
+            stats = {
+                "calls": 0,
+                "empty": 0,
+                "truncated": 0,
+                "parse_failures": 0,
+                "salvaged": 0,
+                **{field: 0 for field in _TOKEN_FIELDS},
+            }
+            self._modes[mode] = stats
+            self._output_tokens[mode] = deque(maxlen=_SAMPLE_SIZE)
+        return stats
+
+    def record_response(self, mode: str, usage: Any, finish_reason: Optional[str], empty: bool) -> None:
+        """Gemini 응답 1건 (usage: response.usage_metadata, SDK 버전에 따라 없는 필드는 0)"""
+        stats = self._mode_stats(mode)
+        stats["calls"] += 1
+        for field in _TOKEN_FIELDS:
+            stats[field] += getattr(usage, field, 0) or 0
+        if usage is not None:
+            self._output_tokens[mode].append(getattr(usage, "candidates_token_count", 0) or 0)
+        if finish_reason == "MAX_TOKENS":
+            stats["truncated"] += 1
+            logger.warning(f"Gemini 응답이 출력 토큰 상한에서 잘림 ({mode})")
+        if empty:
+            stats["empty"] += 1
+
+    def record_parse_failure(self, mode: str) -> None:
+        self._mode_stats(mode)["parse_failures"] += 1
+
+    def record_salvaged(self, mode: str) -> None:
+        self._mode_stats(mode)["salvaged"] += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        modes = {}
+        for mode, stats in self._modes.items():
+            calls = stats["calls"]
+            modes[mode] = {
+                **stats,
+                "parse_failure_ratio": round(stats["parse_failures"] / calls, 4) if calls else 0.0,
+                "mean_output_tokens": round(stats["candidates_token_count"] / calls, 1) if calls else 0.0,
+                "output_tokens": _summary(self._output_tokens[mode]),
+            }
+        return {"modes": modes}
+
+
+# 싱글톤 인스턴스
+vision_metrics = VisionResponseMetrics()
@@ -0,0 +1,127 @@
+# backend/services/vision_response.py
+"""
+Gemini 비전 응답 해석
+
+- 응답 텍스트/종료 사유 읽기 (차단, 출력 토큰 상한으로 텍스트가 없는 경우 포함)
+- structured 방식(응답 스키마)은 본문 전체를 JSON으로, text 방식은 코드 블록/본문 중 JSON을 찾아 읽음
+- 출력 토큰 상한에서 잘린 응답(finish_reason=MAX_TOKENS)은 배열에서 끝까지 닫힌 항목만 살리고,
+  살릴 항목이 없으면 분석 실패로 처리합니다. 잘린 응답의 결과는 호출자가 캐시하지 않아야 합니다.
+"""
+import json
+import logging
+import re
+from typing import Any, Dict, List, Optional
+
+from backend.services.vision_metrics import vision_metrics
+
+logger = logging.getLogger(__name__)
+
+_JSON_START = re.compile(r"[\[{]")
+# 배열 항목 사이에 올 수 있는 문자
+_ITEM_SEPARATORS = " \t\r\n,"
+
+
+def response_text(response: Any) -> str:
+    """응답 텍스트. 후보가 없거나(차단) 출력 토큰 상한으로 텍스트 파트가 없으면 빈 문자열"""
+    try:
+        return response.text or ""
+    except (ValueError, IndexError, AttributeError):
+        return ""
+
+
+def finish_reason(response: Any) -> Optional[str]:
+    try:
+        return response.candidates[0].finish_reason.name
+    except (IndexError, AttributeError):
+        return None
+
+
+def parse_response(text: str, mode: str, truncated: bool = False) -> Any:
+    """
+    응답 텍스트를 JSON으로 읽습니다. structured 방식은 본문 전체가 JSON이고,
+    읽지 못하면 파싱 실패로 기록한 뒤 text 방식과 같은 추출을 시도합니다.
+    truncated면 끝까지 닫힌 배열 항목만 반환합니다. (잘린 뒤 남은 조각을 별도 결과로 읽지 않도록)
+
+    Raises:
+        ValueError: JSON을 찾지 못했거나 잘린 응답에서 살릴 항목이 없음
+    """
+    if truncated:
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            vision_metrics.record_parse_failure(mode)
+            items = salvage_truncated_array(text)
+            vision_metrics.record_salvaged(mode)
+            return items
+    if mode == "structured":
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            vision_metrics.record_parse_failure(mode)
+            return extract_json_from_response(text)
+    try:
+        return extract_json_from_response(text)
+    except ValueError:
+        vision_metrics.record_parse_failure(mode)
+        raise
+
+
+def salvage_truncated_array(text: str) -> List[Dict[str, Any]]:
+    """
+    잘린 JSON 배열 "[{A},{B},{.." 에서 끝까지 닫힌 객체 항목(A, B)만 반환합니다.
+    처음 나오는 JSON이 배열이 아니거나(잘린 단일 객체) 닫힌 항목이 하나도 없으면 ValueError
+    """
+    start = _JSON_START.search(text)
+    if start is None or start.group() != "[":
+        raise ValueError("잘린 응답에서 JSON 배열을 찾을 수 없습니다.")
+
+    decoder = json.JSONDecoder()
+    items: List[Dict[str, Any]] = []
+    pos = start.end()
+    while True:
+        while pos < len(text) and text[pos] in _ITEM_SEPARATORS:
+            pos += 1
+        if pos >= len(text) or text[pos] == "]":
+            break
+        try:
+            item, pos = decoder.raw_decode(text, pos)
+        except json.JSONDecodeError:
+            # 잘린 마지막 항목
+            break
+        if isinstance(item, dict):
+            items.append(item)
+    if not items:
+        raise ValueError("잘린 응답에서 완전한 항목을 찾을 수 없습니다.")
+    logger.warning(f"잘린 Gemini 응답에서 완전한 항목 {len(items)}개만 사용")
+    return items
+
+
+def extract_json_from_response(text: str) -> Any:
+    """
+    Gemini 응답 텍스트에서 JSON 데이터를 추출합니다.
+    코드 블록 형태든 전체 텍스트 중 JSON 배열/객체이든 상관없이 추출합니다.
+    """
+    try:
+        json_match = re.search(r"```(?:json)?\s*([\s\S]*?)\s*```", text)
+        if json_match:
+            return json.loads(json_match.group(1))
+        # 처음으로 JSON으로 읽히는 배열([) 또는 객체({)부터 끝까지 해석 (앞뒤 설명 문장은 무시)
+        decoder = json.JSONDecoder()
+        for start in _JSON_START.finditer(text):
+            try:
+                return decoder.raw_decode(text, start.start())[0]
+            except json.JSONDecodeError:
+                continue
+        raise ValueError("응답에서 JSON 데이터를 찾을 수 없습니다.")
+    except Exception as e:
+        logger.error(f"❌ JSON 파싱 오류: {e}, 원본 응답: {text}")
+        raise ValueError(f"JSON 파싱 오류: {e}")
+
+
+def normalize_candidates(candidates: List[Any]) -> List[Any]:
+    """스키마 응답은 색상이 항상 리스트이므로 기존 형식(단일 색상은 문자열)으로 맞춥니다. (제자리 수정)"""
+    for candidate in candidates:
+        colors = candidate.get("color_classes") if isinstance(candidate, dict) else None
+        if isinstance(colors, list) and len(colors) == 1:
+            candidate["color_classes"] = colors[0]
+    return candidates
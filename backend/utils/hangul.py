@@ -0,0 +1,61 @@
+# backend/utils/hangul.py
+"""
+한글 자모 분해 / 초성 추출
+
+음성 인식 오타("씬지록신")나 초성 입력("ㅌㅇㄹㄴ")으로도 의약품 이름을 찾을 수 있도록
+이름을 자모 단위로 비교하기 위한 함수입니다.
+"""
+from typing import List
+
+_SYLLABLE_BASE = 0xAC00
+_SYLLABLE_COUNT = 11172
+
+CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+JUNGSUNG = "ㅏㅐㅑㅒㅓㅔㅕㅖㅗㅘㅙㅚㅛㅜㅝㅞㅟㅠㅡㅢㅣ"
+JONGSUNG = ["", "ㄱ", "ㄲ", "ㄳ", "ㄴ", "ㄵ", "ㄶ", "ㄷ", "ㄹ", "ㄺ", "ㄻ", "ㄼ", "ㄽ", "ㄾ", "ㄿ", "ㅀ",
+            "ㅁ", "ㅂ", "ㅄ", "ㅅ", "ㅆ", "ㅇ", "ㅈ", "ㅊ", "ㅋ", "ㅌ", "ㅍ", "ㅎ"]
+
+# 음성 인식/발음상 자주 혼동되는 자모 (된소리 -> 예사소리, ㅔ -> ㅐ)
+LOOSE_JAMO = str.maketrans({
+    "ㄲ": "ㄱ", "ㄸ": "ㄷ", "ㅃ": "ㅂ", "ㅆ": "ㅅ", "ㅉ": "ㅈ",
+    "ㅔ": "ㅐ", "ㅖ": "ㅒ",
+})
+
+_COMPAT_CONSONANTS = set("ㄱㄲㄳㄴㄵㄶㄷㄸㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅃㅄㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ")
+
+
+def decompose(text: str) -> str:
+    """한글 음절을 초성/중성/종성 자모로 분해합니다. (한글이 아닌 문자는 소문자로 유지)"""
+    out: List[str] = []
+    for char in text:
+        code = ord(char) - _SYLLABLE_BASE
+        if 0 <= code < _SYLLABLE_COUNT:
+            out.append(CHOSUNG[code // 588])
+            out.append(JUNGSUNG[(code % 588) // 28])
+            out.append(JONGSUNG[code % 28])
+        else:
+            out.append(char.lower())
+    return "".join(out)
+
+
+def loose_jamo(text: str) -> str:
+    """자모 분해 후 혼동하기 쉬운 자모를 하나로 합친 비교용 문자열"""
+    return decompose(text).translate(LOOSE_JAMO)
+
+
+def chosung(text: str) -> str:
+    """한글 음절은 초성만, 초성 자모와 그 밖의 문자는 그대로 (영문은 소문자) 남깁니다."""
+    out: List[str] = []
+    for char in text:
+        code = ord(char) - _SYLLABLE_BASE
+        if 0 <= code < _SYLLABLE_COUNT:
+            out.append(CHOSUNG[code // 588])
+        else:
+            out.append(char.lower())
+    return "".join(out)
+
+
+def is_chosung_query(text: str) -> bool:
+    """초성 자모만으로 이루어진 입력인지 여부 (예: "ㅌㅇㄹㄴ")"""
+    stripped = text.replace(" ", "")
+    return bool(stripped) and all(char in _COMPAT_CONSONANTS for char in stripped)
@@ -0,0 +1,128 @@
+# backend/utils/image_io.py
+"""
+업로드 이미지 메모리 처리
+
+사진 분석 경로(REST 업로드, 웹소켓 사진)가 임시 파일 없이 바이트를 그대로 Gemini에 넘길 수 있도록
+형식 판별과 크기 제한 읽기를 제공합니다. 업로드 본문은 요청 스트림에서 직접 파싱하므로 디스크를 거치지 않습니다.
+"""
+import os
+from typing import Any, Dict, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+from fastapi import HTTPException, Request
+
+try:
+    from python_multipart.exceptions import MultipartParseError
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.exceptions import MultipartParseError
+    from multipart.multipart import MultipartParser, parse_options_header
+
+load_dotenv()
+
+MAX_IMAGE_UPLOAD_BYTES = int(os.getenv("MAX_IMAGE_UPLOAD_BYTES", 10 * 1024 * 1024))
+# multipart 경계/파트 헤더/다른 폼 필드에 허용하는 본문 여유분
+_MULTIPART_OVERHEAD = 64 * 1024
+
+ImageData = Union[bytes, bytearray, memoryview]
+
+IMAGE_TOO_LARGE_DETAIL = f"이미지 크기가 너무 큽니다. (최대 {MAX_IMAGE_UPLOAD_BYTES // (1024 * 1024)}MB)"
+
+
+def detect_image_mime(data: ImageData) -> Optional[str]:
+    """
+    파일 시그니처로 Gemini가 그대로 받는 형식(JPEG/PNG/WEBP)의 MIME 타입을 반환합니다.
+    그 밖의 형식이면 None (디코드 후 재인코딩 필요)
+    """
+    head = bytes(data[:12])
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+async def read_multipart_image(request: Request, field: str = "file",
+                               max_bytes: int = MAX_IMAGE_UPLOAD_BYTES) -> Tuple[str, bytes]:
+    """
+    multipart/form-data 요청 본문을 request.stream()에서 받는 대로 파싱해 field 파일 파트의 (파일 이름, 바이트)를 반환합니다.
+    Starlette 폼 파서(UploadFile, 1MB가 넘으면 디스크에 쓰는 SpooledTemporaryFile)를 거치지 않으므로
+    파일 내용은 메모리에만 모이고, Content-Length가 없는 chunked 업로드도 읽는 중에 크기 제한을 적용합니다.
+
+    Raises:
+        HTTPException(400): multipart 요청이 아니거나, 형식이 잘못되었거나, field 파일 파트가 없음
+        HTTPException(413): 파일이 max_bytes를 넘거나 본문이 max_bytes + 여유분을 넘음
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if content_type != b"multipart/form-data" or not boundary:
+        raise HTTPException(status_code=400, detail="multipart/form-data 형식의 이미지 업로드가 필요합니다.")
+
+    max_body = max_bytes + _MULTIPART_OVERHEAD
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() and int(content_length) > max_body:
+        raise HTTPException(status_code=413, detail=IMAGE_TOO_LARGE_DETAIL)
+
+    part: Dict[str, Any] = {}
+    found: Dict[str, Any] = {}
+    header_field = bytearray()
+    header_value = bytearray()
+
+    def on_part_begin():
+        part.clear()
+        part.update(headers={}, chunks=[], size=0)
+
+    def on_header_field(data: bytes, start: int, end: int):
+        header_field.extend(data[start:end])
+
+    def on_header_value(data: bytes, start: int, end: int):
+        header_value.extend(data[start:end])
+
+    def on_header_end():
+        part["headers"][bytes(header_field).lower()] = bytes(header_value)
+        header_field.clear()
+        header_value.clear()
+
+    def on_headers_finished():
+        _, options = parse_options_header(part["headers"].get(b"content-disposition", b""))
+        part["target"] = options.get(b"name") == field.encode() and b"filename" in options
+        part["filename"] = options.get(b"filename", b"").decode("utf-8", "replace")
+
+    def on_part_data(data: bytes, start: int, end: int):
+        if not part.get("target") or found:
+            return
+        part["size"] += end - start
+        if part["size"] > max_bytes:
+            raise HTTPException(status_code=413, detail=IMAGE_TOO_LARGE_DETAIL)
+        part["chunks"].append(data[start:end])
+
+    def on_part_end():
+        if part.get("target") and not found:
+            # 청크를 한 번만 이어 붙여 Gemini 요청에 그대로 쓸 수 있는 bytes로 보관
+            found.update(filename=part["filename"], data=b"".join(part["chunks"]))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on_part_begin,
+        "on_part_data": on_part_data,
+        "on_part_end": on_part_end,
+        "on_header_field": on_header_field,
+        "on_header_value": on_header_value,
+        "on_header_end": on_header_end,
+        "on_headers_finished": on_headers_finished,
+    })
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_body:
+                raise HTTPException(status_code=413, detail=IMAGE_TOO_LARGE_DETAIL)
+            parser.write(chunk)
+        parser.finalize()
+    except MultipartParseError as e:
+        raise HTTPException(status_code=400, detail=f"업로드 본문 형식이 올바르지 않습니다: {e}")
+
+    if not found:
+        raise HTTPException(status_code=400, detail=f"업로드에 '{field}' 파일이 없습니다.")
+    return found["filename"], found["data"]
@@ -0,0 +1,156 @@
+# benchmarks/bench_imprint_matching.py
+"""
+인쇄문자 부분 일치 방식(fuzzy / ngram / weighted) 재현율·지연 시간 비교
+
+사용법:
+    python -m benchmarks.bench_imprint_matching [--backend es|local] [--cases cases.jsonl]
+                                                [--sample 300] [--dump-cases cases.jsonl] [--top-k 5]
+
+- 케이스: {"imprint": OCR 오인식이 섞인 인쇄문자, "drug_shape", "color_classes", "expected": 정답 item_seq}
+  --cases를 주지 않으면 색인 문서를 item_seq 순으로 고르게 --sample개 뽑아
+  유사 문자 혼동표(SIMILAR_CHARS)의 가장 흔한 오인식 1회를 넣어 고정 케이스를 만듭니다.
+- backend=es: 실제 ES에 쿼리 (ES took 및 왕복 시간 측정)
+- backend=local: LOCAL_PILL_SNAPSHOT_PATH 스냅샷을 로컬 엔진으로 평가
+- weighted: 불러온 색인 문서로 imprint_matcher를 만든 뒤 평가 (매칭 시간은 latency에 포함)
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Any, Dict, List
+
+from backend.search import logic
+from backend.search.imprint_matcher import imprint_matcher
+from backend.search.local_engine import pill_engine, LOCAL_PILL_SNAPSHOT_PATH
+from backend.search.transform import SIMILAR_CHARS
+
+MODES = ("fuzzy", "ngram", "weighted")
+
+
+def perturb_imprint(imprint: str) -> str:
+    """가장 흔한 OCR 오인식 1회를 적용합니다. (혼동 문자가 없으면 마지막 문자 누락)"""
+    for i, char in enumerate(imprint):
+        confusions = SIMILAR_CHARS.get(char)
+        if confusions:
+            substitute = max(sorted(confusions), key=confusions.get)
+            if substitute != "|":
+                return imprint[:i] + substitute + imprint[i + 1:]
+    return imprint[:-1] if len(imprint) > 2 else imprint
+
+
+def build_cases(sources: List[Dict[str, Any]], sample: int) -> List[Dict[str, Any]]:
+    candidates = sorted(
+        (src for src in sources if isinstance(src.get("print_front"), str) and len(src["print_front"]) >= 2),
+        key=lambda src: str(src.get("item_seq")),
+    )
+    step = max(1, len(candidates) // sample) if sample else 1
+    cases = []
+    for src in candidates[::step][:sample]:
+        imprint = src["print_front"].replace("|", "").replace(" ", "")
+        cases.append({
+            "imprint": perturb_imprint(imprint),
+            "drug_shape": src.get("drug_shape"),
+            "color_classes": src.get("color_classes"),
+            "expected": str(src.get("item_seq")),
+        })
+    return cases
+
+
+async def load_sources_es() -> List[Dict[str, Any]]:
+    from elasticsearch.helpers import async_scan
+    from backend.db.elastic import get_es, INDEX_NAME
+
+    return [
+        hit["_source"]
+        async for hit in async_scan(
+            get_es("admin"), index=INDEX_NAME, query={"query": {"match_all": {}}},
+            _source_includes=["item_seq", "print_front", "print_back", "drug_shape", "color_classes"],
+        )
+    ]
+
+
+def load_sources_local() -> List[Dict[str, Any]]:
+    return [source for _, source in pill_engine.snapshot_docs()[1]]
+
+
+async def run_case(backend: str, body: str):
+    if backend == "local":
+        start = time.perf_counter()
+        hits = pill_engine.search(json.loads(body))
+        return hits, (time.perf_counter() - start) * 1000, None
+
+    from backend.db.elastic import get_es, INDEX_NAME
+    start = time.perf_counter()
+    # request cache를 끄고 측정 (반복 실행 시 캐시 적중으로 차이가 가려지지 않도록)
+    response = await get_es("search").search(index=INDEX_NAME, body=body, request_cache=False)
+    return response["hits"]["hits"], (time.perf_counter() - start) * 1000, response["took"]
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return round(ordered[min(len(ordered) - 1, int(len(ordered) * pct))], 2) if ordered else 0.0
+
+
+async def evaluate(backend: str, cases: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
+    report = {}
+    for mode in MODES:
+        logic.IMPRINT_FUZZY_MODE = mode
+        found = 0
+        latencies, tooks = [], []
+        for case in cases:
+            features = {k: case[k] for k in ("imprint", "drug_shape", "color_classes") if case.get(k)}
+            start = time.perf_counter()
+            norm = logic.preprocess_features(features)
+            body = logic.query_templates.render(norm, top_k, "id")
+            prepare_ms = (time.perf_counter() - start) * 1000
+            hits, latency_ms, took = await run_case(backend, body)
+            latencies.append(prepare_ms + latency_ms)
+            if took is not None:
+                tooks.append(took)
+            found += any(str(hit["_source"].get("item_seq")) == case["expected"] for hit in hits[:top_k])
+        report[mode] = {
+            f"recall@{top_k}": round(found / len(cases), 4) if cases else 0.0,
+            "latency_ms_p50": _percentile(latencies, 0.5),
+            "latency_ms_p95": _percentile(latencies, 0.95),
+            "latency_ms_mean": round(statistics.fmean(latencies), 2) if latencies else 0.0,
+        }
+        if tooks:
+            report[mode]["es_took_ms_mean"] = round(statistics.fmean(tooks), 2)
+    return report
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        if args.backend == "local":
+            pill_engine.load(LOCAL_PILL_SNAPSHOT_PATH)
+
+        sources = load_sources_local() if args.backend == "local" else await load_sources_es()
+        imprint_matcher.build(sources)
+        if args.cases:
+            with open(args.cases, encoding="utf-8") as f:
+                cases = [json.loads(line) for line in f if line.strip()]
+        else:
+            cases = build_cases(sources, args.sample)
+        if args.dump_cases:
+            with open(args.dump_cases, "w", encoding="utf-8") as f:
+                for case in cases:
+                    f.write(json.dumps(case, ensure_ascii=False) + "\n")
+
+        report = {"backend": args.backend, "cases": len(cases), **await evaluate(args.backend, cases, args.top_k)}
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    finally:
+        if args.backend == "es":
+            from backend.db.elastic import close_elasticsearch
+            await close_elasticsearch()
+        pill_engine.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="인쇄문자 부분 일치 방식 비교")
+    parser.add_argument("--backend", choices=("es", "local"), default="es")
+    parser.add_argument("--cases", help="고정 케이스 JSONL 파일")
+    parser.add_argument("--sample", type=int, default=300)
+    parser.add_argument("--dump-cases", help="사용한 케이스를 JSONL로 저장")
+    parser.add_argument("--top-k", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,59 @@
+# benchmarks/bench_payload.py
+"""
+알약 검색 응답 페이로드 크기 측정
+
+사용법:
+    python -m benchmarks.bench_payload [--top-k 5] [--repeat 5]
+
+같은 검색 쿼리를 _source 필터 없이(embedding 포함), full, card, id 프로필로 보내
+ES 응답 바이트 수와 평균 지연 시간을 비교합니다. ES 접속 정보는 .env를 사용합니다.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend.db.elastic import get_es, close_elasticsearch, INDEX_NAME
+from backend.search.logic import SOURCE_PROFILES, build_es_query, preprocess_features
+
+SAMPLE_FEATURES = [
+    {"imprint": "TYL500", "drug_shape": "장방형", "color_classes": "하양"},
+    {"imprint": "IDG", "drug_shape": "원형", "color_classes": "노랑"},
+    {"imprint": "DW", "drug_shape": "원형", "color_classes": "분홍"},
+    {"drug_shape": "타원형", "color_classes": "하양"},
+]
+
+
+async def _measure(source_filter, top_k: int, repeat: int):
+    total_bytes = 0
+    elapsed = 0.0
+    for features in SAMPLE_FEATURES:
+        body = build_es_query(preprocess_features(features), top_k)
+        if source_filter is not None:
+            body["_source"] = source_filter
+        for _ in range(repeat):
+            start = time.perf_counter()
+            response = await get_es("search").search(index=INDEX_NAME, body=body)
+            elapsed += time.perf_counter() - start
+        total_bytes += len(json.dumps(response.body, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+    return {
+        "avg_response_bytes": total_bytes // len(SAMPLE_FEATURES),
+        "avg_latency_ms": round(elapsed / (len(SAMPLE_FEATURES) * repeat) * 1000, 2),
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    try:
+        report = {"index": INDEX_NAME, "top_k": args.top_k, "unfiltered": await _measure(None, args.top_k, args.repeat)}
+        for name, source_filter in SOURCE_PROFILES.items():
+            report[name] = await _measure(source_filter, args.top_k, args.repeat)
+        print(json.dumps(report, indent=2, ensure_ascii=False))
+    finally:
+        await close_elasticsearch()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="검색 응답 페이로드 크기 측정")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,92 @@
+# benchmarks/bench_query_templates.py
+"""
+검색 쿼리 생성 방식 비교 벤치마크
+
+사용법:
+    python -m benchmarks.bench_query_templates [--repeat 2000] [--es]
+
+- build: build_es_query로 dict를 만들고 클라이언트처럼 JSON 직렬화하는 기존 방식
+- template: 컴파일된 쿼리 템플릿에 파라미터만 채우는 방식
+- --es: 같은 쿼리를 ES에 보내 기존 방식(request cache 미사용)과 템플릿 방식(request_cache=true)의 지연 시간 비교
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from backend.search.logic import (
+    DEFAULT_SOURCE_PROFILE, SOURCE_PROFILES, build_es_query, preprocess_features, query_templates
+)
+
+SAMPLE_FEATURES = [
+    {"drug_shape": "원형"},
+    {"color_classes": "하양"},
+    {"drug_shape": "원형", "color_classes": "하양"},
+    {"imprint": "TYL500", "drug_shape": "장방형", "color_classes": "하양"},
+    {"imprint": "IDG", "drug_shape": "원형", "color_classes": "노랑"},
+    {"imprint": "마크", "drug_shape": "원형", "color_classes": "분홍"},
+    {"imprint": "DW", "drug_shape": "타원형", "color_classes": "투명"},
+]
+
+
+def _build_body(norm, top_k):
+    body = build_es_query(norm, top_k)
+    body["_source"] = SOURCE_PROFILES[DEFAULT_SOURCE_PROFILE]
+    return json.dumps(body, ensure_ascii=False)
+
+
+def _time_per_query(render, norms, top_k: int, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for norm in norms:
+            render(norm, top_k)
+    return (time.perf_counter() - start) / (repeat * len(norms)) * 1e6
+
+
+async def _es_latency(norms, top_k: int, repeat: int) -> dict:
+    from backend.db.elastic import get_es, close_elasticsearch, INDEX_NAME
+
+    async def measure(make_body, **options):
+        elapsed = 0.0
+        for _ in range(repeat):
+            for norm in norms:
+                body = make_body(norm, top_k)
+                start = time.perf_counter()
+                await get_es("search").search(index=INDEX_NAME, body=body, **options)
+                elapsed += time.perf_counter() - start
+        return round(elapsed / (repeat * len(norms)) * 1000, 2)
+
+    try:
+        return {
+            "build_ms": await measure(_build_body, request_cache=False),
+            "template_ms": await measure(
+                lambda norm, k: query_templates.render(norm, k, DEFAULT_SOURCE_PROFILE), request_cache=True
+            ),
+        }
+    finally:
+        await close_elasticsearch()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="검색 쿼리 템플릿 벤치마크")
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--es", action="store_true", help="ES 왕복 지연 시간도 측정")
+    args = parser.parse_args()
+
+    norms = [preprocess_features(features) for features in SAMPLE_FEATURES]
+    report = {
+        "queries": len(norms),
+        "build_us_per_query": round(_time_per_query(_build_body, norms, args.top_k, args.repeat), 2),
+        "template_us_per_query": round(_time_per_query(
+            lambda norm, k: query_templates.render(norm, k, DEFAULT_SOURCE_PROFILE), norms, args.top_k, args.repeat
+        ), 2),
+        "templates": query_templates.cache_info()._asdict(),
+    }
+    if args.es:
+        report["es"] = asyncio.run(_es_latency(norms, args.top_k, max(1, args.repeat // 100)))
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
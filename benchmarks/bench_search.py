@@ -0,0 +1,347 @@
+# benchmarks/bench_search.py
+"""
+알약 검색 골든셋 벤치마크 (지연 시간 / 재현율 / 쿼리 절 수)
+
+사용법:
+    python -m benchmarks.bench_search [--backend local|recorded|es] [--record]
+                                      [--cases benchmarks/fixtures/golden_cases.jsonl]
+                                      [--catalog benchmarks/fixtures/pills_catalog.jsonl]
+                                      [--recording recorded.jsonl] [--top-k 5] [--repeat 3]
+                                      [--output report.json] [--baseline report.json]
+
+- 골든셋: {"category", "imprint", "drug_shape", "color_classes", "expected": 정답 item_seq}
+  고정 카탈로그(fixtures/pills_catalog.jsonl)에서 뽑은 정확 일치, OCR 오인식, 분할선, 일부 누락,
+  뒷면 인쇄, 마크, 유사 문자 쌍, 같은 인쇄문자의 모양/색상 구분 케이스로 구성됩니다.
+- backend=local: 카탈로그를 process_pill_data로 전처리해 임시 스냅샷을 만들고 로컬 엔진으로 검색 (오프라인)
+- backend=recorded: --recording 파일에 녹화된 ES 응답을 요청 본문 해시로 재생 (오프라인)
+- backend=es: .env의 ES로 검색, --record를 주면 응답을 --recording 파일에 녹화
+
+모든 검색은 search_pills를 거치며 검색 결과 캐시는 끕니다.
+케이스마다 build_es_query의 말단 절 수와 요청 본문 크기를 함께 기록하고, 보고서는 JSON으로 출력합니다.
+--baseline을 주면 이전 보고서와 비교해 재현율 하락/p95 지연 증가가 허용치를 넘을 때 종료 코드 1로 끝납니다.
+"""
+import os
+
+# 반복 측정이 검색 결과 캐시 적중으로 가려지지 않도록 backend import 전에 끔
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+
+import argparse
+import asyncio
+import hashlib
+import json
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from backend.db import elastic
+from backend.db.ingest import process_pill_data
+from backend.search import logic
+from backend.search.imprint_matcher import imprint_matcher
+from backend.search.local_engine import pill_engine, write_snapshot
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures")
+DEFAULT_CASES = os.path.join(FIXTURES_DIR, "golden_cases.jsonl")
+DEFAULT_CATALOG = os.path.join(FIXTURES_DIR, "pills_catalog.jsonl")
+DEFAULT_RECORDING = os.path.join(FIXTURES_DIR, "recorded_responses.jsonl")
+
+FEATURE_KEYS = ("imprint", "drug_shape", "color_classes")
+_BOOL_OCCURS = ("must", "should", "filter", "must_not")
+
+
+def read_jsonl(path: str) -> List[Dict[str, Any]]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def request_key(operation: str, index: Optional[str], body: Any) -> str:
+    """요청 본문 해시 (템플릿 렌더링 결과는 같은 요청이면 같은 문자열)"""
+    if not isinstance(body, str):
+        body = json.dumps(body, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(f"{operation}\x00{index}\x00{body}".encode("utf-8")).hexdigest()
+
+
+def _response_body(response: Any) -> Dict[str, Any]:
+    return response.body if hasattr(response, "body") else response
+
+
+class RecordingElasticsearch:
+    """실제 클라이언트로 요청을 보내고 응답과 왕복 시간을 녹화합니다."""
+
+    def __init__(self, client):
+        self._client = client
+        self.recordings: Dict[str, Dict[str, Any]] = {}
+
+    def options(self, **kwargs):
+        return self
+
+    async def _call(self, key: str, request):
+        start = time.perf_counter()
+        response = _response_body(await request)
+        self.recordings[key] = {"key": key, "elapsed_ms": (time.perf_counter() - start) * 1000, "response": response}
+        return response
+
+    async def search(self, index: str, body: Any, **kwargs):
+        return await self._call(request_key("search", index, body),
+                                self._client.search(index=index, body=body, **kwargs))
+
+    async def msearch(self, searches: List[Any], **kwargs):
+        return await self._call(request_key("msearch", None, searches),
+                                self._client.msearch(searches=searches, **kwargs))
+
+    async def close(self):
+        await self._client.close()
+
+
+class RecordedElasticsearch:
+    """녹화된 응답을 요청 본문 해시로 재생하는 가짜 클라이언트 (녹화되지 않은 요청은 실패)"""
+
+    def __init__(self, recordings: List[Dict[str, Any]], replay_latency: bool = False):
+        self._recordings = {item["key"]: item for item in recordings}
+        self.replay_latency = replay_latency
+        self.unrecorded = 0
+
+    def options(self, **kwargs):
+        return self
+
+    async def _replay(self, key: str):
+        item = self._recordings.get(key)
+        if item is None:
+            self.unrecorded += 1
+            raise LookupError(f"녹화되지 않은 요청: {key}")
+        if self.replay_latency:
+            await asyncio.sleep(item["elapsed_ms"] / 1000)
+        return item["response"]
+
+    async def search(self, index: str, body: Any, **kwargs):
+        return await self._replay(request_key("search", index, body))
+
+    async def msearch(self, searches: List[Any], **kwargs):
+        return await self._replay(request_key("msearch", None, searches))
+
+    async def close(self):
+        pass
+
+
+class OfflineElasticsearch(RecordedElasticsearch):
+    """로컬 엔진이 해석하지 못해 ES로 폴백한 요청을 세는 클라이언트"""
+
+    def __init__(self):
+        super().__init__([])
+
+
+def install_client(client) -> None:
+    """search_pills가 get_es()로 받는 공유 클라이언트를 교체합니다."""
+    elastic._es = client
+    elastic._es_by_operation.clear()
+
+
+def build_local_engine(catalog_path: str, directory: str) -> int:
+    docs = [(str(raw["item_seq"]), process_pill_data(raw)) for raw in read_jsonl(catalog_path)]
+    path = os.path.join(directory, "bench.pillsnap")
+    write_snapshot(path, docs, elastic.INDEX_NAME)
+    pill_engine.load(path)
+    return len(docs)
+
+
+def count_clauses(query: Dict[str, Any]) -> int:
+    """bool 쿼리를 펼친 말단 절(term, terms, match, fuzzy 등) 수"""
+    if "bool" not in query:
+        return 1
+    total = 0
+    for occur in _BOOL_OCCURS:
+        clauses = query["bool"].get(occur, [])
+        for clause in clauses if isinstance(clauses, list) else [clauses]:
+            total += count_clauses(clause)
+    return total
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """최근접 순위 백분위수"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return round(ordered[int(rank) - 1], 3)
+
+
+def summarize_latency(values: List[float]) -> Dict[str, float]:
+    return {
+        "p50": percentile(values, 50),
+        "p95": percentile(values, 95),
+        "p99": percentile(values, 99),
+        "mean": round(statistics.fmean(values), 3) if values else 0.0,
+        "max": round(max(values), 3) if values else 0.0,
+    }
+
+
+async def run_cases(cases: List[Dict[str, Any]], top_k: int, repeat: int) -> Dict[str, Any]:
+    latencies: List[float] = []
+    clause_counts: List[int] = []
+    body_sizes: List[int] = []
+    hits_at_1 = hits_at_k = 0
+    reciprocal_ranks = 0.0
+    by_category: Dict[str, Dict[str, Any]] = {}
+    misses = []
+
+    for case in cases:
+        features = {key: case[key] for key in FEATURE_KEYS if case.get(key)}
+        norm = logic.preprocess_features(features)
+        clauses = count_clauses(logic.build_es_query(norm, top_k)["query"])
+        clause_counts.append(clauses)
+        body_sizes.append(len(logic.query_templates.render(norm, top_k, "id").encode("utf-8")))
+
+        # 첫 호출은 템플릿 컴파일/변형 생성 캐시를 채우므로 측정에서 제외
+        results = await logic.search_pills(features, top_k=top_k, profile="id")
+        case_latencies = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await logic.search_pills(features, top_k=top_k, profile="id")
+            case_latencies.append((time.perf_counter() - start) * 1000)
+        latencies.extend(case_latencies)
+
+        ranked = [str(hit["_source"].get("item_seq")) for hit in results]
+        rank = ranked.index(case["expected"]) + 1 if case["expected"] in ranked else None
+        hits_at_1 += rank == 1
+        hits_at_k += rank is not None
+        reciprocal_ranks += 1 / rank if rank else 0.0
+
+        category = by_category.setdefault(case.get("category", "uncategorized"),
+                                          {"cases": 0, "found": 0, "latencies": [], "clauses": []})
+        category["cases"] += 1
+        category["found"] += rank is not None
+        category["latencies"].extend(case_latencies)
+        category["clauses"].append(clauses)
+        if rank is None:
+            misses.append({**case, "got": ranked})
+
+    n = len(cases) or 1
+    return {
+        "latency_ms": summarize_latency(latencies),
+        "recall@1": round(hits_at_1 / n, 4),
+        f"recall@{top_k}": round(hits_at_k / n, 4),
+        "mrr": round(reciprocal_ranks / n, 4),
+        "clauses": {
+            "mean": round(statistics.fmean(clause_counts), 2) if clause_counts else 0.0,
+            "p95": percentile(clause_counts, 95),
+            "max": max(clause_counts, default=0),
+        },
+        "body_bytes": {
+            "mean": round(statistics.fmean(body_sizes), 1) if body_sizes else 0.0,
+            "max": max(body_sizes, default=0),
+        },
+        "by_category": {
+            name: {
+                "cases": stats["cases"],
+                f"recall@{top_k}": round(stats["found"] / stats["cases"], 4),
+                "latency_ms_p95": percentile(stats["latencies"], 95),
+                "clauses_mean": round(statistics.fmean(stats["clauses"]), 2),
+            }
+            for name, stats in sorted(by_category.items())
+        },
+        "misses": misses,
+    }
+
+
+def compare_with_baseline(report: Dict[str, Any], baseline: Dict[str, Any],
+                          max_recall_drop: float, max_latency_regression: float) -> List[str]:
+    """기준 보고서 대비 허용치를 넘은 회귀 목록"""
+    regressions = []
+    recall_key = f"recall@{report['top_k']}"
+    for key in ("recall@1", recall_key):
+        if key in baseline and report[key] < baseline[key] - max_recall_drop:
+            regressions.append(f"{key}: {baseline[key]} -> {report[key]}")
+    for category, stats in report["by_category"].items():
+        base = baseline.get("by_category", {}).get(category)
+        if base and recall_key in base and stats[recall_key] < base[recall_key] - max_recall_drop:
+            regressions.append(f"{category} {recall_key}: {base[recall_key]} -> {stats[recall_key]}")
+    base_p95 = baseline.get("latency_ms", {}).get("p95")
+    if base_p95 and report["latency_ms"]["p95"] > base_p95 * (1 + max_latency_regression):
+        regressions.append(f"latency_ms.p95: {base_p95} -> {report['latency_ms']['p95']}")
+    base_clauses = baseline.get("clauses", {}).get("max")
+    if base_clauses is not None and report["clauses"]["max"] > base_clauses:
+        regressions.append(f"clauses.max: {base_clauses} -> {report['clauses']['max']}")
+    return regressions
+
+
+async def main(args: argparse.Namespace) -> int:
+    cases = read_jsonl(args.cases)
+    client = None
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            report: Dict[str, Any] = {"backend": args.backend}
+            if args.backend == "local":
+                # 로컬 엔진은 lexical 쿼리만 평가하므로 하이브리드(kNN) 검색은 사용하지 않음
+                logic.PILL_SEARCH_MODE = "lexical"
+                report["catalog_docs"] = build_local_engine(args.catalog, directory)
+                client = OfflineElasticsearch()
+            elif args.backend == "recorded":
+                client = RecordedElasticsearch(read_jsonl(args.recording), args.replay_latency)
+            else:
+                client = elastic.create_es_client().options(request_timeout=elastic.ES_TIMEOUTS["search"])
+                if args.record:
+                    client = RecordingElasticsearch(client)
+            install_client(client)
+            if logic.IMPRINT_FUZZY_MODE == "weighted":
+                if args.backend == "recorded":
+                    # 녹화 재생은 스캔 요청이 없으므로 인덱스 원본인 카탈로그로 매처 색인을 만듦
+                    imprint_matcher.build(read_jsonl(args.catalog))
+                else:
+                    await imprint_matcher.refresh(elastic.get_es(), elastic.INDEX_NAME)
+                report["imprint_matcher_keys"] = imprint_matcher.get_stats()["keys"]
+
+            report.update({
+                "index": elastic.INDEX_NAME,
+                "cases": len(cases),
+                "top_k": args.top_k,
+                "repeat": args.repeat,
+                "search_mode": logic.PILL_SEARCH_MODE,
+                "imprint_query_mode": logic.IMPRINT_QUERY_MODE,
+                "imprint_fuzzy_mode": logic.IMPRINT_FUZZY_MODE,
+                **await run_cases(cases, args.top_k, args.repeat),
+            })
+            if isinstance(client, RecordedElasticsearch):
+                report["es_requests_unanswered"] = client.unrecorded
+            if isinstance(client, RecordingElasticsearch):
+                with open(args.recording, "w", encoding="utf-8") as f:
+                    for item in client.recordings.values():
+                        f.write(json.dumps(item, ensure_ascii=False) + "\n")
+                report["recorded_requests"] = len(client.recordings)
+        finally:
+            if client is not None:
+                await client.close()
+            install_client(None)
+            pill_engine.close()
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        report["regressions"] = compare_with_baseline(report, baseline, args.max_recall_drop,
+                                                      args.max_latency_regression)
+        exit_code = 1 if report["regressions"] else 0
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    return exit_code
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="알약 검색 골든셋 벤치마크")
+    parser.add_argument("--backend", choices=("local", "recorded", "es"), default="local")
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="골든셋 JSONL 파일")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="backend=local에서 색인할 카탈로그 JSONL 파일")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING, help="녹화된 ES 응답 JSONL 파일")
+    parser.add_argument("--record", action="store_true", help="backend=es 응답을 --recording 파일에 녹화")
+    parser.add_argument("--replay-latency", action="store_true", help="backend=recorded에서 녹화된 왕복 시간만큼 대기")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3, help="케이스당 측정 반복 횟수")
+    parser.add_argument("--output", help="보고서를 저장할 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 이전 보고서 JSON 파일")
+    parser.add_argument("--max-recall-drop", type=float, default=0.0, help="허용할 재현율 하락폭")
+    parser.add_argument("--max-latency-regression", type=float, default=0.25, help="허용할 p95 지연 증가 비율")
+    sys.exit(asyncio.run(main(parser.parse_args())))
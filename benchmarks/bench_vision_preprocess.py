@@ -0,0 +1,233 @@
+# benchmarks/bench_vision_preprocess.py
+"""
+비전 추론 전 이미지 정규화 벤치마크 (요청 크기 / 전처리 시간 / Gemini 지연 시간 / 식별 정확도)
+
+사용법:
+    python -m benchmarks.bench_vision_preprocess --images photos.jsonl
+                                                 [--variants raw,1024,768,768+crop,1024+webp+q80]
+                                                 [--gemini] [--backend local|es]
+                                                 [--catalog benchmarks/fixtures/pills_catalog.jsonl]
+                                                 [--workers 2] [--top-k 5] [--output report.json]
+
+- 사진 목록: {"image": 사진 경로(목록 파일 기준 상대 경로 가능), "expected": 정답 item_seq,
+  "imprint", "drug_shape", "color_classes": 선택, 정답 특징}
+- 변형: "raw"는 원본 그대로, 그 밖에는 "+"로 이은 설정 (숫자: 긴 변 상한, crop: 알약 영역 자르기,
+  webp: WEBP 출력, q숫자: 인코딩 품질)
+- 기본은 오프라인으로 변형별 요청 바이트, 해상도, 추정 이미지 토큰, 전처리 시간만 잽니다.
+- --gemini를 주면 변형마다 실제 Gemini를 호출해 호출 시간과 종단(전처리 + Gemini + 검색) 지연 시간,
+  특징 추출 정확도, 검색 recall@1/recall@k를 함께 잽니다.
+  backend=local이면 카탈로그로 만든 로컬 엔진에서, backend=es면 .env의 ES에서 검색합니다.
+"""
+import os
+
+# 변형 간 비교가 검색 결과 캐시/비전 결과 캐시 적중으로 가려지지 않도록 backend import 전에 끔
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+os.environ["VISION_CACHE_ENABLED"] = "false"
+
+import argparse
+import asyncio
+import io
+import json
+import tempfile
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image
+
+from benchmarks.bench_search import DEFAULT_CATALOG, OfflineElasticsearch, build_local_engine, install_client, \
+    read_jsonl, summarize_latency
+from backend.db import elastic
+from backend.search import logic
+from backend.search.imprint_catalog import compact_imprint
+from backend.search.local_engine import pill_engine
+from backend.services.image_preprocess import ImagePreprocessor, IMAGE_QUALITY
+
+DEFAULT_VARIANTS = "raw,1024,768,768+crop"
+# Gemini 이미지 토큰 추정: 두 변이 모두 384px 이하면 258토큰, 그보다 크면 768x768 타일당 258토큰
+_TOKENS_PER_TILE = 258
+_SMALL_IMAGE_EDGE = 384
+_TILE_EDGE = 768
+
+
+def estimate_image_tokens(size: Tuple[int, int]) -> int:
+    width, height = size
+    if width <= _SMALL_IMAGE_EDGE and height <= _SMALL_IMAGE_EDGE:
+        return _TOKENS_PER_TILE
+    return -(-width // _TILE_EDGE) * -(-height // _TILE_EDGE) * _TOKENS_PER_TILE
+
+
+def parse_variant(spec: str, workers: int) -> Optional[ImagePreprocessor]:
+    """변형 설정 문자열을 전처리기로 바꿉니다. raw면 None"""
+    if spec == "raw":
+        return None
+    max_edge, crop, output_format, quality = 0, False, "JPEG", IMAGE_QUALITY
+    for token in spec.split("+"):
+        if token.isdigit():
+            max_edge = int(token)
+        elif token == "crop":
+            crop = True
+        elif token == "webp":
+            output_format = "WEBP"
+        elif token.startswith("q") and token[1:].isdigit():
+            quality = int(token[1:])
+        else:
+            raise ValueError(f"알 수 없는 변형 설정: {token} ({spec})")
+    return ImagePreprocessor(max_edge=max_edge, crop=crop, output_format=output_format, quality=quality,
+                             workers=workers)
+
+
+def _norm_colors(value: Any) -> Tuple[str, ...]:
+    return tuple(sorted(value if isinstance(value, list) else [value])) if value else ()
+
+
+def feature_hits(photo: Dict[str, Any], candidates: List[Dict[str, Any]]) -> Dict[str, Optional[bool]]:
+    """정답 특징이 있는 항목마다 후보 중 하나라도 맞혔는지 (정답이 없으면 None)"""
+    hits: Dict[str, Optional[bool]] = {}
+    expected_imprint = compact_imprint(photo.get("imprint")).upper()
+    hits["imprint"] = any(
+        compact_imprint(c.get("imprint")).upper() == expected_imprint for c in candidates
+    ) if expected_imprint else None
+    hits["drug_shape"] = any(
+        c.get("drug_shape") == photo["drug_shape"] for c in candidates
+    ) if photo.get("drug_shape") else None
+    expected_colors = _norm_colors(photo.get("color_classes"))
+    hits["color_classes"] = any(
+        _norm_colors(c.get("color_classes")) == expected_colors for c in candidates
+    ) if expected_colors else None
+    return hits
+
+
+async def run_photo(photo: Dict[str, Any], data: bytes, preprocessor: Optional[ImagePreprocessor],
+                    use_gemini: bool, top_k: int) -> Dict[str, Any]:
+    started = time.perf_counter()
+    if preprocessor is None:
+        out = data
+        with Image.open(io.BytesIO(data)) as img:
+            size = img.size
+        cropped = False
+    else:
+        out, _, info = await preprocessor.process(data)
+        size, cropped = info["size"], info["cropped"]
+    preprocess_ms = (time.perf_counter() - started) * 1000
+    row: Dict[str, Any] = {
+        "bytes": len(out), "size": size, "cropped": cropped,
+        "image_tokens": estimate_image_tokens(size), "preprocess_ms": preprocess_ms,
+    }
+    if not use_gemini:
+        return row
+
+    from backend.services.gemini_service import analyze_pill_image
+
+    gemini_started = time.perf_counter()
+    try:
+        candidates = await analyze_pill_image(out, preprocess=False)
+    except Exception as e:
+        # 검출 실패(422)도 정확도에 반영되도록 빈 결과로 기록
+        row["error"] = getattr(e, "detail", str(e))
+        candidates = []
+    row["gemini_ms"] = (time.perf_counter() - gemini_started) * 1000
+    for candidate in candidates:
+        if candidate.get("imprint"):
+            candidate["imprint"] = candidate["imprint"].replace(" ", "").replace("|", "")
+
+    search_started = time.perf_counter()
+    results = await logic.search_pills_batch(candidates, top_k=top_k, profile="id") if candidates else []
+    row["search_ms"] = (time.perf_counter() - search_started) * 1000
+    row["e2e_ms"] = (time.perf_counter() - started) * 1000
+
+    expected = str(photo["expected"])
+    ranks = [
+        rank for hits in results
+        for rank, hit in enumerate(hits, 1) if str(hit["_source"].get("item_seq")) == expected
+    ]
+    row["rank"] = min(ranks) if ranks else None
+    row["features"] = feature_hits(photo, candidates)
+    return row
+
+
+def summarize_variant(rows: List[Dict[str, Any]], use_gemini: bool, top_k: int) -> Dict[str, Any]:
+    summary: Dict[str, Any] = {
+        "bytes_mean": round(sum(row["bytes"] for row in rows) / len(rows)),
+        "image_tokens_mean": round(sum(row["image_tokens"] for row in rows) / len(rows)),
+        "cropped": sum(row["cropped"] for row in rows),
+        "preprocess_ms": summarize_latency([row["preprocess_ms"] for row in rows]),
+    }
+    if not use_gemini:
+        return summary
+
+    summary["gemini_ms"] = summarize_latency([row["gemini_ms"] for row in rows])
+    summary["e2e_ms"] = summarize_latency([row["e2e_ms"] for row in rows])
+    summary["errors"] = sum("error" in row for row in rows)
+    summary["recall@1"] = round(sum(row["rank"] == 1 for row in rows) / len(rows), 4)
+    summary[f"recall@{top_k}"] = round(sum(row["rank"] is not None for row in rows) / len(rows), 4)
+    for key in ("imprint", "drug_shape", "color_classes"):
+        judged = [row["features"][key] for row in rows if row["features"][key] is not None]
+        summary[f"{key}_accuracy"] = round(sum(judged) / len(judged), 4) if judged else None
+    return summary
+
+
+async def main(args: argparse.Namespace) -> None:
+    photos = read_jsonl(args.images)
+    base_dir = os.path.dirname(os.path.abspath(args.images))
+    images = []
+    for photo in photos:
+        with open(os.path.join(base_dir, photo["image"]), "rb") as f:
+            images.append(f.read())
+
+    variants = [(spec, parse_variant(spec, args.workers)) for spec in args.variants.split(",")]
+    report: Dict[str, Any] = {"photos": len(photos), "gemini": args.gemini, "workers": args.workers, "variants": {}}
+    client = None
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            if args.gemini:
+                if args.backend == "local":
+                    logic.PILL_SEARCH_MODE = "lexical"
+                    report["catalog_docs"] = build_local_engine(args.catalog, directory)
+                    client = OfflineElasticsearch()
+                else:
+                    client = elastic.create_es_client().options(request_timeout=elastic.ES_TIMEOUTS["search"])
+                install_client(client)
+                report["backend"] = args.backend
+
+            for spec, preprocessor in variants:
+                if preprocessor is not None:
+                    # 작업 프로세스 생성 시간이 첫 사진의 전처리 시간에 섞이지 않도록 미리 띄움
+                    await preprocessor.start()
+                try:
+                    rows = [
+                        await run_photo(photo, data, preprocessor, args.gemini, args.top_k)
+                        for photo, data in zip(photos, images)
+                    ]
+                finally:
+                    if preprocessor is not None:
+                        preprocessor.close()
+                report["variants"][spec] = summarize_variant(rows, args.gemini, args.top_k)
+                if args.gemini:
+                    report["variants"][spec]["misses"] = [
+                        {"image": photo["image"], "expected": photo["expected"], "error": row.get("error")}
+                        for photo, row in zip(photos, rows) if row["rank"] is None
+                    ]
+        finally:
+            if client is not None:
+                await client.close()
+                install_client(None)
+            pill_engine.close()
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="비전 추론 전 이미지 정규화 벤치마크")
+    parser.add_argument("--images", required=True, help="사진 목록 JSONL 파일")
+    parser.add_argument("--variants", default=DEFAULT_VARIANTS, help="쉼표로 구분한 변형 설정")
+    parser.add_argument("--gemini", action="store_true", help="실제 Gemini를 호출해 지연 시간과 정확도까지 측정")
+    parser.add_argument("--backend", choices=("local", "es"), default="local", help="--gemini 검색 백엔드")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="backend=local에서 색인할 카탈로그 JSONL 파일")
+    parser.add_argument("--workers", type=int, default=2, help="전처리 프로세스 수 (0이면 스레드)")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--output", help="보고서 JSON 저장 경로")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,156 @@
+# benchmarks/check_local_parity.py
+"""
+로컬 알약 엔진과 Elasticsearch 검색 결과 일치율 확인
+
+로컬 엔진은 ES와 같은 BM25 식으로 점수를 매기지만 통계는 스냅샷 전체(단일 샤드) 기준이라, 여러 샤드 인덱스에서는
+순위와 filter_results_by_score의 잘라내기가 ES와 달라질 수 있습니다.
+LOCAL_PILL_ENGINE_ENABLED를 켜기 전에 골든셋의 같은 요청 본문을 양쪽에 보내 비교합니다.
+
+사용법:
+    python -m benchmarks.check_local_parity [--backend es|recorded]
+                                            [--cases benchmarks/fixtures/golden_cases.jsonl]
+                                            [--catalog benchmarks/fixtures/pills_catalog.jsonl]
+                                            [--recording recorded.jsonl] [--top-k 5]
+                                            [--min-top1 0.95] [--min-overlap 0.9] [--min-filtered 0.9]
+                                            [--output report.json]
+
+- backend=es: .env의 ES로 검색하고, 같은 인덱스를 스캔해 만든 임시 스냅샷으로 로컬 엔진 검색
+- backend=recorded: bench_search --backend es --record로 녹화한 응답을 재생하고, 카탈로그로 스냅샷 생성 (오프라인)
+
+케이스별로 1위 일치, 상위 k개 겹침 비율, 점수 필터링 후 결과 목록(item_seq 순서) 일치를 기록하고,
+셋 중 하나라도 --min-* 기준보다 낮으면 종료 코드 1로 끝납니다.
+"""
+import os
+
+# 검색 결과 캐시를 거치지 않도록 backend import 전에 끔
+os.environ["SEARCH_CACHE_ENABLED"] = "false"
+
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import tempfile
+from typing import Any, Dict, List
+
+from benchmarks.bench_search import DEFAULT_CASES, DEFAULT_CATALOG, DEFAULT_RECORDING, FEATURE_KEYS, \
+    RecordedElasticsearch, build_local_engine, install_client, read_jsonl
+from backend.db import elastic
+from backend.search import logic
+from backend.search.imprint_matcher import imprint_matcher
+from backend.search.local_engine import pill_engine, build_snapshot_from_es
+
+
+def item_seqs(hits: List[Dict[str, Any]]) -> List[str]:
+    return [str(hit["_source"].get("item_seq")) for hit in hits]
+
+
+async def compare_cases(client, cases: List[Dict[str, Any]], top_k: int) -> Dict[str, Any]:
+    top1_agree = filtered_agree = 0
+    overlaps: List[float] = []
+    mismatches = []
+
+    for case in cases:
+        features = {key: case[key] for key in FEATURE_KEYS if case.get(key)}
+        norm = logic.preprocess_features(features)
+        body = logic.query_templates.render(norm, top_k, "id")
+
+        response = await client.search(index=elastic.INDEX_NAME, body=body, request_cache=True)
+        es_hits = response["hits"]["hits"]
+        local_hits = pill_engine.search(json.loads(body), elastic.INDEX_NAME)
+
+        es_ranked, local_ranked = item_seqs(es_hits), item_seqs(local_hits)
+        es_filtered = item_seqs(logic.filter_results_by_score(es_hits, min_results=1, max_results=top_k))
+        local_filtered = item_seqs(logic.filter_results_by_score(local_hits, min_results=1, max_results=top_k))
+
+        top1 = es_ranked[:1] == local_ranked[:1]
+        union = set(es_ranked) | set(local_ranked)
+        overlap = len(set(es_ranked) & set(local_ranked)) / len(union) if union else 1.0
+        filtered = es_filtered == local_filtered
+        top1_agree += top1
+        filtered_agree += filtered
+        overlaps.append(overlap)
+        if not (top1 and filtered):
+            mismatches.append({
+                **case,
+                "es": es_filtered,
+                "local": local_filtered,
+                f"overlap@{top_k}": round(overlap, 4),
+            })
+
+    n = len(cases) or 1
+    return {
+        "top1_agreement": round(top1_agree / n, 4),
+        f"overlap@{top_k}": round(statistics.fmean(overlaps), 4) if overlaps else 1.0,
+        "filtered_agreement": round(filtered_agree / n, 4),
+        "mismatches": mismatches,
+    }
+
+
+async def main(args: argparse.Namespace) -> int:
+    cases = read_jsonl(args.cases)
+    client = None
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            report: Dict[str, Any] = {"backend": args.backend}
+            if args.backend == "recorded":
+                client = RecordedElasticsearch(read_jsonl(args.recording))
+                report["catalog_docs"] = build_local_engine(args.catalog, directory)
+            else:
+                client = elastic.create_es_client().options(request_timeout=elastic.ES_TIMEOUTS["admin"])
+                path = os.path.join(directory, "parity.pillsnap")
+                report["catalog_docs"] = await build_snapshot_from_es(client, elastic.INDEX_NAME, path)
+                pill_engine.load(path)
+            install_client(client)
+            if logic.IMPRINT_FUZZY_MODE == "weighted":
+                # 양쪽이 같은 요청 본문을 평가하도록 매처 후보도 같은 원본으로 만듦
+                if args.backend == "recorded":
+                    imprint_matcher.build(read_jsonl(args.catalog))
+                else:
+                    await imprint_matcher.refresh(client, elastic.INDEX_NAME)
+
+            report.update({
+                "index": elastic.INDEX_NAME,
+                "cases": len(cases),
+                "top_k": args.top_k,
+                "imprint_query_mode": logic.IMPRINT_QUERY_MODE,
+                "imprint_fuzzy_mode": logic.IMPRINT_FUZZY_MODE,
+                **await compare_cases(client, cases, args.top_k),
+            })
+        finally:
+            if client is not None:
+                await client.close()
+            install_client(None)
+            pill_engine.close()
+
+    failures = [
+        f"{name} {report[name]} < {minimum}"
+        for name, minimum in (
+            ("top1_agreement", args.min_top1),
+            (f"overlap@{args.top_k}", args.min_overlap),
+            ("filtered_agreement", args.min_filtered),
+        )
+        if report[name] < minimum
+    ]
+    report["failures"] = failures
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    print(output)
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="로컬 알약 엔진 / ES 검색 결과 일치율 확인")
+    parser.add_argument("--backend", choices=("es", "recorded"), default="es")
+    parser.add_argument("--cases", default=DEFAULT_CASES, help="골든셋 JSONL 파일")
+    parser.add_argument("--catalog", default=DEFAULT_CATALOG, help="backend=recorded에서 색인할 카탈로그 JSONL 파일")
+    parser.add_argument("--recording", default=DEFAULT_RECORDING, help="녹화된 ES 응답 JSONL 파일")
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--min-top1", type=float, default=0.95, help="허용할 최소 1위 일치율")
+    parser.add_argument("--min-overlap", type=float, default=0.9, help="허용할 최소 상위 k개 평균 겹침 비율")
+    parser.add_argument("--min-filtered", type=float, default=0.9, help="허용할 최소 점수 필터링 결과 일치율")
+    parser.add_argument("--output", help="보고서를 저장할 JSON 파일")
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,135 @@
+# benchmarks/load_photo_upload.py
+"""
+사진 업로드 부하 중 다른 엔드포인트 지연 시간 측정
+
+사용법:
+    python -m benchmarks.load_photo_upload --image pill.jpg [--url http://localhost:8000]
+                                           [--uploads 32] [--concurrency 8]
+                                           [--probe /health] [--probe-interval 0.1] [--idle-seconds 3]
+
+- 실행 중인 서버에 --image를 POST /v2/medicine/image로 --concurrency개씩 동시에 --uploads번 업로드합니다.
+- 업로드 전(idle)과 업로드 중(load)에 --probe 엔드포인트를 --probe-interval 간격으로 호출해
+  지연 시간 분포를 비교합니다. Gemini 호출이 이벤트 루프를 막으면 load 구간의 probe 지연이
+  업로드 한 건의 분석 시간만큼 튑니다.
+- 끝나면 /v2/debug/gemini의 동시성 지표(대기 시간, 거절 수)를 함께 출력합니다. (서버가 DEBUG_ROUTES_ENABLED=true일 때)
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+from typing import Any, Dict, List
+
+import httpx
+
+
+def _summary(latencies: List[float]) -> Dict[str, Any]:
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+    return {
+        "count": len(ordered),
+        "p50": round(ordered[len(ordered) // 2], 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max": round(ordered[-1], 1),
+        "mean": round(statistics.fmean(ordered), 1),
+    }
+
+
+async def probe_loop(client: httpx.AsyncClient, path: str, interval: float, stop: asyncio.Event,
+                     latencies: List[float], errors: List[str]) -> None:
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors.append(f"{response.status_code}")
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - started) * 1000)
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def upload_worker(client: httpx.AsyncClient, image: bytes, filename: str, remaining: List[int],
+                        latencies: List[float], statuses: Dict[int, int]) -> None:
+    while remaining[0] > 0:
+        remaining[0] -= 1
+        started = time.perf_counter()
+        try:
+            response = await client.post(
+                "/v2/medicine/image", params={"top_k": 5}, files={"file": (filename, image, "image/jpeg")}
+            )
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+        except httpx.HTTPError as e:
+            statuses[-1] = statuses.get(-1, 0) + 1
+            print(f"업로드 실패: {type(e).__name__}: {e}")
+        latencies.append((time.perf_counter() - started) * 1000)
+
+
+async def run_probes(client: httpx.AsyncClient, args: argparse.Namespace, seconds: float) -> Dict[str, Any]:
+    latencies: List[float] = []
+    errors: List[str] = []
+    stop = asyncio.Event()
+    task = asyncio.create_task(probe_loop(client, args.probe, args.probe_interval, stop, latencies, errors))
+    await asyncio.sleep(seconds)
+    stop.set()
+    await task
+    return {**_summary(latencies), "errors": len(errors)}
+
+
+async def main(args: argparse.Namespace) -> None:
+    with open(args.image, "rb") as f:
+        image = f.read()
+    filename = os.path.basename(args.image)
+    timeout = httpx.Timeout(args.timeout)
+    limits = httpx.Limits(max_connections=args.concurrency + 4)
+
+    async with httpx.AsyncClient(base_url=args.url, timeout=timeout, limits=limits) as client:
+        report: Dict[str, Any] = {"url": args.url, "probe": args.probe, "uploads": args.uploads,
+                                  "concurrency": args.concurrency}
+        report["idle"] = await run_probes(client, args, args.idle_seconds)
+
+        probe_latencies: List[float] = []
+        probe_errors: List[str] = []
+        upload_latencies: List[float] = []
+        statuses: Dict[int, int] = {}
+        remaining = [args.uploads]
+        stop = asyncio.Event()
+        probe_task = asyncio.create_task(
+            probe_loop(client, args.probe, args.probe_interval, stop, probe_latencies, probe_errors)
+        )
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            upload_worker(client, image, filename, remaining, upload_latencies, statuses)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await probe_task
+
+        report["load"] = {**_summary(probe_latencies), "errors": len(probe_errors)}
+        report["uploads_ms"] = {**_summary(upload_latencies), "statuses": statuses,
+                                "throughput_per_s": round(args.uploads / elapsed, 2) if elapsed else 0.0}
+        try:
+            report["gemini"] = (await client.get("/v2/debug/gemini")).json().get("gemini")
+        except (httpx.HTTPError, ValueError):
+            report["gemini"] = None
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="사진 업로드 부하 중 다른 엔드포인트 지연 시간 측정")
+    parser.add_argument("--image", required=True, help="업로드할 알약 사진")
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--uploads", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--probe", default="/health", help="부하 중 지연 시간을 잴 엔드포인트")
+    parser.add_argument("--probe-interval", type=float, default=0.1)
+    parser.add_argument("--idle-seconds", type=float, default=3.0, help="업로드 전 기준 측정 시간")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    asyncio.run(main(parser.parse_args()))
@@ -5,6 +5,8 @@ from typing import List, Dict, Any
 
 from fastapi import HTTPException
 
+from backend.search.logic import PILL_SEARCH_MODE
+from backend.search.photo_metrics import photo_metrics
 from mcp_client.agent.agent_send_message import agent_send_message
 from mcp_client.agent.medeasy_agent import AgentState
 from mcp_client.service.medicine_service import process_pill_image, format_medicine_search_results
@@ -91,6 +93,7 @@ async def check_server_actions(state: AgentState) -> AgentState:
                     logger.warning(f"Base64 디코딩 실패, 원본 데이터 사용: {str(e)}")
 
             pills_data, error_message = await process_pill_image(image_data)
+            photo_metrics.record_upload(state.get("user_id"), PILL_SEARCH_MODE, len(pills_data or []))
 
             # 응답 포맷팅 및 상태 저장
             final_response = format_medicine_search_results(pills_data)
@@ -2,6 +2,7 @@ import json
 import logging
 from typing import List, Dict, Any
 
+from backend.search.photo_metrics import photo_metrics
 from mcp_client.agent.agent_types import AgentState
 from mcp_client.client import gpt_nano
 
@@ -170,6 +171,7 @@ async def detect_conversation_shift(state: AgentState) -> AgentState:
             logger.info(f"사용자 의도 감지: '{user_message}' -> {intent}")
 
             if "NOT_FOUND" in intent:
+                photo_metrics.record_not_found(state.get("user_id"))
                 state["direction"] = "save_conversation"
                 state['final_response'] = "죄송합니다. 찾는 약이 없으시군요. 의약품을 밝은 곳에서 다시 촬영해주시면 한번 더 약을 찾아드릴게요."
                 state["client_action"] = "UPLOAD_PILLS_PHOTO"
@@ -177,14 +179,17 @@ async def detect_conversation_shift(state: AgentState) -> AgentState:
                 return state
 
             elif "DETAIL" in intent: # 의약품 상제 정보를 얻고 싶을 때
+                photo_metrics.record_identified(state.get("user_id"))
                 state["direction"] = "find_medicine_details"
 
             elif "REGISTER" in intent:
+                photo_metrics.record_identified(state.get("user_id"))
                 #TODO register 구현 필요 register routine list 노드 활용하면 좋을텐데 routine_list 등록에 필요한 정보를 다 모으는 것이 목적
                 state["direction"] = "register_medicine"
 
             else:  # "OTHER" 또는 기타 의도 -> load_tools
                 # 다른 요청 처리 - 상태 초기화 후 일반 대화 흐름으로 전환
+                photo_metrics.record_abandoned(state.get("user_id"))
                 state["final_response"] = None  # 응답은 초기화하고 다음 단계에서 생성
                 state["client_action"] = None
                 state["response_data"] = None
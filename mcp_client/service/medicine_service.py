@@ -1,4 +1,3 @@
-import tempfile
 import os
 import logging
 from typing import Dict, Any, List, Optional, Tuple
@@ -6,16 +5,19 @@ from typing import Dict, Any, List, Optional, Tuple
 import httpx
 from fastapi import HTTPException
 
-from backend.search.logic import search_pills, search_medicine_by_item_seq
-from backend.services.gemini_service import analyze_pill_image
+from backend.search.logic import search_pills_batch, search_medicines_by_item_seqs
+from backend.search.medicine_names import medicine_name_index, MEDICINE_NAME_INDEX_ENABLED
+from backend.db.elastic import get_es, MEDICINE_INDEX_NAME
+from backend.services.gemini_service import analyze_pill_image, VISION_TIMEOUT_DETAIL
+from backend.utils.image_io import IMAGE_TOO_LARGE_DETAIL, MAX_IMAGE_UPLOAD_BYTES, ImageData
 
 logger = logging.getLogger(__name__)
 
 medeasy_api_url=os.getenv("MEDEASY_API_URL", "https://api.medeasy.dev")
 
-async def process_pill_image(image_data: bytes) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+async def process_pill_image(image_data: ImageData) -> Tuple[List[Dict[str, Any]], Optional[str]]:
     """
-    알약 이미지를 처리하고 분석하는 함수
+    알약 이미지를 처리하고 분석하는 함수 (임시 파일 없이 메모리에서 처리)
 
     Args:
         image_data: 이미지 바이너리 데이터
@@ -26,67 +28,48 @@ async def process_pill_image(image_data: bytes) -> Tuple[List[Dict[str, Any]], O
             - 성공 메시지 (성공 시)
             - 에러 메시지 (실패 시)
     """
-    temp_file_path = None
     medicines_found: List[Dict[str, Any]] = []
 
-    try:
-        # 임시 파일로 이미지 저장
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.jpg') as temp_file:
-            temp_file_path = temp_file.name
-            temp_file.write(image_data)
-            logger.info(f"이미지 임시 파일 저장: {temp_file_path}")
+    if len(image_data) > MAX_IMAGE_UPLOAD_BYTES:
+        logger.warning(f"업로드 이미지 크기 초과: {len(image_data)} 바이트")
+        return [], IMAGE_TOO_LARGE_DETAIL
 
+    try:
         # 이미지 분석 함수 호출
-        logger.info("약품 이미지 분석 시작...")
-        pill_results = await analyze_pill_image(temp_file_path)
+        logger.info(f"약품 이미지 분석 시작... ({len(image_data)} 바이트)")
+        pill_results = await analyze_pill_image(image_data)
         if not pill_results:
             return [], "사진을 분석할 수 없습니다. 다시 시도해 주세요."
 
         logger.info(f"약품 이미지 분석 결과: {pill_results}")
 
-        # 모든 약품 결과를 처리
-        for pill_result in pill_results:
-            search_result = await search_pills(pill_result, 5)
+        # 모든 약품 후보를 한 번의 _msearch로 검색 (표시 정보는 pills 문서의 medicine 객체로 함께 받음)
+        search_results = await search_pills_batch(pill_results, 5, profile="photo")
 
-            # 검색 결과가 없는 경우 다음 약품으로
-            if not search_result:
-                continue
-
-            # 검색된 약품 정보 처리
+        # 사진 전체에서 검색된 item_seq를 순서대로 중복 없이 수집
+        medicine_docs: Dict[str, Dict[str, Any]] = {}
+        item_seqs: List[str] = []
+        for search_result in search_results:
             for hit in search_result:
                 item_seq = hit["_source"].get("item_seq")
                 if not item_seq:
                     continue
-
-                try:
-                    # item_seq로 의약품 데이터 찾기
-                    medicine_data = await search_medicine_by_item_seq(item_seq)
-
-                    # 결과가 이미 리스트에 있는지 확인 (중복 방지)
-                    if medicine_data and not any(med.get("item_seq") == item_seq for med in medicines_found):
-                        # 필요한 정보만 추출하여 저장
-                        medicine_info = {
-                            "item_seq": item_seq,
-                            "item_name": medicine_data.get("item_name", "알 수 없음"),
-                            "entp_name": medicine_data.get("entp_name", "알 수 없음"),
-                            "chart": medicine_data.get("chart", "알 수 없음"),
-                            "drug_shape": medicine_data.get("drug_shape", "알 수 없음"),
-                            "color_classes": medicine_data.get("color_classes", "알 수 없음"),
-                            "line_front": medicine_data.get("line_front", ""),
-                            "line_back": medicine_data.get("line_back", ""),
-                            "print_front": medicine_data.get("print_front", ""),
-                            "print_back": medicine_data.get("print_back", ""),
-                            "class_name": medicine_data.get("class_name", "알 수 없음"),
-                            "indications": medicine_data.get("indications", "정보 없음"),  # 효능
-                            "dosage": medicine_data.get("dosage", "정보 없음"),  # 용법
-                            "precautions": medicine_data.get("precautions", "정보 없음"),  # 주의사항
-                            "side_effects" : medicine_data.get("side_effects", "정보 없음"),
-                            "image_url": medicine_data.get("item_image", "")
-                        }
-                        medicines_found.append(medicine_info)
-                except Exception as e:
-                    logger.error(f"의약품 정보 처리 중 오류: {str(e)}")
-                    continue
+                if item_seq not in medicine_docs and hit["_source"].get("medicine"):
+                    medicine_docs[item_seq] = hit["_source"]["medicine"]
+                if item_seq not in item_seqs:
+                    item_seqs.append(item_seq)
+
+        # medicine 객체가 아직 채워지지 않은 문서만 medicine_data에서 한 번에 조회
+        missing_seqs = [item_seq for item_seq in item_seqs if item_seq not in medicine_docs]
+        if missing_seqs:
+            logger.info(f"medicine 필드가 없는 item_seq {len(missing_seqs)}건 medicine_data 조회")
+            medicine_docs.update(await search_medicines_by_item_seqs(missing_seqs))
+
+        for item_seq in item_seqs:
+            medicine_data = medicine_docs.get(item_seq)
+            if not medicine_data:
+                continue
+            medicines_found.append(build_medicine_info(item_seq, medicine_data))
 
         # 결과에 따른 응답 메시지 생성
         if not medicines_found:
@@ -96,18 +79,42 @@ async def process_pill_image(image_data: bytes) -> Tuple[List[Dict[str, Any]], O
 
         return medicines_found, None
 
+    except HTTPException as e:
+        logger.error(f"알약 이미지 검색 실패: {e.status_code} {e.detail}")
+        if e.status_code == 504 and e.detail == VISION_TIMEOUT_DETAIL:
+            return [], "사진 분석 시간이 초과되었습니다. 잠시 후 다시 시도해 주세요."
+        if e.status_code == 504:
+            return [], "의약품 검색 서버의 응답이 늦어지고 있습니다. 잠시 후 다시 시도해 주세요."
+        if e.status_code == 503:
+            return [], "사진 분석 요청이 많습니다. 잠시 후 다시 시도해 주세요."
+        return [], f"이미지 처리 중 오류가 발생했습니다"
     except Exception as e:
         logger.exception(f"알약 이미지 처리 중 오류 발생: {str(e)}")
         return [], f"이미지 처리 중 오류가 발생했습니다"
 
-    finally:
-        # 임시 파일 삭제
-        if temp_file_path and os.path.exists(temp_file_path):
-            try:
-                os.unlink(temp_file_path)
-                logger.info(f"임시 파일 삭제: {temp_file_path}")
-            except Exception as e:
-                logger.error(f"임시 파일 삭제 실패: {str(e)}")
+
+def build_medicine_info(item_seq: str, medicine_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    medicine_data 문서(또는 pills 문서의 medicine 객체)에서 사진 검색 결과에 필요한 정보만 추출합니다.
+    """
+    return {
+        "item_seq": item_seq,
+        "item_name": medicine_data.get("item_name", "알 수 없음"),
+        "entp_name": medicine_data.get("entp_name", "알 수 없음"),
+        "chart": medicine_data.get("chart", "알 수 없음"),
+        "drug_shape": medicine_data.get("drug_shape", "알 수 없음"),
+        "color_classes": medicine_data.get("color_classes", "알 수 없음"),
+        "line_front": medicine_data.get("line_front", ""),
+        "line_back": medicine_data.get("line_back", ""),
+        "print_front": medicine_data.get("print_front", ""),
+        "print_back": medicine_data.get("print_back", ""),
+        "class_name": medicine_data.get("class_name", "알 수 없음"),
+        "indications": medicine_data.get("indications", "정보 없음"),  # 효능
+        "dosage": medicine_data.get("dosage", "정보 없음"),  # 용법
+        "precautions": medicine_data.get("precautions", "정보 없음"),  # 주의사항
+        "side_effects" : medicine_data.get("side_effects", "정보 없음"),
+        "image_url": medicine_data.get("item_image", "")
+    }
 
 
 def format_medicine_search_results(medicines: List[Dict[str, Any]]) -> str:
@@ -161,6 +168,30 @@ async def search_medicines_by_name(
         jwt_token: str,
         medicine_name: str
 ):
+    """
+    약 이름으로 의약품 후보를 검색합니다.
+    로컬 이름 색인(자모/초성)이 켜져 있고 확신할 수 있는 후보(입력과 같은 이름, 높은 점수의 오타 보정, 초성)가 있으면
+    원격 호출 없이 medicine_data 기준 후보({"item_seq", "item_name", "entp_name"})를 바로 반환합니다.
+    색인이 꺼져 있거나 준비되지 않았거나 확신할 수 없으면 사용자가 말한 이름 그대로 MEDEASY /medicine/search를 호출하고,
+    원격 결과가 없을 때만 로컬의 약한 후보를 반환합니다. (보정 후보가 입력 그대로의 검색 결과를 가리지 않도록)
+    """
+    if not MEDICINE_NAME_INDEX_ENABLED:
+        return await _search_medicines_remote(jwt_token, medicine_name)
+
+    medicine_name_index.ensure_fresh(get_es("admin"), MEDICINE_INDEX_NAME)
+    candidates, confident = medicine_name_index.candidates(medicine_name)
+    if confident:
+        logger.info(f"로컬 의약품 이름 색인 후보 {len(candidates)}건: '{medicine_name}'")
+        return candidates
+
+    medicines = await _search_medicines_remote(jwt_token, medicine_name)
+    if not medicines and candidates:
+        logger.info(f"원격 검색 결과 없음, 로컬 의약품 이름 후보 {len(candidates)}건 사용: '{medicine_name}'")
+        return candidates
+    return medicines
+
+
+async def _search_medicines_remote(jwt_token: str, medicine_name: str):
     api_url = f"{medeasy_api_url}/medicine/search"
     headers = {"Authorization": f"Bearer {jwt_token}"}
     params = {"name": medicine_name}
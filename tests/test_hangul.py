@@ -0,0 +1,23 @@
+from backend.utils.hangul import chosung, decompose, is_chosung_query, loose_jamo
+
+
+def test_decompose():
+    assert decompose("각A") == "ㄱㅏㄱa"
+    assert decompose("타이") == "ㅌㅏㅇㅣ"
+
+
+def test_loose_jamo_folds_confusables():
+    assert loose_jamo("씬지록신") == loose_jamo("신지록신")
+    assert loose_jamo("게보린") == loose_jamo("개보린")
+
+
+def test_chosung():
+    assert chosung("타이레놀정") == "ㅌㅇㄹㄴㅈ"
+    assert chosung("ㅌ이Ab") == "ㅌㅇab"
+
+
+def test_is_chosung_query():
+    assert is_chosung_query("ㅌㅇㄹㄴ")
+    assert is_chosung_query("ㅌㅇ ㄹㄴ")
+    assert not is_chosung_query("타이레놀")
+    assert not is_chosung_query("")
@@ -0,0 +1,44 @@
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from backend.utils.image_io import detect_image_mime, read_multipart_image
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"x" * 500
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/upload")
+    async def upload(request: Request):
+        filename, data = await read_multipart_image(request, max_bytes=1000)
+        return {"filename": filename, "size": len(data), "mime": detect_image_mime(data)}
+
+    return TestClient(app)
+
+
+def test_reads_file_part_into_memory(client):
+    response = client.post("/upload", files={"file": ("pill.png", PNG)}, data={"note": "앞면"})
+    assert response.json() == {"filename": "pill.png", "size": len(PNG), "mime": "image/png"}
+
+
+def test_rejects_large_file(client):
+    assert client.post("/upload", files={"file": ("pill.png", b"x" * 1001)}).status_code == 413
+
+
+def test_rejects_large_chunked_body_while_streaming(client):
+    # Content-Length 없이 보내는 chunked 업로드도 읽는 중에 거절
+    def body():
+        yield b'--b\r\nContent-Disposition: form-data; name="file"; filename="pill.jpg"\r\n\r\n'
+        for _ in range(200):
+            yield b"x" * 1000
+
+    response = client.post("/upload", content=body(), headers={"content-type": "multipart/form-data; boundary=b"})
+    assert response.status_code == 413
+
+
+def test_missing_file_or_not_multipart(client):
+    assert client.post("/upload", files={"image": ("pill.png", PNG)}).status_code == 400
+    assert client.post("/upload", json={"file": "pill.png"}).status_code == 400
@@ -0,0 +1,48 @@
+import pytest
+
+from backend.db.ingest import process_pill_data
+from backend.search import logic
+from backend.search.local_engine import LocalPillEngine, write_snapshot
+from backend.search.transform import canonicalize_imprint
+
+CATALOG = [
+    {"item_seq": "1", "print_front": "508", "print_back": "", "drug_shape": "원형", "color_classes": "하양"},
+    {"item_seq": "2", "print_front": "SOB", "print_back": "", "drug_shape": "원형", "color_classes": "하양"},
+    {"item_seq": "3", "print_front": "A7D", "print_back": "", "drug_shape": "원형", "color_classes": "하양"},
+]
+
+
+def test_canonical_groups():
+    assert canonicalize_imprint("TYL|500") == canonicalize_imprint("TYLSOO") == "TYL500"
+    assert canonicalize_imprint("I1l") == "111"
+    assert canonicalize_imprint("S0B") == canonicalize_imprint("508")
+    # 드문 혼동 쌍은 정규형으로 묶지 않음
+    assert canonicalize_imprint("A7D") == "A7D"
+    assert canonicalize_imprint("47O") == "470"
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = str(tmp_path / "pills.pillsnap")
+    write_snapshot(path, [(raw["item_seq"], process_pill_data(raw)) for raw in CATALOG], "pills")
+    engine = LocalPillEngine()
+    engine.load(path)
+    yield engine
+    engine.close()
+
+
+def search_ids(engine, monkeypatch, imprint):
+    monkeypatch.setattr(logic, "IMPRINT_QUERY_MODE", "canonical")
+    monkeypatch.setattr(logic, "IMPRINT_FUZZY_MODE", "fuzzy")
+    norm = logic.preprocess_features({"imprint": imprint, "drug_shape": "원형"})
+    return [hit["_id"] for hit in engine.search(logic.build_es_query(norm, 10))]
+
+
+def test_exact_imprint_outranks_canonical_only_match(engine, monkeypatch):
+    # '508'은 'SOB'와 정규형만 같음 (정확/부분 일치 없음)
+    assert search_ids(engine, monkeypatch, "SOB") == ["2", "1"]
+    assert search_ids(engine, monkeypatch, "508") == ["1", "2"]
+
+
+def test_rare_confusions_do_not_match_by_canonical(engine, monkeypatch):
+    assert "3" not in search_ids(engine, monkeypatch, "470")
@@ -0,0 +1,50 @@
+import asyncio
+
+import elasticsearch.helpers
+import pytest
+
+from backend.search.imprint_catalog import load_imprint_catalog
+from backend.search.local_engine import pill_engine, write_snapshot
+
+SNAPSHOT_DOCS = [("1", {"item_seq": "1", "print_front": "OLD", "shape_group": "round", "color_group": "white"})]
+ES_DOCS = [{"_source": {"item_seq": "2", "print_front": "NEW", "shape_group": "oval", "color_group": "red"}}]
+
+
+@pytest.fixture
+def es_scan(monkeypatch):
+    scans = []
+
+    async def fake_scan(es, index, **kwargs):
+        scans.append(index)
+        for hit in ES_DOCS:
+            yield hit
+
+    monkeypatch.setattr(elasticsearch.helpers, "async_scan", fake_scan)
+    return scans
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    path = str(tmp_path / "pills.pillsnap")
+    write_snapshot(path, SNAPSHOT_DOCS, "pills", index_version="pills_v1:uuid1")
+    pill_engine.load(path)
+    yield
+    pill_engine.close()
+
+
+def test_current_snapshot_is_used(snapshot, es_scan):
+    records = asyncio.run(load_imprint_catalog(None, "pills", "pills_v1:uuid1"))
+    assert [record["print_front"] for record in records] == ["OLD"]
+    assert es_scan == []
+
+
+def test_stale_snapshot_falls_back_to_es(snapshot, es_scan):
+    # 재색인 후에는 이전 세대 스냅샷이 아니라 ES에서 읽음
+    records = asyncio.run(load_imprint_catalog(None, "pills", "pills_v2:uuid2"))
+    assert [record["print_front"] for record in records] == ["NEW"]
+    assert es_scan == ["pills"]
+
+
+def test_no_snapshot_scans_es(es_scan):
+    records = asyncio.run(load_imprint_catalog(None, "pills", "pills_v1:uuid1"))
+    assert records[0]["item_seq"] == "2"
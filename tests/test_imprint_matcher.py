@@ -0,0 +1,75 @@
+import pytest
+
+from backend.search.imprint_matcher import ImprintMatcher, weighted_distance
+
+CATALOG = [
+    {"print_front": "105", "print_back": "T|Y"},
+    {"print_front": ["ty", "DW"], "print_back": None},
+    {"print_front": "IDG", "print_back": "ABC12"},
+]
+
+
+def make_matcher(records=CATALOG) -> ImprintMatcher:
+    matcher = ImprintMatcher(max_edits=2, max_cost=1.0, max_results=8)
+    matcher.build(records)
+    return matcher
+
+
+def test_confusable_substitution_is_cheaper():
+    assert weighted_distance("IO5", "105") < 1.0
+    assert weighted_distance("IX5", "105") >= 1.0
+    assert weighted_distance("105", "105") == 0.0
+
+
+def test_distance_cutoff():
+    assert weighted_distance("ABCDEF", "UVWXYZ", max_cost=1.0) == float("inf")
+
+
+def test_ocr_confusion_match():
+    assert [key for key, _ in make_matcher().match("IO5")] == ["105"]
+
+
+def test_short_imprint_allows_only_confusions():
+    matcher = make_matcher()
+    assert matcher.match("DV") == []
+    assert matcher.match("D0") == []  # 0<->W는 혼동 쌍이 아님
+    assert [key for key, _ in matcher.match("0W")] == ["DW"]
+
+
+def test_match_values_split_exact_and_near():
+    exact, near = make_matcher().match_values("TY")
+    assert sorted(exact) == ["T|Y", "ty"] and near == []
+    exact, near = make_matcher().match_values("ABCI2")
+    assert exact == [] and near == ["ABC12"]
+
+
+def test_rebuild_does_not_reuse_old_cache():
+    matcher = make_matcher()
+    assert [key for key, _ in matcher.match("IO5")] == ["105"]
+    matcher.build([{"print_front": "IOS", "print_back": None}])
+    assert [key for key, _ in matcher.match("IO5")] == ["IOS"]
+    assert matcher.match_values("IO5") == ([], ["IOS"])
+
+
+def test_match_values_uses_one_snapshot(monkeypatch):
+    matcher = make_matcher()
+    old = matcher._snapshot
+    new = matcher.compile([{"print_front": "ZZZ", "print_back": None}])
+    original_match_on = matcher._match_on
+
+    def swap_during_match(snapshot, imprint):
+        # 매칭 직후 다른 작업이 색인을 교체해도 값 조회는 매칭한 스냅샷에서
+        result = original_match_on(snapshot, imprint)
+        matcher._snapshot = new
+        return result
+
+    monkeypatch.setattr(matcher, "_match_on", swap_during_match)
+    assert matcher.match_values("IO5") == ([], ["105"])
+    assert matcher._snapshot is new and old is not new
+
+
+@pytest.mark.parametrize("records", [[], [{"print_front": None, "print_back": ""}]])
+def test_empty_catalog(records):
+    matcher = make_matcher(records)
+    assert not matcher.ready
+    assert matcher.match_values("105") == ([], [])
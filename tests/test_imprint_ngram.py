@@ -0,0 +1,64 @@
+import pytest
+
+from backend.db.ingest import process_pill_data
+from backend.search import logic
+from backend.search.local_engine import LocalPillEngine, analyze_ngrams, write_snapshot
+from backend.search.transform import compact_imprint_values
+
+CATALOG = [
+    {"item_seq": "1", "print_front": "TYL|500", "print_back": "", "drug_shape": "원형", "color_classes": "하양"},
+    {"item_seq": "2", "print_front": "TYLENOL", "print_back": "ER", "drug_shape": "장방형", "color_classes": "하양"},
+    {"item_seq": "3", "print_front": "IDG", "print_back": "105", "drug_shape": "원형", "color_classes": "노랑"},
+]
+
+
+def test_compact_imprint_values():
+    assert compact_imprint_values("TYL|500") == "TYL500"
+    assert compact_imprint_values(["A B", "", "C|D"]) == ["AB", "CD"]
+    assert compact_imprint_values(None) is None
+
+
+def test_process_pill_data_adds_normalized_fields():
+    data = process_pill_data(CATALOG[0])
+    assert data["print_front_normalized"] == "TYL500"
+    assert "print_back_normalized" not in data
+
+
+def test_analyze_ngrams():
+    assert analyze_ngrams("Ab|1") == ["ab"]
+    assert analyze_ngrams("TYL5") == ["ty", "tyl", "yl", "yl5", "l5"]
+
+
+def test_partial_clauses_by_mode():
+    norm = {"imprint": "TYL500", "imprint_match": "ngram"}
+    clauses = logic.build_imprint_partial_clauses(norm, 5.0)
+    assert [list(clause["match"]) for clause in clauses] == [["print_front_normalized"], ["print_back_normalized"]]
+    assert clauses[0]["match"]["print_front_normalized"]["minimum_should_match"] == logic.IMPRINT_NGRAM_MIN_MATCH
+
+    fuzzy = logic.build_imprint_partial_clauses({"imprint": "TYL500", "imprint_match": "fuzzy"}, 5.0)
+    assert fuzzy[0] == {"match": {"print_front": {"query": "TYL500", "boost": 5.0, "fuzziness": "AUTO"}}}
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = str(tmp_path / "pills.pillsnap")
+    write_snapshot(path, [(raw["item_seq"], process_pill_data(raw)) for raw in CATALOG], "pills")
+    engine = LocalPillEngine()
+    engine.load(path)
+    yield engine
+    engine.close()
+
+
+def ngram_ids(engine, query, minimum_should_match):
+    body = {"size": 10, "query": {"match": {"print_front_normalized": {
+        "query": query, "minimum_should_match": minimum_should_match}}}}
+    return [hit["_id"] for hit in engine.search(body)]
+
+
+def test_ngram_match_requires_share_of_grams(engine):
+    # 분할선 없이 입력해도 'TYL|500'의 n-gram과 겹침
+    assert ngram_ids(engine, "TYL500", "50%") == ["1"]
+    # 일부만 인식한 인쇄문자: 50%면 두 문서, 더 높은 비율이면 겹침이 많은 문서만
+    assert ngram_ids(engine, "TYL5", "50%") == ["1", "2"]
+    assert ngram_ids(engine, "TYL5", "100%") == ["1"]
+    assert ngram_ids(engine, "XQZ", "50%") == []
@@ -0,0 +1,67 @@
+import random
+
+from backend.search.imprint_suggest import ImprintSuggester
+
+CATALOG = [
+    {"item_seq": "1", "shape_group": "round", "color_group": "white", "print_front": "TY|10", "print_back": ""},
+    {"item_seq": "2", "shape_group": "round", "color_group": ["white", "yellow"], "print_front": "TY",
+     "print_back": "TYL"},
+    {"item_seq": "3", "shape_group": "oval", "color_group": "white", "print_front": "TYL", "print_back": None},
+    {"item_seq": "4", "shape_group": "oval", "color_group": "red", "print_front": "TYL",
+     "mark_code_front_anal": "마크 TY"},
+]
+
+
+def make_suggester(records=CATALOG, ranked_prefix_len=2) -> ImprintSuggester:
+    suggester = ImprintSuggester(ranked_prefix_len=ranked_prefix_len)
+    suggester.build(records)
+    return suggester
+
+
+def imprints(suggestions):
+    return [suggestion["imprint"] for suggestion in suggestions]
+
+
+def test_exact_match_first_then_by_count():
+    suggester = make_suggester()
+    assert imprints(suggester.suggest("ty")) == ["TY", "TYL", "TY10"]
+    assert suggester.suggest("tyl") == [{"imprint": "TYL", "kind": "print", "count": 3}]
+    assert imprints(suggester.suggest("T")) == ["TYL", "TY", "TY10"]
+
+
+def test_shape_and_color_filters():
+    suggester = make_suggester()
+    assert imprints(suggester.suggest("TY", shape_group="oval")) == ["TYL"]
+    assert imprints(suggester.suggest("TY", color_groups=["yellow"])) == ["TY", "TYL"]
+    assert imprints(suggester.suggest("마", shape_group="oval")) == ["마크 TY"]
+    assert suggester.suggest("TY", shape_group="oblong") == []
+
+
+def test_popular_key_at_end_of_wide_range_is_ranked():
+    # 접두사 범위가 넓어도 정렬 순서상 뒤쪽의 알약 수가 많은 키를 놓치지 않음
+    records = [{"item_seq": f"a{i}", "print_front": f"A{i:05d}"} for i in range(20000)]
+    records += [{"item_seq": f"z{i}", "print_front": "AZZ"} for i in range(3)]
+    for ranked_prefix_len in (0, 2):
+        suggester = make_suggester(records, ranked_prefix_len)
+        assert imprints(suggester.suggest("A", limit=1)) == ["AZZ"]
+
+
+def test_ranked_prefixes_match_full_range_ranking():
+    rng = random.Random(7)
+    records = [
+        {"item_seq": str(i), "shape_group": rng.choice(["round", "oval"]), "color_group": rng.choice(["white", "red"]),
+         "print_front": "".join(rng.choice("ABC12") for _ in range(rng.randint(1, 4)))}
+        for i in range(500)
+    ]
+    ranked, scanned = make_suggester(records, 2), make_suggester(records, 0)
+    for prefix in ("A", "B1", "C", "12", "A2C"):
+        for shape_group in (None, "oval"):
+            assert ranked.suggest(prefix, shape_group, limit=7) == scanned.suggest(prefix, shape_group, limit=7)
+
+
+def test_rebuild_replaces_index():
+    suggester = make_suggester()
+    suggester.build([{"item_seq": "9", "print_front": "IDG"}])
+    assert suggester.suggest("TY") == []
+    assert imprints(suggester.suggest("I")) == ["IDG"]
+    assert suggester.get_stats()["keys"] == 1
@@ -0,0 +1,25 @@
+import pytest
+
+from backend.db.index_settings import PERFORMANCE_PROFILES, build_index_body
+
+# build_es_query의 match 절이 점수를 매기는 필드
+SCORED_TEXT_FIELDS = [
+    "print_front", "print_back", "mark_code_front_anal", "mark_code_back_anal",
+    "print_front_normalized", "print_back_normalized",
+]
+
+
+@pytest.mark.parametrize("profile", list(PERFORMANCE_PROFILES))
+def test_profiles_keep_norms_on_scored_fields(profile):
+    properties = build_index_body(profile)["mappings"]["properties"]
+    for field in SCORED_TEXT_FIELDS:
+        assert properties[field]["type"] == "text"
+        assert properties[field].get("norms", True), field
+
+
+def test_search_profile_settings():
+    body = build_index_body("search")
+    properties = body["mappings"]["properties"]
+    assert properties["shape_group"]["eager_global_ordinals"]
+    assert body["settings"]["index"]["sort"]["field"] == ["shape_group", "color_group"]
+    assert body["mappings"]["_meta"]["profile"] == "search"
@@ -0,0 +1,190 @@
+import asyncio
+import json
+import math
+
+import pytest
+
+from backend.search import logic
+from backend.search.local_engine import BM25_B, BM25_K1, LocalPillEngine, UnsupportedQueryError, \
+    _bounded_osa_distance, bm25_idf, pill_engine, write_snapshot
+
+DOCS = [
+    ("1", {"item_seq": "1", "print_front": "TYLENOL 500", "print_back": "", "drug_shape": "원형",
+           "shape_group": "round", "color_group": "white"}),
+    ("2", {"item_seq": "2", "print_front": "TYLENAL", "print_back": "ER", "drug_shape": "타원형",
+           "shape_group": "oval", "color_group": "white"}),
+    ("3", {"item_seq": "3", "print_front": "IDG", "print_back": "105", "drug_shape": "원형",
+           "shape_group": "round", "color_group": ["yellow", "white"]}),
+    ("4", {"item_seq": "4", "print_front": "ABC12", "print_back": "", "drug_shape": "장방형",
+           "shape_group": "oblong", "color_group": "red"}),
+]
+
+
+@pytest.fixture
+def engine(tmp_path):
+    path = str(tmp_path / "pills.pillsnap")
+    write_snapshot(path, DOCS, "pills", index_version="pills_v1:uuid1")
+    engine = LocalPillEngine()
+    engine.load(path)
+    yield engine
+    engine.close()
+
+
+def search_ids(engine, query, size=10):
+    return [hit["_id"] for hit in engine.search({"size": size, "query": query})]
+
+
+def test_term_and_bitset_filter(engine):
+    assert search_ids(engine, {"term": {"drug_shape": "원형"}}) == ["1", "3"]
+    # 비트셋 필드는 여러 값을 가진 문서도 값마다 일치
+    assert search_ids(engine, {"terms": {"color_group": ["yellow"]}}) == ["3"]
+    assert search_ids(engine, {"term": {"color_group": "blue"}}) == []
+
+
+def test_match_text_tokens(engine):
+    assert search_ids(engine, {"match": {"print_front": "tylenol"}}) == ["1"]
+    assert search_ids(engine, {"match": {"print_back": "105"}}) == ["3"]
+
+
+def test_fuzzy_match(engine):
+    assert sorted(search_ids(engine, {"match": {"print_front": {"query": "tylenol", "fuzziness": 1}}})) == ["1", "2"]
+    assert search_ids(engine, {"match": {"print_front": {"query": "abd12", "fuzziness": "AUTO"}}}) == ["4"]
+    assert search_ids(engine, {"match": {"print_front": {"query": "xyz", "fuzziness": 2}}}) == []
+
+
+def test_bool_scoring_and_filters(engine):
+    query = {"bool": {
+        "filter": [{"term": {"color_group": "white"}}],
+        "should": [
+            {"match": {"print_front": {"query": "tylenol", "boost": 3}}},
+            {"term": {"drug_shape": {"value": "타원형", "boost": 1}}},
+        ],
+        "minimum_should_match": 1,
+    }}
+    hits = engine.search({"size": 10, "query": query})
+    assert [hit["_id"] for hit in hits] == ["1", "2"]
+    # print_front: 문서 4개, 토큰 5개(avgdl 1.25), 문서 1은 토큰 2개 / drug_shape keyword: norm 없음(avgdl 1)
+    text_score = 3 * bm25_idf(1, 4) / (1 + BM25_K1 * (1 - BM25_B + BM25_B * 2 / 1.25))
+    keyword_score = bm25_idf(1, 4) / (1 + BM25_K1)
+    assert hits[0]["_score"] == pytest.approx(text_score)
+    assert hits[1]["_score"] == pytest.approx(keyword_score)
+
+
+def test_terms_is_constant_score(engine):
+    hits = engine.search({"query": {"terms": {"drug_shape": ["원형", "장방형"], "boost": 2}}})
+    assert [hit["_id"] for hit in hits] == ["1", "3", "4"]
+    assert {hit["_score"] for hit in hits} == {2.0}
+
+
+def test_bm25_term_frequency_and_field_length(tmp_path):
+    path = str(tmp_path / "tf.pillsnap")
+    write_snapshot(path, [
+        ("1", {"print_front": "AB AB"}),
+        ("2", {"print_front": "AB CD EF"}),
+        ("3", {"print_front": "AB"}),
+    ], "pills")
+    engine = LocalPillEngine()
+    engine.load(path)
+    hits = engine.search({"query": {"match": {"print_front": "ab"}}})
+    engine.close()
+
+    avgdl = 6 / 3
+    idf = bm25_idf(3, 3)
+    expected = {
+        "1": idf * 2 / (2 + BM25_K1 * (1 - BM25_B + BM25_B * 2 / avgdl)),
+        "2": idf * 1 / (1 + BM25_K1 * (1 - BM25_B + BM25_B * 3 / avgdl)),
+        "3": idf * 1 / (1 + BM25_K1 * (1 - BM25_B + BM25_B * 1 / avgdl)),
+    }
+    assert [hit["_id"] for hit in hits] == ["1", "3", "2"]
+    assert {hit["_id"]: hit["_score"] for hit in hits} == pytest.approx(expected)
+
+
+def test_fuzzy_blends_doc_freq_and_weights_similarity(engine):
+    # 확장 용어(tylenol, tylenal) 중 가장 큰 문서 빈도로 idf를 맞추고, 편집 거리 1인 용어는 1 - 1/7 배
+    hits = engine.search({"query": {"match": {"print_front": {"query": "tylenol", "fuzziness": 1}}}})
+    idf = bm25_idf(1, 4)
+    norm = lambda length: BM25_K1 * (1 - BM25_B + BM25_B * length / 1.25)
+    expected = {"1": idf / (1 + norm(2)), "2": (1 - 1 / 7) * idf / (1 + norm(1))}
+    assert {hit["_id"]: hit["_score"] for hit in hits} == pytest.approx(expected)
+    assert math.isclose(hits[0]["_score"], max(expected.values()))
+
+
+def test_unsupported_query_falls_back(engine):
+    with pytest.raises(UnsupportedQueryError):
+        engine.search({"query": {"wildcard": {"print_front": "TY*"}}})
+    with pytest.raises(UnsupportedQueryError):
+        engine.search({"query": {"term": {"entp_name": "유한양행"}}})
+    with pytest.raises(UnsupportedQueryError):
+        engine.search({"query": {"match_all": {}}, "aggs": {}})
+
+
+def test_near_matches_bruteforce(engine):
+    table = engine._snapshot.tables["print_front"]
+    terms = [table.term(i) for i in range(table.count)]
+    for token in ("tylenol", "idg", "abc", "tylenal", "5000"):
+        for max_edits in (1, 2):
+            expected = sorted(term for term in terms if _bounded_osa_distance(token, term, max_edits) <= max_edits)
+            matches = table.near(token, max_edits)
+            assert sorted(table.term(i) for i, _ in matches) == expected
+            assert all(_bounded_osa_distance(token, table.term(i), max_edits) == d for i, d in matches)
+
+
+def test_index_version_and_docs(engine):
+    assert engine.index_version == "pills_v1:uuid1"
+    assert engine.is_current("pills_v1:uuid1")
+    assert not engine.is_current("pills_v2:uuid2")
+    version, docs = engine.snapshot_docs()
+    assert version == "pills_v1:uuid1"
+    assert [doc_id for doc_id, _ in docs] == ["1", "2", "3", "4"]
+
+
+def test_unversioned_snapshot_is_always_current(tmp_path):
+    path = str(tmp_path / "bench.pillsnap")
+    write_snapshot(path, DOCS, "pills")
+    engine = LocalPillEngine()
+    engine.load(path)
+    assert engine.is_current("pills_v9:uuid9")
+    engine.close()
+    assert not engine.ready
+    assert engine.snapshot_docs() == (None, [])
+
+
+def test_refresh_reuses_snapshot_written_by_other_worker(engine, tmp_path):
+    # 다른 워커가 새 세대 스냅샷을 같은 경로에 이미 만들었으면 ES 스캔 없이 다시 로드
+    path = str(tmp_path / "pills.pillsnap")
+    write_snapshot(path, DOCS[:2], "pills", index_version="pills_v2:uuid2")
+    assert asyncio.run(engine.refresh(None, "pills", "pills_v2:uuid2"))
+    assert engine.index_version == "pills_v2:uuid2"
+    assert engine.doc_count == 2
+    assert search_ids(engine, {"term": {"drug_shape": "원형"}}) == ["1"]
+
+
+def test_reload_keeps_in_flight_snapshot(engine, tmp_path):
+    # 검색은 시작 시점의 스냅샷 참조로 끝까지 수행되므로 교체 중에도 이전 세대를 그대로 읽음
+    previous = engine._snapshot
+    path = str(tmp_path / "next.pillsnap")
+    write_snapshot(path, DOCS[:1], "pills", index_version="pills_v2:uuid2")
+    engine.load(path)
+    assert [hit["_id"] for hit in previous.search({"query": {"term": {"drug_shape": "원형"}}}, "pills")] == ["1", "3"]
+    assert search_ids(engine, {"term": {"drug_shape": "원형"}}) == ["1"]
+
+
+def test_search_local_engine_falls_back_on_error(tmp_path, monkeypatch):
+    path = str(tmp_path / "pills.pillsnap")
+    write_snapshot(path, DOCS, "pills")
+    pill_engine.load(path)
+
+    async def index_version():
+        return "pills_v1:uuid1"
+
+    def broken_search(query_body, index_name=""):
+        raise RuntimeError("corrupt snapshot")
+
+    monkeypatch.setattr(logic.search_cache, "index_version", index_version)
+    monkeypatch.setattr(pill_engine, "search", broken_search)
+    errors = pill_engine.stats["search_errors"]
+    try:
+        assert asyncio.run(logic.search_local_engine(json.dumps({"query": {"match_all": {}}}))) == []
+        assert pill_engine.stats["search_errors"] == errors + 1
+    finally:
+        pill_engine.close()
@@ -0,0 +1,110 @@
+import asyncio
+
+from backend.search.medicine_names import MedicineNameIndex, core_name, search_name
+
+ITEM_NAMES = [
+    "타이레놀정500밀리그람(아세트아미노펜)",
+    "타이레놀정160밀리그람(아세트아미노펜)",
+    "타이레놀8시간이알서방정(아세트아미노펜)",
+    "씬지로이드정0.1밀리그램(레보티록신나트륨수화물)",
+    "게보린정(수출명:돌로린정)",
+    "아스피린프로텍트정100밀리그램",
+    "Tylenol 8 HR",
+]
+
+
+RECORDS = [{"item_seq": str(100 + i), "item_name": name, "entp_name": "제약"} for i, name in enumerate(ITEM_NAMES)]
+
+
+def make_index() -> MedicineNameIndex:
+    index = MedicineNameIndex(min_score=0.45, confident_score=0.8, retry_interval=300)
+    index.build(RECORDS)
+    return index
+
+
+def resolve(index: MedicineNameIndex, query: str):
+    names = index.search(query, limit=1)
+    return names[0]["name"] if names else None
+
+
+def test_names():
+    assert search_name("타이레놀정500밀리그람(아세트아미노펜)") == "타이레놀정"
+    assert search_name("게보린정(수출명:돌로린정)") == "게보린정"
+    assert search_name("Tylenol 8 HR") == "Tylenol"
+    assert core_name("Tylenol 8 HR") == "tylenol"
+
+
+def test_strengths_share_one_name():
+    assert make_index().get_stats()["names"] == 6
+
+
+def test_exact_name():
+    assert resolve(make_index(), "타이레놀정") == "타이레놀정"
+
+
+def test_voice_typo():
+    index = make_index()
+    assert resolve(index, "신지로이드") == "씬지로이드정"
+    assert resolve(index, "개보린") == "게보린정"
+
+
+def test_chosung_prefix():
+    names = [item["name"] for item in make_index().search("ㅌㅇㄹㄴ")]
+    # 초성이 짧은(입력과 더 가까운) 이름이 먼저
+    assert names == ["타이레놀", "타이레놀정"]
+
+
+def test_unrelated_query_has_no_candidate():
+    index = make_index()
+    assert index.search("오메프라졸") == []
+    assert resolve(index, "오메프라졸") is None
+    assert index.stats["misses"] == 2
+
+
+def test_not_ready():
+    assert MedicineNameIndex(min_score=0.45).candidates("타이레놀") == ([], False)
+
+
+def test_exact_name_candidates_include_every_strength():
+    candidates, confident = make_index().candidates("타이레놀정")
+    assert confident
+    assert [candidate["item_seq"] for candidate in candidates] == ["100", "101"]
+    assert candidates[0] == {"item_seq": "100", "item_name": ITEM_NAMES[0], "entp_name": "제약"}
+
+
+def test_literal_name_outranks_correction():
+    # "게보린"이 그대로 있으면 자모가 비슷한 "개보린정"보다 먼저
+    index = MedicineNameIndex(min_score=0.45, confident_score=0.8)
+    index.build([{"item_seq": "1", "item_name": "개보린정"}, {"item_seq": "2", "item_name": "게보린"}])
+    candidates, confident = index.candidates("게보린")
+    assert confident and candidates[0]["item_seq"] == "2"
+
+
+def test_confidence():
+    index = make_index()
+    assert index.candidates("신지로이드")[1]
+    assert index.candidates("ㅌㅇㄹㄴ")[1]
+    # 점수가 min_score 이상이어도 확신 기준 미만이면 원격 검색을 먼저
+    weak = MedicineNameIndex(min_score=0.45, confident_score=1.1)
+    weak.build(RECORDS)
+    candidates, confident = weak.candidates("개보린")
+    assert candidates and not confident
+
+
+def test_failed_build_backs_off():
+    class FailingES:
+        pass
+
+    async def scenario():
+        index = MedicineNameIndex(min_score=0.45, retry_interval=300)
+        # 스캔이 실패해도 예외 없이 실패 시각을 기록
+        assert not await index.refresh(FailingES(), "medicine_data")
+        index.ensure_fresh(FailingES(), "medicine_data")
+        assert index._refreshing is None
+        index.retry_interval = 0
+        index.ensure_fresh(FailingES(), "medicine_data")
+        assert index._refreshing is not None
+        await index._refreshing
+        return index.stats["build_errors"]
+
+    assert asyncio.run(scenario()) == 2
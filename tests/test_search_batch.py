@@ -0,0 +1,61 @@
+import asyncio
+
+from backend.search import logic
+
+HIT = {"_index": "pills", "_id": "1", "_score": 3.0, "_source": {"item_seq": "1"}}
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    async def msearch(self, searches):
+        self.requests.append(searches)
+        return {"responses": self.responses(searches)}
+
+
+def run_batch(monkeypatch, client, aembed):
+    stored = {}
+
+    async def cache_get(key):
+        return None
+
+    async def cache_set(key, hits):
+        stored[key] = hits
+
+    monkeypatch.setattr(logic, "PILL_SEARCH_MODE", "hybrid")
+    monkeypatch.setattr(logic, "IMPRINT_FUZZY_MODE", "fuzzy")
+    monkeypatch.setattr(logic, "get_es", lambda operation=None: client)
+    monkeypatch.setattr(logic.search_cache, "get", cache_get)
+    monkeypatch.setattr(logic.search_cache, "set", cache_set)
+    monkeypatch.setattr(logic.pill_embedder, "aembed", aembed)
+    monkeypatch.setattr(logic.query_profiler, "should_sample", lambda: False)
+    monkeypatch.setattr(logic.query_profiler, "observe", lambda *args: None)
+    results = asyncio.run(logic.search_pills_batch([{"imprint": "TYL", "drug_shape": "원형"}]))
+    return results, stored
+
+
+def test_hybrid_results_without_embedding_are_not_cached(monkeypatch):
+    async def broken_aembed(texts):
+        raise RuntimeError("embedding model unavailable")
+
+    client = FakeClient(lambda searches: [{"hits": {"hits": [HIT]}}])
+    results, stored = run_batch(monkeypatch, client, broken_aembed)
+
+    # lexical 결과로 응답하지만 하이브리드 키에 저장하지 않음
+    assert [hit["_id"] for hit in results[0]] == ["1"]
+    assert len(client.requests[0]) == 2
+    assert stored == {}
+
+
+def test_hybrid_results_are_cached(monkeypatch):
+    async def aembed(texts):
+        return [[0.0] * 4 for _ in texts]
+
+    client = FakeClient(lambda searches: [{"hits": {"hits": [HIT]}}] * (len(searches) // 2))
+    results, stored = run_batch(monkeypatch, client, aembed)
+
+    assert [hit["_id"] for hit in results[0]] == ["1"]
+    assert len(client.requests[0]) == 4
+    assert list(stored.values()) == [results[0]]
@@ -0,0 +1,41 @@
+import asyncio
+
+from backend.search.cache import SearchResultCache
+
+HITS = [{"_id": "1", "_score": 3.0, "_source": {"item_seq": "1", "color_classes": "하양"}}]
+
+
+def make_cache(monkeypatch):
+    cache = SearchResultCache(max_entries=10, ttl=60, redis_enabled=False, version_ttl=30)
+
+    async def index_version():
+        return "pills_v1:uuid1"
+
+    monkeypatch.setattr(cache, "index_version", index_version)
+    return cache
+
+
+def test_l1_hits_are_independent_copies(monkeypatch):
+    cache = make_cache(monkeypatch)
+    hits = [dict(hit, _source=dict(hit["_source"])) for hit in HITS]
+    asyncio.run(cache.set("key", hits))
+    # 저장 후 원본을 수정해도 캐시 항목은 그대로
+    hits[0]["_source"]["item_name"] = "added after set"
+
+    first = asyncio.run(cache.get("key"))
+    assert first == HITS
+    first[0]["_source"]["medicine"] = {"item_name": "attached by caller"}
+    first.append({"_id": "2"})
+
+    assert asyncio.run(cache.get("key")) == HITS
+    assert cache.stats["l1_hits"] == 2
+
+
+def test_miss_and_lru_eviction(monkeypatch):
+    cache = make_cache(monkeypatch)
+    cache.max_entries = 1
+    asyncio.run(cache.set("a", HITS))
+    asyncio.run(cache.set("b", HITS))
+    assert asyncio.run(cache.get("a")) is None
+    assert asyncio.run(cache.get("b")) == HITS
+    assert cache.stats["evictions"] == 1 and cache.stats["misses"] == 1
@@ -0,0 +1,48 @@
+import json
+
+import pytest
+
+from backend.search import logic
+from backend.search.templates import QueryTemplates, query_shape
+
+
+def direct_body(norm, top_k, profile):
+    body = logic.build_es_query(norm, top_k)
+    body["_source"] = logic.SOURCE_PROFILES[profile]
+    return body
+
+
+@pytest.mark.parametrize("features", [
+    {"imprint": "TYL|500", "drug_shape": "원형", "color_classes": ["하양", "노랑"]},
+    {"imprint": "마크 ㄱ", "drug_shape": "타원형"},
+    {"drug_shape": "장방형", "color_classes": "분홍"},
+    {"imprint": "IDG", "color_classes": "투명"},
+    {"imprint": 'A"B\\C'},
+])
+@pytest.mark.parametrize("profile", ["card", "id"])
+def test_render_matches_build_es_query(features, profile):
+    templates = QueryTemplates(logic.build_es_query, logic.SOURCE_PROFILES)
+    norm = logic.preprocess_features(features)
+    assert json.loads(templates.render(norm, 7, profile)) == direct_body(norm, 7, profile)
+
+
+def test_same_shape_reuses_compiled_template():
+    templates = QueryTemplates(logic.build_es_query, logic.SOURCE_PROFILES)
+    first = logic.preprocess_features({"imprint": "ABC", "drug_shape": "원형"})
+    second = logic.preprocess_features({"imprint": "CAB", "drug_shape": "원형"})
+    assert query_shape(first, "card") == query_shape(second, "card")
+
+    body = templates.render(first, 5, "card")
+    templates.render(second, 5, "card")
+    assert templates.cache_info().misses == 1 and templates.cache_info().hits == 1
+    # 같은 요청은 항상 같은 바이트열 (ES request cache 키)
+    assert templates.render(first, 5, "card") == body
+    assert "CAB" not in body
+
+
+def test_different_profile_compiles_new_template():
+    templates = QueryTemplates(logic.build_es_query, logic.SOURCE_PROFILES)
+    norm = logic.preprocess_features({"imprint": "ABC"})
+    templates.render(norm, 5, "card")
+    templates.render(norm, 5, "id")
+    assert templates.cache_info().misses == 2
@@ -0,0 +1,103 @@
+import asyncio
+import io
+import time
+
+import pytest
+from PIL import Image, ImageDraw
+
+from backend.services import vision_cache as vision_cache_module
+from backend.services.image_preprocess import normalize_image
+from backend.services.vision_cache import VisionResultCache, image_digest
+
+NAMESPACE = "model:structured:abcd1234"
+CANDIDATES = [{"drug_shape": "원형", "color_classes": "하양", "imprint": "TYL"}]
+
+
+def pill_photo(imprint: str) -> bytes:
+    """회색 배경 위 흰색 원형 정제, 인쇄문자만 다름"""
+    img = Image.new("RGB", (640, 480), (120, 120, 120))
+    draw = ImageDraw.Draw(img)
+    draw.ellipse((220, 140, 420, 340), fill=(245, 245, 245))
+    draw.text((300, 232), imprint, fill=(60, 60, 60))
+    out = io.BytesIO()
+    img.save(out, format="JPEG", quality=95)
+    return out.getvalue()
+
+
+def normalized(data: bytes) -> bytes:
+    return normalize_image(data, max_edge=512, crop=False, output_format="JPEG", quality=85)[0]
+
+
+def make_cache(**kwargs) -> VisionResultCache:
+    options = {"max_entries": 10, "ttl": 60, "redis_enabled": False}
+    options.update(kwargs)
+    return VisionResultCache(**options)
+
+
+@pytest.fixture(autouse=True)
+def enable_cache(monkeypatch):
+    monkeypatch.setattr(vision_cache_module, "VISION_CACHE_ENABLED", True)
+
+
+def test_same_photo_hits():
+    cache = make_cache()
+    first = image_digest(normalized(pill_photo("TYL")))
+    again = image_digest(normalized(pill_photo("TYL")))
+    asyncio.run(cache.set(NAMESPACE, first, CANDIDATES))
+    assert asyncio.run(cache.get(NAMESPACE, again)) == CANDIDATES
+    assert cache.stats["l1_hits"] == 1
+
+
+@pytest.mark.parametrize("stored, asked", [("TYL", "500"), ("5", "A+"), ("ER", "FR"), ("10", "1O")])
+def test_different_imprint_misses(stored, asked):
+    cache = make_cache()
+    asyncio.run(cache.set(NAMESPACE, image_digest(normalized(pill_photo(stored))), CANDIDATES))
+    assert asyncio.run(cache.get(NAMESPACE, image_digest(normalized(pill_photo(asked))))) is None
+    assert cache.stats["misses"] == 1
+
+
+def test_namespace_isolated():
+    cache = make_cache()
+    asyncio.run(cache.set(NAMESPACE, "digest", CANDIDATES))
+    assert asyncio.run(cache.get("other-model:structured:abcd1234", "digest")) is None
+
+
+def test_returns_copy():
+    cache = make_cache()
+    asyncio.run(cache.set(NAMESPACE, "digest", CANDIDATES))
+    asyncio.run(cache.get(NAMESPACE, "digest"))[0]["imprint"] = "changed"
+    assert asyncio.run(cache.get(NAMESPACE, "digest")) == CANDIDATES
+
+
+def test_expired_entry_misses(monkeypatch):
+    cache = make_cache(ttl=10)
+    asyncio.run(cache.set(NAMESPACE, "digest", CANDIDATES))
+    now = time.monotonic()
+    monkeypatch.setattr(vision_cache_module.time, "monotonic", lambda: now + 11)
+    assert asyncio.run(cache.get(NAMESPACE, "digest")) is None
+    assert cache.get_stats()["entries"] == 0
+
+
+def test_empty_result_not_cached():
+    cache = make_cache()
+    asyncio.run(cache.set(NAMESPACE, "digest", []))
+    assert cache.stats["sets"] == 0
+    assert asyncio.run(cache.get(NAMESPACE, "digest")) is None
+
+
+def test_lru_eviction():
+    cache = make_cache(max_entries=2)
+    for digest in ("a", "b"):
+        asyncio.run(cache.set(NAMESPACE, digest, CANDIDATES))
+    asyncio.run(cache.get(NAMESPACE, "a"))
+    asyncio.run(cache.set(NAMESPACE, "c", CANDIDATES))
+    assert asyncio.run(cache.get(NAMESPACE, "b")) is None
+    assert asyncio.run(cache.get(NAMESPACE, "a")) == CANDIDATES
+    assert cache.stats["evictions"] == 1
+
+
+def test_disabled(monkeypatch):
+    monkeypatch.setattr(vision_cache_module, "VISION_CACHE_ENABLED", False)
+    cache = make_cache()
+    asyncio.run(cache.set(NAMESPACE, "digest", CANDIDATES))
+    assert asyncio.run(cache.get(NAMESPACE, "digest")) is None
@@ -0,0 +1,84 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend.services import vision_response
+from backend.services.vision_metrics import VisionResponseMetrics
+
+A = '{"drug_shape": "원형", "color_classes": ["하양"], "imprint": "TYL"}'
+B = '{"drug_shape": "타원형", "color_classes": ["노랑", "주황"], "imprint": "500"}'
+
+
+@pytest.fixture(autouse=True)
+def fresh_metrics(monkeypatch):
+    metrics = VisionResponseMetrics()
+    monkeypatch.setattr(vision_response, "vision_metrics", metrics)
+    return metrics
+
+
+def test_structured_full_response():
+    assert vision_response.parse_response(f"[{A},{B}]", "structured")[1]["imprint"] == "500"
+
+
+def test_truncated_array_keeps_complete_items(fresh_metrics):
+    text = f'[{A},{B},{{"drug_shape": "원형", "color_cl'
+    items = vision_response.parse_response(text, "structured", truncated=True)
+    assert [item["imprint"] for item in items] == ["TYL", "500"]
+    stats = fresh_metrics.get_stats()["modes"]["structured"]
+    assert stats["salvaged"] == 1 and stats["parse_failures"] == 1
+
+
+def test_truncated_inside_first_item_fails():
+    with pytest.raises(ValueError):
+        vision_response.parse_response('[{"drug_shape": "원형", "color_classes": ["하', "structured", truncated=True)
+
+
+def test_truncated_single_object_fails():
+    # 객체 안의 색상 배열을 결과 배열로 잘못 읽지 않아야 함
+    with pytest.raises(ValueError):
+        vision_response.parse_response('{"drug_shape": "원형", "color_classes": ["하양"], "imp', "text", truncated=True)
+
+
+def test_truncated_text_mode_code_block():
+    text = f"분석 결과입니다.\n```json\n[\n  {A},\n  {B},\n  {{\"drug"
+    assert len(vision_response.parse_response(text, "text", truncated=True)) == 2
+
+
+def test_truncated_but_complete_json():
+    assert len(vision_response.parse_response(f"[{A}]", "structured", truncated=True)) == 1
+
+
+def test_text_mode_extracts_code_block():
+    assert vision_response.parse_response(f"결과:\n```json\n[{A}]\n```", "text")[0]["imprint"] == "TYL"
+
+
+def test_text_mode_skips_leading_brackets():
+    assert vision_response.parse_response(f"[참고] 알약 1개 {A} 입니다.", "text")["imprint"] == "TYL"
+
+
+def test_text_mode_without_json_records_failure(fresh_metrics):
+    with pytest.raises(ValueError):
+        vision_response.parse_response("알약이 보이지 않습니다.", "text")
+    assert fresh_metrics.get_stats()["modes"]["text"]["parse_failures"] == 1
+
+
+def test_normalize_single_color():
+    candidates = vision_response.normalize_candidates([
+        {"color_classes": ["하양"]}, {"color_classes": ["노랑", "주황"]}, {"color_classes": "초록"}, "x",
+    ])
+    assert [c["color_classes"] if isinstance(c, dict) else c for c in candidates] == \
+        ["하양", ["노랑", "주황"], "초록", "x"]
+
+
+def test_response_text_and_finish_reason():
+    class Blocked:
+        @property
+        def text(self):
+            raise ValueError("no parts")
+        candidates = []
+
+    assert vision_response.response_text(Blocked()) == ""
+    assert vision_response.finish_reason(Blocked()) is None
+    response = SimpleNamespace(text="[]", candidates=[SimpleNamespace(finish_reason=SimpleNamespace(name="MAX_TOKENS"))])
+    assert vision_response.response_text(response) == "[]"
+    assert vision_response.finish_reason(response) == "MAX_TOKENS"